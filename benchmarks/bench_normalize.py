@@ -0,0 +1,55 @@
+"""Scalar vs column-wise normalize over synthetic raw cells.
+
+    uv run python benchmarks/bench_normalize.py --cells 1000000
+"""
+from __future__ import annotations
+
+import argparse
+import random
+import time
+
+from ipeds_crawler.normalize import _coerce, coerce_series, normalize_series, normalize_value
+
+
+def raw_cells(n: int, seed: int = 0) -> list[str]:
+    rng = random.Random(seed)
+    # Roughly the mix seen on report pages: counts, percentages, dollar amounts, dashes, labels.
+    makers = [
+        lambda: f"{int(rng.paretovariate(1.2) * 10):,}",
+        lambda: f"{rng.randint(0, 100)}%",
+        lambda: f"${rng.randint(0, 900) * 100:,}",
+        lambda: f"{rng.random() * 100:.2f}",
+        lambda: rng.choice(["-", "--", "—"]),
+        lambda: rng.choice(["Biology", "Business, Management", "N/A"]),
+    ]
+    return [rng.choice(makers)() for _ in range(n)]
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return time.perf_counter() - start, result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--cells", type=int, default=500_000)
+    args = parser.parse_args()
+
+    cells = raw_cells(args.cells)
+    print(f"{len(cells):,} cells, {len(set(cells)):,} distinct")
+    for name, scalar, batch in (
+        ("normalize", normalize_value, normalize_series),
+        ("coerce", _coerce, coerce_series),
+    ):
+        t_scalar, expected = timed(lambda f: [f(v) for v in cells], scalar)
+        t_batch, got = timed(lambda f: f(cells).tolist(), batch)
+        assert got == expected, f"{name}: batch result differs from the scalar path"
+        print(
+            f"{name:<10} scalar {t_scalar * 1e9 / len(cells):7.0f} ns/cell   "
+            f"batch {t_batch * 1e9 / len(cells):7.0f} ns/cell   {t_scalar / t_batch:5.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
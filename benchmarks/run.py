@@ -0,0 +1,265 @@
+"""Offline micro-benchmarks: extraction per page, normalization per cell, record assembly per pair.
+
+    uv run python benchmarks/run.py --output baseline.json
+    uv run python benchmarks/run.py --baseline baseline.json --fail-on-regression
+
+Pages are synthetic fixtures (ipeds_crawler.fixtures) for each layout: 2014-2019,
+2020-2022 and 2023+. Each benchmark is timed `--repeat` times and the median time
+per operation is what gets compared against a baseline.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import gc
+import importlib.metadata
+import json
+import logging
+import platform
+import re
+import statistics
+import subprocess
+import sys
+import time
+from collections.abc import Callable
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any
+
+from bench_normalize import raw_cells
+
+from ipeds_crawler.extractors import get_box_data, get_text_data, snapshot_tables
+from ipeds_crawler.fixtures import LAYOUTS, survey_page
+from ipeds_crawler.normalize import (
+    block_to_df,
+    build_labeled_dict,
+    coerce_series,
+    graph_to_df,
+    normalize,
+    normalize_series,
+    normalize_value,
+)
+from ipeds_crawler.offline import StaticFrame
+from ipeds_crawler.orchestrator import SURVEYS, crawl_pair, extract_survey
+from ipeds_crawler.surveys import compile_plan
+
+logger = logging.getLogger("ipeds_crawler.bench")
+_LOOP = asyncio.new_event_loop()
+
+
+# ---------------------------
+# Timing
+# ---------------------------
+def measure(fn: Callable[[], Any], ops: int, min_time: float, repeat: int) -> dict[str, Any]:
+    """Time `fn` (which performs `ops` operations) like timeit: calibrated loop count, gc off."""
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        if time.perf_counter() - start >= min_time / 5 or number >= 1 << 20:
+            break
+        number *= 2
+    runs = []
+    for _ in range(repeat):
+        gc.collect()
+        gc.disable()
+        try:
+            start = time.perf_counter()
+            for _ in range(number):
+                fn()
+            elapsed = time.perf_counter() - start
+        finally:
+            gc.enable()
+        runs.append(elapsed * 1e9 / (number * ops))
+    return {"median_ns": statistics.median(runs), "min_ns": min(runs), "runs_ns": runs, "ops": number * ops}
+
+
+def run_async(coro_fn: Callable[[], Any]) -> Callable[[], Any]:
+    return lambda: _LOOP.run_until_complete(coro_fn())
+
+
+# ---------------------------
+# Benchmarks
+# ---------------------------
+def extraction_benchmarks(layout: str, year: int) -> dict[str, tuple[Callable[[], Any], int, str]]:
+    pages = {survey: survey_page(survey, year) for survey in SURVEYS}
+    plans = {survey: compile_plan(survey, year) for survey in SURVEYS}
+
+    def parse() -> None:
+        for html in pages.values():
+            StaticFrame(html)
+
+    async def snapshot() -> None:
+        # Parse + table_status + one table dump + plan.extract + build, as the crawler does per page.
+        for survey, html in pages.items():
+            await extract_survey(StaticFrame(html), plans[survey], logger)
+
+    async def locators() -> None:
+        # The per-field get_text_data/get_box_data path the snapshot replaced.
+        for survey, html in pages.items():
+            frame = StaticFrame(html)
+            plan = plans[survey]
+            for q in plan.queries:
+                label = q.labels[0]
+                if q.box:
+                    await get_box_data(frame, label, year, table_selector=q.table, value_selector=q.value)
+                else:
+                    await get_text_data(
+                        frame, label, year, table_selector=q.table, value_selector=q.value,
+                        table_header=q.header, exact=q.exact,
+                    )
+
+    extracted = {}
+    for survey, html in pages.items():
+        snap = _LOOP.run_until_complete(snapshot_tables(StaticFrame(html), year, plans[survey].selectors))
+        extracted[survey] = plans[survey].extract(snap)
+
+    def build() -> None:
+        for survey in SURVEYS:
+            plans[survey].build(extracted[survey])
+
+    async def goto(page: Any, unit_id: Any, survey_num: int, year_: int) -> StaticFrame:
+        return StaticFrame(pages[survey_num])
+
+    async def pair() -> None:
+        await crawl_pair([None], "Fixture University", 100000, year, logger, goto=goto)
+
+    n = len(SURVEYS)
+    return {
+        f"extract.parse[{layout}]": (parse, n, "page"),
+        f"extract.snapshot[{layout}]": (run_async(snapshot), n, "page"),
+        f"extract.locators[{layout}]": (run_async(locators), n, "page"),
+        f"build_labeled_dict[{layout}]": (build, n, "survey"),
+        f"record.pair[{layout}]": (run_async(pair), 1, "pair"),
+    }
+
+
+def normalize_benchmarks(cells: int) -> dict[str, tuple[Callable[[], Any], int, str]]:
+    raw = raw_cells(cells)
+    rows = [raw[i : i + 3] for i in range(0, len(raw) - 2, 3)]
+    block = [["Full-time", *raw[0:3]], ["Part-time", *raw[3:6]], ["Total", *raw[6:9]]]
+    graph = [["Bachelor's", ("Men", raw[0]), ("Women", raw[1])], ["Master's", ("Men", raw[2]), ("Women", raw[3])]]
+    values = {"a": raw[:3], "b": raw[3], "c": raw[4:8]}
+    specs = (
+        ("num", ["first", "second", "third"], "a", slice(None)),
+        ("pct", "", "b", None),
+        ("amount", ["in", "out"], "c", slice(0, 2), "first"),
+    )
+
+    def labeled() -> None:
+        build_labeled_dict(*((base, labels, values[name], *rest) for base, labels, name, *rest in specs))
+
+    return {
+        "normalize.value": (lambda: [normalize_value(v) for v in raw], len(raw), "cell"),
+        "normalize.rows": (lambda: [normalize(r) for r in rows], len(rows) * 3, "cell"),
+        "normalize.series": (lambda: normalize_series(raw), len(raw), "cell"),
+        "coerce.series": (lambda: coerce_series(raw), len(raw), "cell"),
+        "block_to_df.append": (lambda: block_to_df(block, ["Men", "Women", "Total"], mode="append"), 1, "call"),
+        "block_to_df.replace": (lambda: block_to_df(block, ["a", "b", "c"], mode="replace"), 1, "call"),
+        "graph_to_df.append": (lambda: graph_to_df(graph, mode="append"), 1, "call"),
+        "graph_to_df.replace": (lambda: graph_to_df(graph, mode="replace"), 1, "call"),
+        "build_labeled_dict.call": (labeled, 1, "call"),
+    }
+
+
+# ---------------------------
+# Results
+# ---------------------------
+def _version(dist: str) -> str | None:
+    try:
+        return importlib.metadata.version(dist)
+    except importlib.metadata.PackageNotFoundError:
+        return None
+
+
+def meta(args: argparse.Namespace) -> dict[str, Any]:
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+            cwd=Path(__file__).parent,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "packages": {d: _version(d) for d in ("ipeds-crawler", "pandas", "numpy", "pyarrow")},
+        "args": {"min_time": args.min_time, "repeat": args.repeat, "cells": args.cells, "filter": args.filter},
+    }
+
+
+def compare(results: dict[str, Any], baseline: dict[str, Any], threshold: float) -> list[str]:
+    """Print current vs baseline medians; returns the names slower than `1 + threshold` times baseline."""
+    regressions = []
+    print(f"\n{'benchmark':<36} {'baseline':>12} {'current':>12} {'ratio':>7}")
+    for name, result in results.items():
+        base = baseline.get("results", {}).get(name)
+        if base is None:
+            print(f"{name:<36} {'-':>12} {_fmt(result['median_ns']):>12}     new")
+            continue
+        ratio = result["median_ns"] / base["median_ns"]
+        flag = ""
+        if ratio > 1 + threshold:
+            regressions.append(name)
+            flag = "  SLOWER"
+        elif ratio < 1 / (1 + threshold):
+            flag = "  faster"
+        print(f"{name:<36} {_fmt(base['median_ns']):>12} {_fmt(result['median_ns']):>12} {ratio:6.2f}x{flag}")
+    return regressions
+
+
+def _fmt(ns: float) -> str:
+    if ns >= 1e6:
+        return f"{ns / 1e6:.2f} ms"
+    if ns >= 1e3:
+        return f"{ns / 1e3:.1f} µs"
+    return f"{ns:.0f} ns"
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--output", help="Write results as JSON to this path.")
+    parser.add_argument("--baseline", help="JSON results of an earlier run to compare against.")
+    parser.add_argument("--threshold", type=float, default=0.10, help="Allowed slowdown before a benchmark counts as a regression (default 0.10 = 10%%).")
+    parser.add_argument("--fail-on-regression", action="store_true", help="Exit with status 1 when any benchmark regressed.")
+    parser.add_argument("--filter", default="", help="Only run benchmarks whose name matches this regex.")
+    parser.add_argument("--min-time", type=float, default=0.5, help="Target seconds per timing run (default 0.5).")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--cells", type=int, default=20_000, help="Raw cells per normalization run.")
+    args = parser.parse_args()
+
+    suite: dict[str, tuple[Callable[[], Any], int, str]] = {}
+    for layout, year in LAYOUTS.items():
+        suite.update(extraction_benchmarks(layout, year))
+    suite.update(normalize_benchmarks(args.cells))
+    pattern = re.compile(args.filter)
+
+    results: dict[str, Any] = {}
+    print(f"{'benchmark':<36} {'median':>12} {'min':>12}  per")
+    for name, (fn, ops, unit) in suite.items():
+        if not pattern.search(name):
+            continue
+        result = measure(fn, ops, args.min_time, args.repeat)
+        results[name] = {"unit": unit, **result}
+        print(f"{name:<36} {_fmt(result['median_ns']):>12} {_fmt(result['min_ns']):>12}  {unit}")
+
+    if args.output:
+        Path(args.output).write_text(json.dumps({"meta": meta(args), "results": results}, indent=2) + "\n")
+        print(f"\nwrote {args.output}")
+
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text())
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} benchmark(s) more than {args.threshold:.0%} slower than {args.baseline}")
+            if args.fail_on_regression:
+                return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
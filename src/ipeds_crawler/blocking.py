@@ -0,0 +1,245 @@
+from __future__ import annotations
+
+import contextlib
+import logging
+import re
+from dataclasses import dataclass, field, replace
+from typing import Any
+from urllib.parse import urlsplit
+
+logger = logging.getLogger("ipeds_crawler")
+
+# The report pages only need HTML and scripts from nces.ed.gov.
+ALLOW_HOSTS = ("nces.ed.gov",)
+
+# Analytics, tag managers, social widgets and web fonts seen on (or typical for) federal sites.
+# Blocked inside Chromium before a request is even issued.
+THIRD_PARTY_HOSTS = (
+    "google-analytics.com",
+    "googletagmanager.com",
+    "doubleclick.net",
+    "googlesyndication.com",
+    "fonts.googleapis.com",
+    "fonts.gstatic.com",
+    "dap.digitalgov.gov",
+    "siteimproveanalytics.com",
+    "siteimproveanalytics.io",
+    "facebook.net",
+    "facebook.com",
+    "twitter.com",
+    "addthis.com",
+    "hotjar.com",
+    "newrelic.com",
+    "nr-data.net",
+)
+
+BLOCK_RESOURCE_TYPES = frozenset({"image", "media", "font", "stylesheet"})
+
+# CDP Network.ResourceType names of Playwright's resource types.
+_CDP_TYPES = {
+    "document": "Document",
+    "stylesheet": "Stylesheet",
+    "image": "Image",
+    "media": "Media",
+    "font": "Font",
+    "script": "Script",
+    "texttrack": "TextTrack",
+    "xhr": "XHR",
+    "fetch": "Fetch",
+    "eventsource": "EventSource",
+    "websocket": "WebSocket",
+    "manifest": "Manifest",
+    "other": "Other",
+}
+
+# URL suffixes standing in for resource types in route patterns, which only see the URL.
+_TYPE_EXTENSIONS = {
+    "image": ("png", "jpg", "jpeg", "gif", "webp", "svg", "ico", "bmp"),
+    "media": ("mp4", "webm", "mp3", "ogg", "wav", "m4a"),
+    "font": ("woff", "woff2", "ttf", "otf", "eot"),
+    "stylesheet": ("css",),
+}
+
+
+@dataclass(frozen=True)
+class BlockPolicy:
+    """Which requests a browser context lets through.
+
+    Cheapest first, none of which round-trips allowed requests through Python:
+      * `block_hosts` are handed to Chromium (CDP `Network.setBlockedURLs`) and never leave the browser;
+      * `block_types` are intercepted by CDP `Fetch` patterns on resource type, so only
+        requests of those types pause (for a `Fetch.failRequest`);
+      * a context route whose URL regex matches only non-allowlisted hosts and blocked
+        file extensions aborts the rest (and stands in for the type patterns when a page
+        has no CDP session).
+
+    With `dry_run` nothing is blocked; traffic counters then report what would have been.
+    """
+
+    allow_hosts: tuple[str, ...] = ALLOW_HOSTS
+    block_hosts: tuple[str, ...] = THIRD_PARTY_HOSTS
+    block_types: frozenset[str] = BLOCK_RESOURCE_TYPES
+    dry_run: bool = False
+
+    def allowing(self, *hosts: str) -> BlockPolicy:
+        """A copy that also allows `hosts`."""
+        extra = tuple(h for h in hosts if h and h not in self.allow_hosts)
+        return replace(self, allow_hosts=self.allow_hosts + extra)
+
+    def for_base_url(self, base_url: str) -> BlockPolicy:
+        """A copy that also allows the host of `base_url` (e.g. the local stand-in), on any port."""
+        return self.allowing(urlsplit(base_url).hostname or "")
+
+    @staticmethod
+    def _host_match(host: str, hosts: tuple[str, ...]) -> bool:
+        return any(host == h or host.endswith(f".{h}") for h in hosts)
+
+    def block_reason(self, url: str, resource_type: str) -> str | None:
+        """'third_party', 'host' or 'type' when the request should be blocked, None to let it through."""
+        parts = urlsplit(url)
+        if parts.scheme not in ("http", "https"):
+            return None
+        host = parts.hostname or ""
+        if self._host_match(host, self.block_hosts):
+            return "third_party"
+        if not self._host_match(host, self.allow_hosts):
+            return "host"
+        if resource_type.lower() in self.block_types:
+            return "type"
+        return None
+
+    def route_pattern(self) -> re.Pattern[str]:
+        """URLs the context route has to look at: off-allowlist hosts and blocked file types."""
+        hosts = "|".join(re.escape(h) for h in self.allow_hosts)
+        extensions = "|".join(ext for t in sorted(self.block_types) for ext in _TYPE_EXTENSIONS.get(t, ()))
+        allowed = rf"https?://(?:[^/?#]*\.)?(?:{hosts})(?:[:/?#]|$)"
+        pattern = rf"^(?!{allowed})https?://"
+        if extensions:
+            pattern += rf"|\.(?:{extensions})(?:[?#]|$)"
+        return re.compile(pattern, re.IGNORECASE)
+
+    def cdp_patterns(self) -> list[str]:
+        return [f"*://*{h}/*" for h in self.block_hosts]
+
+    def fetch_patterns(self) -> list[dict[str, str]]:
+        """CDP `Fetch.enable` patterns pausing every request of a blocked resource type."""
+        return [
+            {"urlPattern": "*", "resourceType": _CDP_TYPES[t], "requestStage": "Request"}
+            for t in sorted(self.block_types)
+            if t in _CDP_TYPES
+        ]
+
+
+@dataclass
+class Traffic:
+    """Request and byte counters for one page (or summed over many)."""
+
+    requests: int = 0
+    bytes: int = 0
+    blocked: int = 0
+    blocked_by: dict[str, int] = field(default_factory=dict)
+    # dry_run only: what blocking would have saved.
+    would_block: int = 0
+    would_block_bytes: int = 0
+
+    def add(self, other: Traffic) -> None:
+        self.requests += other.requests
+        self.bytes += other.bytes
+        self.blocked += other.blocked
+        self.would_block += other.would_block
+        self.would_block_bytes += other.would_block_bytes
+        for reason, n in other.blocked_by.items():
+            self.blocked_by[reason] = self.blocked_by.get(reason, 0) + n
+
+    def summary(self) -> str:
+        if self.would_block:
+            share = self.would_block_bytes / self.bytes if self.bytes else 0.0
+            return (
+                f"{self.requests} requests, {self.bytes / 1024**2:.1f} MB; blocking would drop "
+                f"{self.would_block} requests, {self.would_block_bytes / 1024**2:.1f} MB ({share:.0%})"
+            )
+        reasons = ", ".join(f"{n} {r}" for r, n in sorted(self.blocked_by.items()))
+        return (
+            f"{self.requests} requests, {self.bytes / 1024**2:.1f} MB transferred, "
+            f"{self.blocked} blocked" + (f" ({reasons})" if reasons else "")
+        )
+
+
+async def install_route(context: Any, policy: BlockPolicy) -> None:
+    """Context-level route for the requests `policy.route_pattern()` singles out."""
+
+    async def handle(route: Any) -> None:
+        request = route.request
+        reason = policy.block_reason(request.url, request.resource_type)
+        if reason is not None and not policy.dry_run:
+            # "blockedbyclient" shows up as net::ERR_BLOCKED_BY_CLIENT, counted by watch_page.
+            await route.abort("blockedbyclient")
+        else:
+            await route.continue_()
+
+    await context.route(policy.route_pattern(), handle)
+
+
+async def watch_page(page: Any, policy: BlockPolicy) -> Traffic:
+    """Block `policy.block_hosts` and `policy.block_types` inside Chromium and count the page's traffic.
+
+    Returns the page's live Traffic counters, fed by CDP network events. Pages of
+    non-Chromium browsers get no CDP session: their counters stay at zero and blocking
+    falls back to the context route (by host and file extension only).
+    """
+    traffic = Traffic()
+    try:
+        cdp = await page.context.new_cdp_session(page)
+        await cdp.send("Network.enable")
+        if not policy.dry_run:
+            await cdp.send("Network.setBlockedURLs", {"urls": policy.cdp_patterns()})
+            patterns = policy.fetch_patterns()
+            if patterns:
+                await cdp.send("Fetch.enable", {"patterns": patterns})
+    except Exception as e:
+        logger.debug(f"no CDP session for request blocking and accounting: {e}")
+        return traffic
+
+    would_block: set[str] = set()
+    type_blocked: set[str] = set()
+
+    async def on_paused(event: dict[str, Any]) -> None:
+        # Only blocked resource types are paused (see BlockPolicy.fetch_patterns).
+        if "networkId" in event:
+            type_blocked.add(event["networkId"])
+        # The page may have navigated or closed while the request was paused.
+        with contextlib.suppress(Exception):
+            await cdp.send("Fetch.failRequest", {"requestId": event["requestId"], "errorReason": "BlockedByClient"})
+
+    def on_request(event: dict[str, Any]) -> None:
+        traffic.requests += 1
+        if policy.dry_run and policy.block_reason(event["request"]["url"], event.get("type", "")):
+            would_block.add(event["requestId"])
+            traffic.would_block += 1
+
+    def on_finished(event: dict[str, Any]) -> None:
+        size = int(event.get("encodedDataLength", 0))
+        traffic.bytes += size
+        if event["requestId"] in would_block:
+            would_block.discard(event["requestId"])
+            traffic.would_block_bytes += size
+
+    def on_failed(event: dict[str, Any]) -> None:
+        request_id = event["requestId"]
+        would_block.discard(request_id)
+        if event.get("blockedReason") or "BLOCKED_BY_CLIENT" in event.get("errorText", ""):
+            if request_id in type_blocked:
+                type_blocked.discard(request_id)
+                reason = "type"
+            elif event.get("blockedReason") == "inspector":
+                reason = "third_party"
+            else:
+                reason = "route"
+            traffic.blocked += 1
+            traffic.blocked_by[reason] = traffic.blocked_by.get(reason, 0) + 1
+
+    cdp.on("Fetch.requestPaused", on_paused)
+    cdp.on("Network.requestWillBeSent", on_request)
+    cdp.on("Network.loadingFinished", on_finished)
+    cdp.on("Network.loadingFailed", on_failed)
+    return traffic
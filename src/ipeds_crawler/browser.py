@@ -1,32 +1,283 @@
-from contextlib import asynccontextmanager
-from typing import AsyncIterator
-from playwright.async_api import async_playwright, Browser, Page
-
-
-@asynccontextmanager
-async def browser_page() -> AsyncIterator[Page]:
-    async with async_playwright() as p:
-        browser: Browser = await p.chromium.launch(
-            headless=True,
-            args=[
-                "--disable-gpu",
-                "--disable-extensions",
-                "--no-sandbox",
-                "--disable-dev-shm-usage",
-                "--disable-renderer-backgrounding",
-            ],
-        )
-        page: Page = await browser.new_page()
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import logging
+import os
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+from playwright.async_api import async_playwright, Browser, BrowserContext, Page, Playwright
+
+from .blocking import BlockPolicy, Traffic, install_route, watch_page
+
+if TYPE_CHECKING:
+    from .metrics import Metrics
+
+logger = logging.getLogger("ipeds_crawler")
+
+LAUNCH_ARGS = [
+    "--disable-gpu",
+    "--disable-extensions",
+    "--no-sandbox",
+    "--disable-dev-shm-usage",
+    "--disable-renderer-backgrounding",
+]
+
+
+async def new_context(browser: Browser, timeout_ms: int = 15_000, policy: BlockPolicy | None = None) -> BrowserContext:
+    """Isolated context with its own request blocking and timeouts; pages opened in it inherit both."""
+    context = await browser.new_context()
+    await install_route(context, policy or BlockPolicy())
+    context.set_default_timeout(timeout_ms)
+    return context
+
+
+# ---------------------------
+# Managed pool
+# ---------------------------
+@dataclass
+class _Slot:
+    context: BrowserContext
+    pages: list[Page] = field(default_factory=list)
+    traffic: list[Traffic] = field(default_factory=list)
+    navigations: int = 0
+    epoch: int = 0
+
+
+class BrowserPool:
+    """`size` worker slots over one Chromium, each with its own context, recycled and restarted as needed.
+
+    A slot's context (and its renderer) is replaced after `max_navigations` page loads, or
+    on every slot once Chromium's total RSS exceeds `max_rss_mb`. Recycling only happens
+    in `pages()`, i.e. between pairs, never under a running crawl. If Chromium exits or
+    crashes, the next `pages()` call relaunches it; `lost_since(generation)` tells a
+    worker whether its failure was caused by that, so the work can be requeued.
+
+    Requests are filtered by `policy` and counted per page; `traffic()` sums the counters.
+    """
+
+    def __init__(
+        self,
+        size: int,
+        timeout_ms: int = 15_000,
+        headless: bool = True,
+        max_navigations: int = 1_000,
+        max_rss_mb: float | None = 4_096,
+        rss_interval_s: float = 10.0,
+        policy: BlockPolicy | None = None,
+        metrics: Metrics | None = None,
+    ) -> None:
+        self.size = max(1, size)
+        self.timeout_ms = timeout_ms
+        self.headless = headless
+        self.max_navigations = max_navigations
+        self.max_rss_mb = max_rss_mb
+        self.rss_interval_s = rss_interval_s
+        self.policy = policy or BlockPolicy()
+        self.metrics = metrics
+        self.navigations = 0
+        self.generation = 0
+        self.recycled = 0
+        self.restarts = 0
+        self.rss_bytes: int | None = None
+        self.peak_rss_bytes = 0
+        self._browser: Browser | None = None
+        self._playwright: Playwright | None = None
+        self._slots: list[_Slot | None] = [None] * self.size
+        # Counters of pages whose context is gone, and what has already gone to metrics.
+        self._retired = Traffic()
+        self._exported = Traffic()
+        self._epoch = 0
+        self._rss_checked = 0.0
+        self._lost = False
+        self._closing = False
+        self._lock = asyncio.Lock()
 
-        await page.route(
-            "**/*",
-            lambda route: route.abort()
-            if route.request.resource_type in {"image", "media", "font", "stylesheet"}
-            else route.continue_(),
+    async def __aenter__(self) -> BrowserPool:
+        self._playwright = await async_playwright().start()
+        await self._launch()
+        return self
+
+    async def __aexit__(self, *exc: Any) -> None:
+        self._closing = True
+        for slot in self._slots:
+            if slot is not None:
+                await _quietly(slot.context.close())
+        if self._browser is not None:
+            await _quietly(self._browser.close())
+        if self._playwright is not None:
+            await self._playwright.stop()
+
+    async def _launch(self) -> None:
+        browser = await self._playwright.chromium.launch(headless=self.headless, args=LAUNCH_ARGS)
+        browser.on("disconnected", self._on_disconnected)
+        self._browser = browser
+        for slot in self._slots:
+            self._retire(slot)
+        self._slots = [None] * self.size
+        self._lost = False
+        self.generation += 1
+
+    def _on_disconnected(self, browser: Browser) -> None:
+        if browser is self._browser and not self._closing:
+            self._lost = True
+
+    def lost_since(self, generation: int) -> bool:
+        """Whether the Chromium of `generation` has died (and work running on it was lost)."""
+        return self._lost or self.generation != generation
+
+    async def pages(self, slot: int, count: int = 1) -> list[Page]:
+        """The slot's pages, after any pending restart or recycle; call between pairs."""
+        async with self._lock:
+            if self._lost or self._browser is None or not self._browser.is_connected():
+                await self._restart()
+        current = self._slots[slot]
+        if current is not None and (current.navigations >= self.max_navigations or current.epoch < self._epoch):
+            self._slots[slot] = None
+            self._retire(current)
+            await _quietly(current.context.close())
+            self.recycled += 1
+            if self.metrics is not None:
+                self.metrics.inc("browser_recycles_total")
+            current = None
+        if current is None:
+            context = await new_context(self._browser, self.timeout_ms, self.policy)
+            current = self._slots[slot] = _Slot(context, epoch=self._epoch)
+        while len(current.pages) < count:
+            page = await current.context.new_page()
+            current.traffic.append(await watch_page(page, self.policy))
+            current.pages.append(page)
+        return current.pages[:count]
+
+    def _retire(self, slot: _Slot | None) -> None:
+        if slot is not None:
+            for traffic in slot.traffic:
+                self._retired.add(traffic)
+            slot.traffic = []
+
+    def traffic(self) -> Traffic:
+        """Requests and bytes of every page the pool has opened so far."""
+        total = Traffic()
+        total.add(self._retired)
+        for slot in self._slots:
+            if slot is not None:
+                for traffic in slot.traffic:
+                    total.add(traffic)
+        return total
+
+    def record(self, slot: int, navigations: int) -> None:
+        """Count page loads done with the slot's pages and check Chromium's memory."""
+        current = self._slots[slot]
+        if current is not None:
+            current.navigations += navigations
+        self.navigations += navigations
+        self._export_traffic()
+        now = time.monotonic()
+        if now - self._rss_checked < self.rss_interval_s:
+            return
+        self._rss_checked = now
+        rss = chromium_rss()
+        if rss is None:
+            return
+        self.rss_bytes = rss
+        self.peak_rss_bytes = max(self.peak_rss_bytes, rss)
+        if self.metrics is not None:
+            self.metrics.set_gauge("browser_rss_bytes", rss)
+        if self.max_rss_mb is not None and rss > self.max_rss_mb * 1024**2:
+            logger.info(f"Chromium RSS {rss / 1024**2:.0f} MB over {self.max_rss_mb:.0f} MB; recycling all contexts")
+            # Every slot created before this epoch is replaced at its next pages() call.
+            self._epoch += 1
+
+    def _export_traffic(self) -> None:
+        if self.metrics is None:
+            return
+        total = self.traffic()
+        done = self._exported
+        self.metrics.inc("browser_requests_total", total.requests - done.requests)
+        self.metrics.inc("browser_bytes_total", total.bytes - done.bytes)
+        for reason, n in total.blocked_by.items():
+            self.metrics.inc("browser_blocked_total", n - done.blocked_by.get(reason, 0), reason=reason)
+        if total.would_block:
+            self.metrics.inc("browser_would_block_total", total.would_block - done.would_block)
+            self.metrics.inc("browser_would_block_bytes_total", total.would_block_bytes - done.would_block_bytes)
+        self._exported = total
+
+    async def _restart(self) -> None:
+        logger.warning("[yellow][WARN][/yellow] Chromium disconnected; relaunching and requeueing in-flight work")
+        if self._browser is not None:
+            await _quietly(self._browser.close())
+        await self._launch()
+        self.restarts += 1
+        if self.metrics is not None:
+            self.metrics.inc("browser_restarts_total")
+
+    def stats(self) -> str:
+        self._export_traffic()
+        traffic = self.traffic()
+        peak = f", peak Chromium RSS {self.peak_rss_bytes / 1024**2:.0f} MB" if self.peak_rss_bytes else ""
+        per_page = f", {traffic.bytes / self.navigations / 1024:.0f} KB per page load" if self.navigations else ""
+        return (
+            f"browser pool: {self.recycled} contexts recycled, {self.restarts} restarts{peak}; "
+            f"{traffic.summary()}{per_page}"
         )
-        page.set_default_timeout(15_000)
 
+
+async def _quietly(coro: Any) -> None:
+    # Closing something that already went away with a crashed browser is not an error.
+    with contextlib.suppress(Exception):
+        await coro
+
+
+def chromium_rss(root_pid: int | None = None) -> int | None:
+    """Total RSS in bytes of the Chromium processes started under `root_pid` (default: this process).
+
+    Reads /proc on Linux and falls back to psutil elsewhere; None when neither is available.
+    The Playwright driver (node) is not counted.
+    """
+    root_pid = os.getpid() if root_pid is None else root_pid
+    proc = Path("/proc")
+    if proc.is_dir():
+        page_size = os.sysconf("SC_PAGE_SIZE")
+        parents: dict[int, int] = {}
+        rss: dict[int, int] = {}
+        for entry in proc.iterdir():
+            if not entry.name.isdigit():
+                continue
+            try:
+                stat = (entry / "stat").read_text()
+            except OSError:
+                continue
+            # The command name is in parentheses and may itself contain spaces.
+            comm = stat[stat.index("(") + 1 : stat.rindex(")")]
+            fields = stat[stat.rindex(")") + 2 :].split()
+            pid = int(entry.name)
+            parents[pid] = int(fields[1])
+            if comm != "node":
+                rss[pid] = int(fields[21]) * page_size
+        children: dict[int, list[int]] = {}
+        for pid, ppid in parents.items():
+            children.setdefault(ppid, []).append(pid)
+        total, stack = 0, list(children.get(root_pid, []))
+        while stack:
+            pid = stack.pop()
+            total += rss.get(pid, 0)
+            stack.extend(children.get(pid, []))
+        return total
+    try:
+        import psutil
+    except ImportError:
+        return None
+    try:
+        kids = psutil.Process(root_pid).children(recursive=True)
+    except psutil.Error:
+        return None
+    total = 0
+    for p in kids:
         try:
-            yield page
-        finally:
-            await browser.close()
+            if p.name() != "node":
+                total += p.memory_info().rss
+        except psutil.Error:
+            continue
+    return total
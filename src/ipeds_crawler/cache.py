@@ -0,0 +1,273 @@
+from __future__ import annotations
+
+import asyncio
+import gzip
+import hashlib
+import os
+import sqlite3
+import time
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+from functools import partial
+from pathlib import Path
+from typing import Any
+
+DAY = 86_400.0
+
+
+def default_ttl(year: int) -> float | None:
+    """Seconds a cached page for `year` stays fresh; None means it never expires.
+
+    The current and previous two collection years can still be revised by NCES, so
+    they are refetched weekly. Older years are treated as final.
+    """
+    if year >= date.today().year - 2:
+        return 7 * DAY
+    return None
+
+
+def negative_ttl(year: int) -> float | None:
+    """Like default_ttl, but a "no data" verdict on an older year is still rechecked quarterly."""
+    return default_ttl(year) or 90 * DAY
+
+
+class NegativeCache:
+    """Persisted set of (unit_id, survey, year) pages known to hold no data.
+
+    Entries carry the `version` of the survey plan that judged the page (see Plan.version),
+    so changing its wait selector, selectors or no-data markers invalidates them. Recent
+    years are rechecked weekly in case the institution reports late, older ones quarterly.
+    """
+
+    def __init__(self, path: str | Path, ttl: Callable[[int], float | None] = negative_ttl) -> None:
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.ttl = ttl
+        self.hits = 0
+        self.recorded = 0
+        self._db = sqlite3.connect(path, timeout=30)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        columns = {row[1] for row in self._db.execute("PRAGMA table_info(empty_pages)")}
+        if columns and "version" not in columns:
+            # Written before entries were versioned: nothing says which selectors judged them.
+            self._db.execute("DROP TABLE empty_pages")
+        self._db.execute(
+            """
+            CREATE TABLE IF NOT EXISTS empty_pages (
+                unit_id TEXT NOT NULL,
+                survey INTEGER NOT NULL,
+                year INTEGER NOT NULL,
+                version TEXT NOT NULL,
+                recorded_at REAL NOT NULL,
+                PRIMARY KEY (unit_id, survey, year, version)
+            )
+            """
+        )
+        self._db.commit()
+
+    def is_empty(self, unit_id: Any, survey: int, year: int, version: str = "") -> bool:
+        row = self._db.execute(
+            "SELECT recorded_at FROM empty_pages WHERE unit_id = ? AND survey = ? AND year = ? AND version = ?",
+            (str(unit_id), survey, year, version),
+        ).fetchone()
+        if row is None:
+            return False
+        ttl = self.ttl(year)
+        if ttl is not None and time.time() - row[0] > ttl:
+            return False
+        self.hits += 1
+        return True
+
+    def mark_empty(self, unit_id: Any, survey: int, year: int, version: str = "") -> None:
+        # Verdicts of other plan versions are stale once this one has looked at the page.
+        self._db.execute(
+            "DELETE FROM empty_pages WHERE unit_id = ? AND survey = ? AND year = ?", (str(unit_id), survey, year)
+        )
+        self._db.execute(
+            "INSERT INTO empty_pages (unit_id, survey, year, version, recorded_at) VALUES (?, ?, ?, ?, ?)",
+            (str(unit_id), survey, year, version, time.time()),
+        )
+        self._db.commit()
+        self.recorded += 1
+
+    def stats(self) -> str:
+        return f"negative cache: {self.hits} known-empty pages skipped, {self.recorded} newly recorded"
+
+    def close(self) -> None:
+        self._db.close()
+
+
+class PageCache:
+    """On-disk cache of rendered reported-data pages keyed by (unit_id, survey, year).
+
+    Page bodies are stored once per content hash under `blobs/`; a SQLite index maps
+    keys to hashes and tracks access times for LRU eviction once `max_bytes` of
+    (compressed) blobs is exceeded. Access times are written in batches (with the next
+    `put`, every `touch_batch` hits and on `close`), not committed per read.
+
+    Crawl workers go through `aget`/`aput`, which run the SQLite and gzip work on the
+    cache's own thread, one call at a time, instead of on the event loop.
+    """
+
+    def __init__(
+        self,
+        root: str | Path,
+        max_bytes: int = 2 * 1024**3,
+        ttl: Callable[[int], float | None] = default_ttl,
+        touch_batch: int = 256,
+    ) -> None:
+        self.root = Path(root)
+        self.blob_dir = self.root / "blobs"
+        self.blob_dir.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.touch_batch = touch_batch
+        self._touched: dict[tuple[str, int, int], float] = {}
+
+        # Used by one thread at a time: the caller's, or _executor's.
+        self._db = sqlite3.connect(self.root / "index.sqlite", timeout=30, check_same_thread=False)
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="pagecache")
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS pages (
+                unit_id TEXT NOT NULL,
+                survey INTEGER NOT NULL,
+                year INTEGER NOT NULL,
+                digest TEXT NOT NULL,
+                stored_at REAL NOT NULL,
+                accessed_at REAL NOT NULL,
+                PRIMARY KEY (unit_id, survey, year)
+            );
+            CREATE INDEX IF NOT EXISTS pages_accessed ON pages (accessed_at);
+            CREATE TABLE IF NOT EXISTS blobs (
+                digest TEXT PRIMARY KEY,
+                size INTEGER NOT NULL
+            );
+            """
+        )
+        self._db.commit()
+        self._total_bytes = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM blobs").fetchone()[0]
+
+    def _blob_path(self, digest: str) -> Path:
+        return self.blob_dir / digest[:2] / f"{digest}.html.gz"
+
+    def get(self, unit_id: Any, survey: int, year: int, fresh_only: bool = True) -> str | None:
+        row = self._db.execute(
+            "SELECT digest, stored_at FROM pages WHERE unit_id = ? AND survey = ? AND year = ?",
+            (str(unit_id), survey, year),
+        ).fetchone()
+        now = time.time()
+        if row is not None:
+            digest, stored_at = row
+            ttl = self.ttl(year)
+            if not fresh_only or ttl is None or now - stored_at <= ttl:
+                try:
+                    html = gzip.decompress(self._blob_path(digest).read_bytes()).decode("utf-8")
+                except (OSError, EOFError):
+                    html = None
+                if html is not None:
+                    self._touched[(str(unit_id), survey, year)] = now
+                    if len(self._touched) >= self.touch_batch:
+                        self._flush_touched()
+                        self._db.commit()
+                    self.hits += 1
+                    return html
+        self.misses += 1
+        return None
+
+    def put(self, unit_id: Any, survey: int, year: int, html: str) -> None:
+        data = html.encode("utf-8")
+        digest = hashlib.sha256(data).hexdigest()
+        path = self._blob_path(digest)
+        if not path.exists():
+            path.parent.mkdir(exist_ok=True)
+            blob = gzip.compress(data, compresslevel=6)
+            tmp = path.with_suffix(f".{os.getpid()}.tmp")
+            tmp.write_bytes(blob)
+            os.replace(tmp, path)
+            cur = self._db.execute(
+                "INSERT OR IGNORE INTO blobs (digest, size) VALUES (?, ?)", (digest, len(blob))
+            )
+            self._total_bytes += len(blob) if cur.rowcount else 0
+
+        now = time.time()
+        self._flush_touched()
+        previous = self._db.execute(
+            "SELECT digest FROM pages WHERE unit_id = ? AND survey = ? AND year = ?",
+            (str(unit_id), survey, year),
+        ).fetchone()
+        self._db.execute(
+            "INSERT OR REPLACE INTO pages (unit_id, survey, year, digest, stored_at, accessed_at) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (str(unit_id), survey, year, digest, now, now),
+        )
+        if previous is not None and previous[0] != digest:
+            self._drop_orphan(previous[0])
+        self._db.commit()
+
+        if self._total_bytes > self.max_bytes:
+            self._evict()
+
+    async def aget(self, unit_id: Any, survey: int, year: int, fresh_only: bool = True) -> str | None:
+        return await self._run(self.get, unit_id, survey, year, fresh_only)
+
+    async def aput(self, unit_id: Any, survey: int, year: int, html: str) -> None:
+        await self._run(self.put, unit_id, survey, year, html)
+
+    async def _run(self, fn: Any, *args: Any) -> Any:
+        return await asyncio.get_running_loop().run_in_executor(self._executor, partial(fn, *args))
+
+    def _flush_touched(self) -> None:
+        # Uncommitted: the caller's next commit carries these along.
+        if self._touched:
+            self._db.executemany(
+                "UPDATE pages SET accessed_at = ? WHERE unit_id = ? AND survey = ? AND year = ?",
+                [(at, *key) for key, at in self._touched.items()],
+            )
+            self._touched.clear()
+
+    def _drop_orphan(self, digest: str) -> None:
+        if self._db.execute("SELECT 1 FROM pages WHERE digest = ? LIMIT 1", (digest,)).fetchone():
+            return
+        row = self._db.execute("SELECT size FROM blobs WHERE digest = ?", (digest,)).fetchone()
+        self._db.execute("DELETE FROM blobs WHERE digest = ?", (digest,))
+        if row is not None:
+            self._total_bytes -= row[0]
+        self._blob_path(digest).unlink(missing_ok=True)
+
+    def _evict(self) -> None:
+        """Drop least recently used entries until the blob store is back under the cap."""
+        while self._total_bytes > self.max_bytes:
+            rows = self._db.execute(
+                "SELECT unit_id, survey, year, digest FROM pages ORDER BY accessed_at LIMIT 256"
+            ).fetchall()
+            if not rows:
+                break
+            for unit_id, survey, year, digest in rows:
+                if self._total_bytes <= self.max_bytes:
+                    break
+                self._db.execute(
+                    "DELETE FROM pages WHERE unit_id = ? AND survey = ? AND year = ?",
+                    (unit_id, survey, year),
+                )
+                self._drop_orphan(digest)
+                self.evictions += 1
+        self._db.commit()
+
+    def stats(self) -> str:
+        total = self.hits + self.misses
+        rate = self.hits / total if total else 0.0
+        return (
+            f"page cache: {self.hits} hits, {self.misses} misses ({rate:.0%} hit rate), "
+            f"{self.evictions} evictions, {self._total_bytes / 1024**2:.1f} MB on disk"
+        )
+
+    def close(self) -> None:
+        self._executor.shutdown()
+        self._flush_touched()
+        self._db.commit()
+        self._db.close()
@@ -1,22 +1,348 @@
 import argparse
 import asyncio
+import logging
+import multiprocessing
+import os
+import sys
 import pandas as pd
+from pathlib import Path
+from .blocking import BlockPolicy
+from .browser import BrowserPool
+from .cache import NegativeCache, PageCache
+from .config import Settings
+from .fetch import HttpFetcher
+from .jobs import JobStore
+from .metrics import Metrics
+from .navigator import Navigator
 from .orchestrator import run_pipeline
+from .profiling import run_profiled
+from .ratelimit import AdaptiveRateLimiter
+from .retry import Retrier, RetryBudget, RetryPolicy
+from .shard import merge_outputs, parse_shard
+from .sinks import BufferedSink, CsvSink, ParquetSink
+from .standin import Faults, StandinServer
 from ipeds_crawler.logging import setup_logging
 
 
-def main() -> None:
-    setup_logging("INFO")
-    parser = argparse.ArgumentParser(description="Run IPEDS crawler.")
+def main(argv: list[str] | None = None) -> None:
+    argv = sys.argv[1:] if argv is None else argv
+    settings = Settings()
+    setup_logging(settings.log_level, settings.log_format)
+    if argv[:1] == ["merge"]:
+        merge(argv[1:])
+        return
+    if argv[:1] == ["standin"]:
+        standin(argv[1:])
+        return
+
+    parser = argparse.ArgumentParser(description="Run IPEDS crawler.", epilog="Subcommands: merge, standin (see '<subcommand> --help').")
     parser.add_argument("--input", required=True, help="Path to IPEDS HD CSV (with INSTNM, UNITID).")
-    parser.add_argument("--output", required=True, help="Path to output CSV (append mode).")
+    parser.add_argument(
+        "--output", required=True, help="Path to output CSV (append mode), or dataset directory with --format parquet."
+    )
     parser.add_argument("--min-year", type=int, default=2014, help="Minimum year, default=2014.")
     parser.add_argument("--max-year", type=int, default=2023, help="Maximum year, default=2023.")
-    args = parser.parse_args()
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=settings.concurrency,
+        help=f"Number of browser contexts crawling in parallel, default={settings.concurrency} (IPEDS_CONCURRENCY).",
+    )
+    parser.add_argument(
+        "--parallel-surveys",
+        action="store_true",
+        help="Open each survey page of an (institution, year) pair in its own tab and extract them concurrently.",
+    )
+    parser.add_argument(
+        "--no-resume",
+        dest="resume",
+        action="store_false",
+        help="Crawl every pair even if it is already in the output file.",
+    )
+    parser.add_argument(
+        "--cache-dir",
+        default=settings.cache_dir,
+        help="Directory for the on-disk page snapshot cache (IPEDS_CACHE_DIR); disabled when unset.",
+    )
+    parser.add_argument(
+        "--cache-max-mb",
+        type=int,
+        default=settings.cache_max_mb,
+        help=f"Size cap of the page cache before LRU eviction, default={settings.cache_max_mb}.",
+    )
+    parser.add_argument(
+        "--offline",
+        action="store_true",
+        help="Re-extract from pages in --cache-dir without launching a browser; uncached pairs are skipped.",
+    )
+    parser.add_argument(
+        "--http",
+        action="store_true",
+        default=settings.http_fast_path,
+        help="Fetch report pages over pooled HTTP and parse them in-process, using Chromium only as fallback "
+        "(needs the 'http' extra; IPEDS_HTTP_FAST_PATH).",
+    )
+    parser.add_argument(
+        "--http-max-connections",
+        type=int,
+        default=settings.http_max_connections,
+        help=f"Keep-alive connection limit to nces.ed.gov for --http, default={settings.http_max_connections}.",
+    )
+    parser.add_argument(
+        "--retries",
+        type=int,
+        default=settings.retry_attempts,
+        help=f"Attempts per navigation for timeouts, network errors and HTTP 429/5xx, default={settings.retry_attempts}.",
+    )
+    parser.add_argument(
+        "--max-rps",
+        type=float,
+        default=settings.rate_max_rps,
+        help=f"Ceiling for the adaptive request rate to nces.ed.gov, split evenly across --processes, "
+        f"default={settings.rate_max_rps} (IPEDS_RATE_MAX_RPS).",
+    )
+    parser.add_argument(
+        "--format",
+        choices=["csv", "parquet"],
+        default=settings.output_format,
+        help=f"Output format, default={settings.output_format} (IPEDS_OUTPUT_FORMAT). "
+        "parquet writes a year-partitioned dataset and needs the 'parquet' extra.",
+    )
+    parser.add_argument(
+        "--jobs-db",
+        default=settings.jobs_db,
+        help="SQLite job store tracking every (institution, year, survey) task (IPEDS_JOBS_DB). "
+        "Finished surveys survive crashes, and several processes can share it.",
+    )
+    parser.add_argument(
+        "--processes",
+        type=int,
+        default=settings.processes,
+        help=f"Crawler processes claiming tasks from --jobs-db, default={settings.processes} (IPEDS_PROCESSES).",
+    )
+    parser.add_argument(
+        "--shard",
+        type=_shard_arg,
+        help="Crawl only shard i of N, e.g. 0/8. Pairs are assigned by a stable hash of (UNITID, year).",
+    )
+    parser.add_argument(
+        "--base-url",
+        default=settings.base_url,
+        help=f"Root of the reported-data pages, default={settings.base_url} (IPEDS_BASE_URL). "
+        "Point it at 'ipeds-crawler standin' for offline load tests.",
+    )
+    parser.add_argument(
+        "--block-dry-run",
+        action="store_true",
+        default=settings.block_dry_run,
+        help="Load every request the blocking policy would drop, and report the requests and bytes "
+        "blocking saves (IPEDS_BLOCK_DRY_RUN).",
+    )
+    parser.add_argument(
+        "--metrics-dir",
+        default=settings.metrics_dir,
+        help="Write per-stage latency histograms here: metrics.prom (Prometheus text format, refreshed every "
+        f"{settings.metrics_interval_s:g}s) and a metrics.json summary at exit (IPEDS_METRICS_DIR).",
+    )
+    parser.add_argument(
+        "--profile",
+        metavar="DIR",
+        help="Profile the run with cProfile plus an event-loop lag monitor and asyncio slow-callback "
+        "detection; reports are written to DIR.",
+    )
+    args = parser.parse_args(argv)
+    if args.offline and not args.cache_dir:
+        parser.error("--offline requires --cache-dir")
+    if args.processes > 1 and not args.jobs_db:
+        parser.error("--processes requires --jobs-db")
+
+    if args.processes > 1:
+        ctx = multiprocessing.get_context("spawn")
+        procs = [ctx.Process(target=_crawl_process, args=(args, settings)) for _ in range(args.processes)]
+        for proc in procs:
+            proc.start()
+        for proc in procs:
+            proc.join()
+        return
+
+    _run_crawl(args, settings)
+
+
+def _shard_arg(value: str) -> tuple[int, int]:
+    try:
+        return parse_shard(value)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e)) from None
+
+
+def merge(argv: list[str]) -> None:
+    logger = logging.getLogger("ipeds_crawler")
+    parser = argparse.ArgumentParser(
+        prog="ipeds-crawler merge", description="Merge shard outputs into one deduplicated dataset."
+    )
+    parser.add_argument("inputs", nargs="+", help="Shard outputs: CSV files or parquet dataset directories.")
+    parser.add_argument("--output", required=True, help="Merged CSV file, or dataset directory with --format parquet.")
+    parser.add_argument("--format", choices=["csv", "parquet"], default="csv", help="Output format, default=csv.")
+    args = parser.parse_args(argv)
+
+    sink: BufferedSink
+    if args.format == "parquet":
+        sink = ParquetSink(args.output, max_pending=50_000)
+    else:
+        sink = CsvSink(args.output, batch_rows=5_000, max_pending=50_000)
+    written, duplicates = merge_outputs(args.inputs, sink)
+    logger.info(f"Merged {len(args.inputs)} inputs into {args.output}: {written} rows, {duplicates} duplicates dropped")
 
+
+def standin(argv: list[str]) -> None:
+    logger = logging.getLogger("ipeds_crawler")
+    parser = argparse.ArgumentParser(
+        prog="ipeds-crawler standin",
+        description="Serve stand-in reported-data pages locally; crawl them with --base-url.",
+    )
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--cache-dir", help="Serve pages recorded in this page cache; others are synthesized.")
+    parser.add_argument("--latency-ms", type=float, default=50.0, help="Median response latency, default=50.")
+    parser.add_argument(
+        "--latency-sigma", type=float, default=0.5, help="Lognormal spread of the latency (0 = fixed), default=0.5."
+    )
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of requests answered with a 5xx.")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="Share of requests answered with a 429.")
+    parser.add_argument("--missing-rate", type=float, default=0.0, help="Share of survey pages without their table.")
+    parser.add_argument("--no-data-rate", type=float, default=0.0, help="Share of survey pages showing 'did not report'.")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    faults = Faults(
+        latency_ms=args.latency_ms,
+        latency_sigma=args.latency_sigma,
+        error_rate=args.error_rate,
+        throttle_rate=args.throttle_rate,
+        missing_rate=args.missing_rate,
+        no_data_rate=args.no_data_rate,
+        seed=args.seed,
+    )
+    server = StandinServer(faults, cache_dir=args.cache_dir, host=args.host, port=args.port)
+    logger.info(f"Stand-in serving on {server.url} (crawl with --base-url {server.url})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.stop()
+        logger.info(f"Stand-in stats: {server.stats()}")
+
+
+def _crawl_process(args: argparse.Namespace, settings: Settings) -> None:
+    setup_logging(settings.log_level, settings.log_format)
+    _run_crawl(args, settings)
+
+
+def _run_crawl(args: argparse.Namespace, settings: Settings) -> None:
     df = pd.read_csv(args.input, usecols=["INSTNM", "UNITID"])
-    asyncio.run(run_pipeline(input_df=df, output_path=args.output, min_year=args.min_year, max_year=args.max_year))
+    if args.profile:
+        suffix = f"-{os.getpid()}" if args.processes > 1 else ""
+        asyncio.run(run_profiled(crawl(args, df, settings), args.profile, suffix))
+    else:
+        asyncio.run(crawl(args, df, settings))
+
+
+async def crawl(args: argparse.Namespace, df: pd.DataFrame, settings: Settings) -> None:
+    cache = PageCache(args.cache_dir, max_bytes=args.cache_max_mb * 1024**2) if args.cache_dir else None
+    negative = NegativeCache(Path(args.cache_dir) / "negative.sqlite") if args.cache_dir else None
+    http = (
+        HttpFetcher(max_connections=args.http_max_connections, user_agent=settings.user_agent)
+        if args.http and not args.offline
+        else None
+    )
+    retry = Retrier(
+        policy=RetryPolicy(attempts=args.retries),
+        budget=RetryBudget(ratio=settings.retry_budget_ratio),
+        breaker_threshold=settings.breaker_threshold,
+        breaker_cooldown_s=settings.breaker_cooldown_s,
+    )
+    # Each process has its own token bucket, so --processes split the rates between them
+    # and together stay under --max-rps.
+    share = args.processes
+    limiter = AdaptiveRateLimiter(
+        initial_rps=min(settings.rate_initial_rps, args.max_rps) / share,
+        min_rps=settings.rate_min_rps / share,
+        max_rps=args.max_rps / share,
+        target_latency_s=settings.rate_target_latency_s,
+    )
+    metrics = None
+    if args.metrics_dir:
+        # Processes sharing a job store export side by side, told apart by pid.
+        suffix = f"-{os.getpid()}" if args.processes > 1 else ""
+        metrics = Metrics({"pid": str(os.getpid())} if suffix else None)
+        metrics_prom = Path(args.metrics_dir) / f"metrics{suffix}.prom"
+        metrics_json = Path(args.metrics_dir) / f"metrics{suffix}.json"
+        metrics.start_export(metrics_prom, settings.metrics_interval_s)
+    if args.format == "parquet":
+        sink = ParquetSink(args.output, metrics=metrics)
+    else:
+        sink = CsvSink(
+            args.output,
+            shared=bool(args.jobs_db),
+            batch_rows=settings.sink_batch_rows,
+            flush_interval_s=settings.sink_flush_s,
+            metrics=metrics,
+        )
+    jobs = JobStore(args.jobs_db, lease_s=settings.lease_s) if args.jobs_db else None
+    # What the navigator learned about URL forms and load times carries over between runs.
+    navigator = Navigator(Path(args.cache_dir) / "navigator.json" if args.cache_dir else None, metrics=metrics)
+    browser = BrowserPool(
+        args.concurrency,
+        timeout_ms=settings.timeout_ms,
+        headless=settings.headless,
+        max_navigations=settings.browser_max_navigations,
+        max_rss_mb=settings.browser_max_rss_mb,
+        policy=BlockPolicy(
+            allow_hosts=tuple(settings.block_allow_hosts),
+            block_types=frozenset(settings.block_resource_types),
+            dry_run=args.block_dry_run,
+        ).for_base_url(args.base_url),
+        metrics=metrics,
+    )
+    try:
+        await run_pipeline(
+            input_df=df,
+            output_path=args.output,
+            min_year=args.min_year,
+            max_year=args.max_year,
+            concurrency=args.concurrency,
+            parallel_surveys=args.parallel_surveys,
+            resume=args.resume,
+            cache=cache,
+            offline=args.offline,
+            http=http,
+            negative=negative,
+            retry=retry,
+            limiter=limiter,
+            sink=sink,
+            jobs=jobs,
+            shard=args.shard,
+            base_url=args.base_url,
+            metrics=metrics,
+            browser=browser,
+            navigator=navigator,
+        )
+    finally:
+        navigator.save()
+        if metrics is not None:
+            metrics.stop_export()
+            metrics.write_prometheus(metrics_prom)
+            metrics.write_json(metrics_json)
+        if http is not None:
+            await http.aclose()
+        if cache is not None:
+            cache.close()
+        if negative is not None:
+            negative.close()
+        if jobs is not None:
+            jobs.close()
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -2,12 +2,39 @@ from pydantic_settings import BaseSettings, SettingsConfigDict
 
 class Settings(BaseSettings):
     headless: bool = True
+    base_url: str = "https://nces.ed.gov/ipeds"
     timeout_ms: int = 15_000
     min_year: int = 2014
     max_year: int = 2023
     concurrency: int = 3
+    browser_max_navigations: int = 1_000
+    browser_max_rss_mb: float = 4_096
+    block_allow_hosts: list[str] = ["nces.ed.gov"]
+    block_resource_types: list[str] = ["image", "media", "font", "stylesheet"]
+    block_dry_run: bool = False
     user_agent: str = "ipeds-crawler/0.1"
     out_csv: str = "data/processed/ipeds.csv"
     log_level: str = "INFO"
+    log_format: str = "json"
+    cache_dir: str | None = None
+    cache_max_mb: int = 2048
+    http_fast_path: bool = False
+    http_max_connections: int = 8
+    retry_attempts: int = 3
+    retry_budget_ratio: float = 0.2
+    breaker_threshold: int = 8
+    breaker_cooldown_s: float = 30.0
+    rate_initial_rps: float = 2.0
+    rate_min_rps: float = 0.2
+    rate_max_rps: float = 8.0
+    rate_target_latency_s: float = 3.0
+    output_format: str = "csv"
+    jobs_db: str | None = None
+    lease_s: float = 300.0
+    processes: int = 1
+    sink_batch_rows: int = 200
+    sink_flush_s: float = 5.0
+    metrics_dir: str | None = None
+    metrics_interval_s: float = 15.0
 
     model_config = SettingsConfigDict(env_prefix="IPEDS_", env_file=".env", extra="ignore")
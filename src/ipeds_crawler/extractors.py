@@ -1,30 +1,44 @@
-from typing import Any, List, Sequence
+from typing import Any, Sequence
 from playwright.async_api import TimeoutError as PlaywrightTimeoutError
 from .normalize import normalize
+from .offline import StaticFrame
 from ipeds_crawler.retry import retry_async
 
-@retry_async(retries=2, delay=2)
-async def wait_for_all(node, table_selector: str = "table#tbl4yearGradurate1.grid") -> bool:
-    try:
-        await node.locator(table_selector).first.wait_for(timeout=10_000)
-        return True
-    except PlaywrightTimeoutError:
-        return False
-    except Exception:
-        return False
+# Text shown instead of the survey tables when an institution has nothing on file.
+NO_DATA_MARKERS = (
+    "did not report",
+    "not required to report",
+    "no data reported",
+    "no data available",
+    "data not available",
+)
+
+TABLE_FOUND = "found"
+NO_DATA = "no_data"
+TABLE_MISSING = "missing"
 
 
-async def safe_all_inner_texts(locator) -> List[str]:
+async def table_status(node, table_selector: str, timeout: int = 10_000) -> str:
+    """Wait for the table or a "no data" marker, whichever appears first.
+
+    Returns TABLE_FOUND, NO_DATA (marker present, table absent: returns without waiting
+    out the timeout) or TABLE_MISSING (neither appeared in time).
+    """
+    markers = ", ".join(f'body:has-text("{m}")' for m in NO_DATA_MARKERS)
     try:
-        return await locator.all_inner_texts()
+        await node.locator(f"{table_selector}, {markers}").first.wait_for(timeout=timeout)
+        if await node.locator(table_selector).count():
+            return TABLE_FOUND
+        return NO_DATA
     except PlaywrightTimeoutError:
-        return []
+        return TABLE_MISSING
     except Exception:
-        return []
+        return TABLE_MISSING
 
 
-@retry_async(retries=2, delay=2)
-async def get_text_data(frame,text: str,year: int,table_selector: str | None = None,value_selector: str | None = None,table_header: str = "",exact: bool = False,) -> list | float | int | None:
+def default_selectors(
+    year: int, table_selector: str | None = None, value_selector: str | None = None
+) -> tuple[str, str]:
     if table_selector is None or value_selector is None:
         if year >= 2023:
             table_selector = table_selector or "table.sc.survey-t"
@@ -35,6 +49,18 @@ async def get_text_data(frame,text: str,year: int,table_selector: str | None = N
         else:
             table_selector = table_selector or "table.grid"
             value_selector = value_selector or "span"
+    return table_selector, value_selector
+
+
+# ---------------------------
+# Per-field locator lookups
+# ---------------------------
+# The pipeline reads tables through snapshot_tables/TableSnapshot only. These are kept on
+# purpose as the reference: TableSnapshot is tested against them (tests/test_snapshot.py)
+# and benchmarks/run.py times them as the baseline the snapshot replaced.
+@retry_async(retries=2, delay=2)
+async def get_text_data(frame,text: str,year: int,table_selector: str | None = None,value_selector: str | None = None,table_header: str = "",exact: bool = False,) -> list | float | int | None:
+    table_selector, value_selector = default_selectors(year, table_selector, value_selector)
 
     if not table_header:
         if exact:
@@ -67,16 +93,7 @@ async def get_text_data(frame,text: str,year: int,table_selector: str | None = N
 
 @retry_async(retries=2, delay=2)
 async def get_box_data(frame,text: str,year: int,table_selector: str | None = None,value_selector: str | None = None,num_box: int = 2,) -> list:
-    if table_selector is None or value_selector is None:
-        if year >= 2023:
-            table_selector = table_selector or "table.sc.survey-t"
-            value_selector = value_selector or "td.sc-tb-r.t-co span"
-        elif 2020 <= year <= 2022:
-            table_selector = table_selector or "table.grid"
-            value_selector = value_selector or "td.number"
-        else:
-            table_selector = table_selector or "table.grid"
-            value_selector = value_selector or "span"
+    table_selector, value_selector = default_selectors(year, table_selector, value_selector)
 
     try:
         box_list = await frame.locator(f'{table_selector} tr:has-text("{text}") {value_selector}').all()
@@ -89,3 +106,120 @@ async def get_box_data(frame,text: str,year: int,table_selector: str | None = No
         value_list.append(temp_value)
 
     return normalize(value_list)
+
+
+# ---------------------------
+# Single-pass table snapshot
+# ---------------------------
+# One evaluate() per frame dumps every row of the requested tables, with the text
+# and `value` attribute of each requested value cell. Field lookups then run in
+# Python and reproduce the `table[:has-text(header)] tr:has-text(text) value`
+# locators used by get_text_data/get_box_data.
+TABLE_DUMP_JS = r"""
+({tables, values}) => {
+  const norm = (s) => (s || "").replace(/\u200b/g, "").replace(/\s+/g, " ").trim();
+  const order = new Map();
+  const all = document.getElementsByTagName("*");
+  for (let i = 0; i < all.length; i++) order.set(all[i], i);
+
+  const tableRecs = [];
+  const rowIndex = new Map();
+  const rows = [];
+  tables.forEach((sel, si) => {
+    for (const table of document.querySelectorAll(sel)) {
+      const ti = tableRecs.length;
+      tableRecs.push({
+        sel: si,
+        text: norm(table.textContent),
+        tds: Array.from(table.querySelectorAll("td"), (td) => norm(td.textContent)),
+      });
+      for (const tr of table.querySelectorAll("tr")) {
+        let ri = rowIndex.get(tr);
+        if (ri === undefined) {
+          ri = rows.length;
+          rowIndex.set(tr, ri);
+          rows.push({
+            order: order.get(tr),
+            tables: [],
+            text: norm(tr.textContent),
+            tds: Array.from(tr.querySelectorAll("td"), (td) => norm(td.textContent)),
+            cells: values.map((v) =>
+              Array.from(tr.querySelectorAll(":scope " + v), (el) => [
+                order.get(el),
+                el.innerText,
+                el.getAttribute("value"),
+              ])
+            ),
+          });
+        }
+        rows[ri].tables.push(ti);
+      }
+    }
+  });
+  rows.sort((a, b) => a.order - b.order);
+  return {tables: tableRecs, rows};
+}
+"""
+
+
+class TableSnapshot:
+    """Rows of a frame's tables, queried with the same arguments as get_text_data/get_box_data."""
+
+    def __init__(self, dump: dict[str, Any], tables: Sequence[str], values: Sequence[str]) -> None:
+        self.tables = dump["tables"]
+        self.rows = dump["rows"]
+        self._table_ids = {sel: i for i, sel in enumerate(tables)}
+        self._value_ids = {sel: i for i, sel in enumerate(values)}
+
+    def _cells(self, text: str, table_selector: str, value_selector: str, table_header: str, exact: bool) -> list[list[Any]]:
+        si = self._table_ids[table_selector]
+        vi = self._value_ids[value_selector]
+        needle = " ".join(text.split())
+        header = " ".join(table_header.split())
+
+        def table_ok(ti: int) -> bool:
+            table = self.tables[ti]
+            if table["sel"] != si:
+                return False
+            if not header:
+                return True
+            return header in table["tds"] if exact else header.lower() in table["text"].lower()
+
+        seen: set[int] = set()
+        cells: list[list[Any]] = []
+        for row in self.rows:
+            if not any(table_ok(ti) for ti in row["tables"]):
+                continue
+            if not (needle in row["tds"] if exact else needle.lower() in row["text"].lower()):
+                continue
+            for cell in row["cells"][vi]:
+                if cell[0] not in seen:
+                    seen.add(cell[0])
+                    cells.append(cell)
+        cells.sort(key=lambda cell: cell[0])
+        return cells
+
+    def text_data(self, text: str, year: int, table_selector: str | None = None, value_selector: str | None = None, table_header: str = "", exact: bool = False) -> list | float | int | None:
+        table_selector, value_selector = default_selectors(year, table_selector, value_selector)
+        value = normalize([cell[1] for cell in self._cells(text, table_selector, value_selector, table_header, exact)])
+        if isinstance(value, list):
+            return value
+        return (value / 100.0) if "%" in text else value
+
+    def box_data(self, text: str, year: int, table_selector: str | None = None, value_selector: str | None = None, num_box: int = 2) -> list:
+        table_selector, value_selector = default_selectors(year, table_selector, value_selector)
+        cells = self._cells(text, table_selector, value_selector, "", False)
+        return normalize([cell[2] for cell in cells[:num_box]])
+
+
+@retry_async(retries=2, delay=2)
+async def snapshot_tables(frame, year: int, extra: Sequence[tuple[str, str]] = ()) -> TableSnapshot:
+    """Dump the year's default table/value selectors plus any `extra` (table, value) pairs in one call."""
+    pairs = [default_selectors(year), *extra]
+    tables = list(dict.fromkeys(t for t, _ in pairs))
+    values = list(dict.fromkeys(v for _, v in pairs))
+    if isinstance(frame, StaticFrame):
+        dump = frame.dump_tables(tables, values)
+    else:
+        dump = await frame.evaluate(TABLE_DUMP_JS, {"tables": tables, "values": values})
+    return TableSnapshot(dump, tables, values)
@@ -0,0 +1,65 @@
+from __future__ import annotations
+
+import importlib.util
+from types import TracebackType
+from typing import Any
+
+
+class HttpFetcher:
+    """Pooled keep-alive HTTP client for the server-rendered `viewMode=iframe` report pages.
+
+    Requires the optional `httpx` dependency (`pip install 'ipeds-crawler[http]'`); HTTP/2 is
+    used when `h2` is installed as well. All requests go to one host (nces.ed.gov, or the
+    `--base-url` stand-in), so the pool limit is effectively a per-host connection limit.
+    """
+
+    def __init__(
+        self,
+        max_connections: int = 8,
+        timeout_s: float = 15.0,
+        user_agent: str = "ipeds-crawler/0.1",
+    ) -> None:
+        try:
+            import httpx
+        except ImportError as e:
+            raise RuntimeError("The HTTP fast path needs httpx: pip install 'ipeds-crawler[http]'") from e
+
+        self.http2 = importlib.util.find_spec("h2") is not None
+        self._client = httpx.AsyncClient(
+            http2=self.http2,
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+            timeout=timeout_s,
+            headers={"User-Agent": user_agent},
+            follow_redirects=True,
+        )
+        self.served = 0
+        self.fallbacks = 0
+
+    async def fetch(self, url: str) -> tuple[int, str | None]:
+        """(status, body) with status 0 for transport errors; the body is only kept for a 200."""
+        try:
+            response = await self._client.get(url)
+        except Exception:
+            return 0, None
+        if response.status_code != 200:
+            return response.status_code, None
+        return 200, response.text
+
+    def stats(self) -> str:
+        total = self.served + self.fallbacks
+        mode = "HTTP/2" if self.http2 else "HTTP/1.1"
+        return f"http fast path ({mode}): {self.served}/{total} pages served, {self.fallbacks} fell back to Chromium"
+
+    async def aclose(self) -> None:
+        await self._client.aclose()
+
+    async def __aenter__(self) -> HttpFetcher:
+        return self
+
+    async def __aexit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        tb: TracebackType | None,
+    ) -> Any:
+        await self.aclose()
@@ -0,0 +1,110 @@
+from __future__ import annotations
+
+import html
+import random
+from typing import Any
+
+from .extractors import NO_DATA_MARKERS
+from .schema import LAYOUT_YEARS
+from .surveys import FieldQuery, Plan, compile_plan
+
+# Synthetic survey pages built from the compiled plans, so extraction can be exercised
+# offline for every survey/layout. Each field gets one row in a table matching its
+# table selector: the first label in a plain td, then `cells` value cells matching its
+# value selector. Values are seeded, so the same (survey, year, seed) always renders
+# the same page.
+
+LAYOUTS = {"2014-2019": LAYOUT_YEARS[0], "2020-2022": LAYOUT_YEARS[1], "2023+": LAYOUT_YEARS[2]}
+
+
+def _compound(selector: str) -> tuple[str, list[str]]:
+    """'td.sc-tb-r.t-co' -> ('td', ['sc-tb-r', 't-co']); only tag.class selectors are used by the registry."""
+    tag, *classes = selector.split(".")
+    return tag or "span", classes
+
+
+def _open(selector: str, attrs: str = "") -> tuple[str, str]:
+    tag, classes = _compound(selector)
+    cls = f' class="{" ".join(classes)}"' if classes else ""
+    return f"<{tag}{cls}{attrs}>", f"</{tag}>"
+
+
+def _value_cell(value_selector: str, text: str, box: bool) -> str:
+    parts = value_selector.split()
+    if _compound(parts[0])[0] != "td":
+        # A bare value selector ("span") sits inside a plain cell.
+        parts = ["td", *parts]
+    if box:
+        # Box fields read the input's value attribute (get_box_data).
+        start, _ = _open(parts[-1], f' value="{html.escape(text)}"')
+        out = start
+    else:
+        start, end = _open(parts[-1])
+        out = f"{start}{html.escape(text)}{end}"
+    for part in reversed(parts[:-1]):
+        start, end = _open(part)
+        out = f"{start}{out}{end}"
+    return out
+
+
+def _matches(selector: str, table: str) -> bool:
+    tag, classes = _compound(selector)
+    other_tag, other_classes = _compound(table)
+    return tag == other_tag and set(classes) <= set(other_classes)
+
+
+def _raw_value(rng: random.Random, label: str) -> str:
+    if "%" in label or "percent" in label.lower() or "rate" in label.lower():
+        return f"{rng.randint(0, 100)}%"
+    if "$" in label or "tuition" in label.lower() or "fee" in label.lower():
+        return f"${rng.randint(1, 600) * 100:,}"
+    return f"{rng.randint(0, 40_000):,}"
+
+
+def _width(plan: Plan, q: FieldQuery, cells: int) -> int:
+    """Value cells for one field's row: the first count its pick accepts and its output slices can fill."""
+    need = max((o[3].stop or 0 for o in plan.outputs if o[2] == q.name and isinstance(o[3], slice)), default=0)
+    for width in (cells, *range(1, 17)):
+        try:
+            picked = q.pick(list(range(width)))
+        except (IndexError, ValueError, TypeError):
+            continue
+        if not isinstance(picked, list) or len(picked) >= need:
+            return width
+    return cells
+
+
+def survey_tables(plan: Plan, seed: int = 0, cells: int = 3) -> str:
+    rng = random.Random(f"{plan.survey}:{plan.year}:{seed}")
+    tables: dict[tuple[str, str], list[str]] = {}
+    for q in plan.queries:
+        label = q.labels[0]
+        values = "".join(_value_cell(q.value, _raw_value(rng, label), q.box) for _ in range(_width(plan, q, cells)))
+        rows = tables.setdefault((q.table, q.header), [f"<tr><td>{html.escape(q.header)}</td></tr>"] if q.header else [])
+        rows.append(f"<tr><td>{html.escape(label)}</td>{values}</tr>")
+    out = []
+    for (table, _), rows in tables.items():
+        start, end = _open(table)
+        out.append(f"{start}<tbody>{''.join(rows)}</tbody>{end}")
+    if not any(_matches(plan.wait, table) for table, _ in tables):
+        start, end = _open(plan.wait)
+        out.append(f"{start}{end}")
+    return "\n".join(out)
+
+
+def survey_page(survey: int, year: int, seed: int = 0, cells: int = 3, no_data: bool = False) -> str:
+    """A full HTML page for `survey` in `year`'s layout; `no_data` renders the "did not report" variant."""
+    body = f"<p>This institution {NO_DATA_MARKERS[0]} data.</p>" if no_data else survey_tables(compile_plan(survey, year), seed, cells)
+    return page_html(survey, body)
+
+
+def page_html(survey: int, body: str) -> str:
+    # div.facsimile_assets is one of the anchors the HTTP fast path looks for (ipeds_pages.FRAME_ANCHORS).
+    return (
+        f"<!DOCTYPE html><html><head><title>Survey {survey}</title></head><body>\n"
+        f'<div class="facsimile_assets">\n{body}\n</div>\n</body></html>'
+    )
+
+
+def fixture_pages(surveys: Any, years: Any = LAYOUT_YEARS, seed: int = 0) -> dict[tuple[int, int], str]:
+    return {(survey, year): survey_page(survey, year, seed) for year in years for survey in surveys}
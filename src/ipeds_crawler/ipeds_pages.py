@@ -1,38 +1,188 @@
-from typing import Union
+from __future__ import annotations
+
+import time
+from typing import TYPE_CHECKING, Union
+from urllib.parse import urlsplit
 from playwright.async_api import Page, Frame, TimeoutError as PlaywrightTimeoutError
+from .navigator import Navigator
+from .offline import StaticFrame
+from .retry import HttpStatusError, SelectorNotFound, classify_status
+
+if TYPE_CHECKING:
+    from .cache import PageCache
+    from .fetch import HttpFetcher
+    from .ratelimit import AdaptiveRateLimiter
+    from .retry import Retrier
 
-Node = Union[Page, Frame]
+Node = Union[Page, Frame, StaticFrame]
+
+FRAME_ANCHORS = [
+    "table.sc.survey-t input.sc-tbn",
+    "div.facsimile_assets",
+]
 
 
 async def wait_frame_ready(frame: Node, timeout: int = 3_000) -> str | None:
-    anchors = [
-        "table.sc.survey-t input.sc-tbn",
-        "div.facsimile_assets",
-    ]
-    for sel in anchors:
-        try:
-            await frame.locator(sel).first.wait_for(timeout=timeout, state="attached")
+    # Wait on all anchors at once, then report the first one that is present.
+    try:
+        await frame.locator(", ".join(FRAME_ANCHORS)).first.wait_for(timeout=timeout, state="attached")
+    except PlaywrightTimeoutError:
+        return None
+    for sel in FRAME_ANCHORS:
+        if await frame.locator(sel).count():
             return sel
-        except PlaywrightTimeoutError:
-            pass
     return None
 
 
-async def goto_reported_data(page: Page, unit_id: str | int, survey_num: int, year: int) -> Node:
-    iframe_url = (
-        f"https://nces.ed.gov/ipeds/reported-data/html/{unit_id}"
+# Overridable (IPEDS_BASE_URL / --base-url) to point the crawler at a local stand-in server.
+BASE_URL = "https://nces.ed.gov/ipeds"
+
+
+def iframe_url(unit_id: str | int, survey_num: int, year: int, base_url: str = BASE_URL) -> str:
+    return (
+        f"{base_url.rstrip('/')}/reported-data/html/{unit_id}"
         f"?year={year}&surveyNumber={survey_num}&viewMode=iframe"
     )
-    shell_url = f"https://nces.ed.gov/ipeds/reported-data/{unit_id}?year={year}&surveyNumber={survey_num}"
+
+
+def shell_url(unit_id: str | int, survey_num: int, year: int, base_url: str = BASE_URL) -> str:
+    return f"{base_url.rstrip('/')}/reported-data/{unit_id}?year={year}&surveyNumber={survey_num}"
+
+
+async def goto_reported_data(
+    page: Page,
+    unit_id: str | int,
+    survey_num: int,
+    year: int,
+    cache: PageCache | None = None,
+    http: HttpFetcher | None = None,
+    retry: Retrier | None = None,
+    limiter: AdaptiveRateLimiter | None = None,
+    base_url: str = BASE_URL,
+    navigator: Navigator | None = None,
+) -> Node:
+    if cache is not None:
+        html = await cache.aget(unit_id, survey_num, year)
+        if html is not None:
+            return StaticFrame(html)
+
+    url = iframe_url(unit_id, survey_num, year, base_url)
+    breaker = retry.breaker(urlsplit(url).hostname) if retry is not None else None
+
+    if http is not None:
+        # The iframe view is server-rendered: if its anchors are in the raw HTML the
+        # page can be parsed in-process and Chromium is never involved.
+        if breaker is not None:
+            await breaker.wait()
+        if limiter is not None:
+            await limiter.acquire()
+        start = time.monotonic()
+        status, html = await http.fetch(url)
+        if limiter is not None:
+            limiter.record(time.monotonic() - start, status)
+        if breaker is not None:
+            breaker.record(classify_status(status))
+        if html is not None:
+            frame = StaticFrame(html)
+            if await wait_frame_ready(frame):
+                http.served += 1
+                if cache is not None:
+                    await cache.aput(unit_id, survey_num, year, html)
+                return frame
+        http.fallbacks += 1
+
+    if retry is not None:
+        node = await retry.call(
+            _navigate, page, unit_id, survey_num, year, limiter, base_url, navigator, host=urlsplit(url).hostname
+        )
+    else:
+        node = await _navigate(page, unit_id, survey_num, year, limiter, base_url, navigator)
+
+    # Only pages that reached a known anchor are worth keeping.
+    if cache is not None and await wait_frame_ready(node):
+        await cache.aput(unit_id, survey_num, year, await node.content())
+    return node
+
+
+async def goto_cached(page: Page | None, unit_id: str | int, survey_num: int, year: int, cache: PageCache) -> Node:
+    """Browserless lookup for offline re-extraction; stale entries are still served."""
+    html = await cache.aget(unit_id, survey_num, year, fresh_only=False)
+    if html is None:
+        raise LookupError(f"survey {survey_num} for {unit_id} ({year}) is not in the page cache")
+    return StaticFrame(html)
+
+
+async def _goto(page: Page, url: str, timeout: int, limiter: AdaptiveRateLimiter | None = None) -> None:
+    if limiter is not None:
+        await limiter.acquire()
+    start = time.monotonic()
     try:
-        await page.goto(iframe_url, wait_until="domcontentloaded", timeout=15_000)
-        return page
+        response = await page.goto(url, wait_until="domcontentloaded", timeout=timeout)
     except Exception:
-        await page.goto(shell_url, wait_until="domcontentloaded", timeout=30_000)
-        iframe_el = await page.query_selector("iframe[src*='viewMode=iframe']")
-        if not iframe_el:
-            raise RuntimeError("Embedded iframe not found on shell page.")
-        frame = await iframe_el.content_frame()
-        if not frame:
-            raise RuntimeError("iframe content frame not available.")
-        return frame
+        if limiter is not None:
+            limiter.record(time.monotonic() - start, 0)
+        raise
+    status = response.status if response is not None else 200
+    if limiter is not None:
+        limiter.record(time.monotonic() - start, status)
+    if classify_status(status):
+        raise HttpStatusError(status, url)
+
+
+async def _navigate(
+    page: Page,
+    unit_id: str | int,
+    survey_num: int,
+    year: int,
+    limiter: AdaptiveRateLimiter | None = None,
+    base_url: str = BASE_URL,
+    navigator: Navigator | None = None,
+) -> Node:
+    """Load the report via the iframe view or the shell page, in the order `navigator` has learned.
+
+    Without a navigator: iframe view (15 s), then shell page (30 s). 429/5xx responses are
+    raised as they are for the retrier; the other URL form of the same server would not help.
+    If no attempt reaches a frame anchor, the last loaded node is returned (extraction then
+    reports the tables missing), or the last error raised when nothing loaded.
+    """
+    navigator = navigator or Navigator()
+    urls = {
+        "iframe": iframe_url(unit_id, survey_num, year, base_url),
+        "shell": shell_url(unit_id, survey_num, year, base_url),
+    }
+    node: Node | None = None
+    error: Exception | None = None
+    for attempt, (strategy, goto_ms, anchor_ms) in enumerate(navigator.plan(survey_num, year)):
+        start = time.monotonic()
+        try:
+            await _goto(page, urls[strategy], timeout=goto_ms, limiter=limiter)
+            goto_s = time.monotonic() - start
+            node = page if strategy == "iframe" else await _report_frame(page)
+        except HttpStatusError:
+            raise
+        except Exception as e:
+            navigator.record(survey_num, year, strategy, False)
+            error = e
+            continue
+        start = time.monotonic()
+        anchor = await wait_frame_ready(node, timeout=anchor_ms)
+        navigator.record(survey_num, year, strategy, anchor is not None, goto_s, time.monotonic() - start)
+        if anchor is not None:
+            if attempt:
+                navigator.fallbacks += 1
+            elif strategy == "shell":
+                navigator.shell_first += 1
+            return node
+    if node is None:
+        raise error
+    return node
+
+
+async def _report_frame(page: Page) -> Frame:
+    iframe_el = await page.query_selector("iframe[src*='viewMode=iframe']")
+    if not iframe_el:
+        raise SelectorNotFound("Embedded iframe not found on shell page.")
+    frame = await iframe_el.content_frame()
+    if not frame:
+        raise SelectorNotFound("iframe content frame not available.")
+    return frame
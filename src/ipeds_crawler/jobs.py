@@ -0,0 +1,319 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import socket
+import sqlite3
+import time
+from collections.abc import Iterable, Sequence
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from functools import partial
+from pathlib import Path
+from typing import Any
+
+from .resume import Pair, is_done
+
+PENDING, LEASED, DONE, FAILED = "pending", "leased", "done", "failed"
+BROWSER_LOST = "browser lost"
+
+
+@dataclass(frozen=True)
+class Task:
+    unit_id: str
+    year: int
+    survey: int
+    name: str
+    attempts: int
+
+
+class JobStore:
+    """Durable task queue: one row per (unit_id, year, survey), shared by every process on the box.
+
+    Workers claim all open surveys of one (unit_id, year) pair at a time under a lease.
+    A claim is a single `BEGIN IMMEDIATE` transaction, so two processes never get the same
+    task; a lease that is not completed within `lease_s` (crashed or OOM-killed worker) is
+    claimable again. Survey results are stored as JSON so a pair finished across several
+    processes or restarts can still be assembled into one record.
+
+    The methods block (up to the 60 s busy timeout while another process holds the write
+    lock); crawl workers go through the `a*` variants, which run them one at a time on the
+    store's own thread so the event loop keeps serving pages meanwhile.
+    """
+
+    def __init__(self, path: str | Path, lease_s: float = 300.0, max_attempts: int = 3) -> None:
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.lease_s = lease_s
+        self.max_attempts = max_attempts
+        self.owner = f"{socket.gethostname()}:{os.getpid()}"
+        # Autocommit mode: transactions are opened explicitly where they matter. The
+        # connection is used by one thread at a time: the caller's, or _executor's.
+        self._db = sqlite3.connect(path, timeout=60, isolation_level=None, check_same_thread=False)
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="jobstore")
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS pairs (
+                unit_id TEXT NOT NULL,
+                year INTEGER NOT NULL,
+                name TEXT NOT NULL,
+                seq INTEGER NOT NULL,
+                emitted_at REAL,
+                PRIMARY KEY (unit_id, year)
+            );
+            CREATE TABLE IF NOT EXISTS tasks (
+                unit_id TEXT NOT NULL,
+                year INTEGER NOT NULL,
+                survey INTEGER NOT NULL,
+                position INTEGER NOT NULL,
+                status TEXT NOT NULL DEFAULT 'pending',
+                attempts INTEGER NOT NULL DEFAULT 0,
+                lease_owner TEXT,
+                lease_expires REAL,
+                started_at REAL,
+                finished_at REAL,
+                duration_s REAL,
+                error TEXT,
+                result TEXT,
+                PRIMARY KEY (unit_id, year, survey)
+            );
+            CREATE INDEX IF NOT EXISTS tasks_open ON tasks (status, lease_expires);
+            """
+        )
+
+    # ---------------------------
+    # Queue
+    # ---------------------------
+    def enqueue(self, work: Iterable[tuple[Any, Any, int]], surveys: Sequence[int]) -> int:
+        """Add (name, unit_id, year) pairs and their survey tasks; existing rows are left alone."""
+        added = 0
+        self._db.execute("BEGIN IMMEDIATE")
+        try:
+            seq = self._db.execute("SELECT COALESCE(MAX(seq), -1) + 1 FROM pairs").fetchone()[0]
+            for name, unit_id, year in work:
+                cur = self._db.execute(
+                    "INSERT OR IGNORE INTO pairs (unit_id, year, name, seq) VALUES (?, ?, ?, ?)",
+                    (str(unit_id), int(year), str(name), seq),
+                )
+                if not cur.rowcount:
+                    continue
+                seq += 1
+                added += 1
+                self._db.executemany(
+                    "INSERT OR IGNORE INTO tasks (unit_id, year, survey, position) VALUES (?, ?, ?, ?)",
+                    [(str(unit_id), int(year), survey, i) for i, survey in enumerate(surveys)],
+                )
+            self._db.execute("COMMIT")
+        except BaseException:
+            self._db.execute("ROLLBACK")
+            raise
+        return added
+
+    def claim(self) -> list[Task]:
+        """Lease every open survey of the next (unit_id, year) pair; empty when nothing is claimable."""
+        now = time.time()
+        self._db.execute("BEGIN IMMEDIATE")
+        try:
+            # Leases that expired on their last allowed attempt will never be claimed again.
+            self._db.execute(
+                "UPDATE tasks SET status = ?, error = 'lease expired' WHERE status = ? AND lease_expires < ? AND attempts >= ?",
+                (FAILED, LEASED, now, self.max_attempts),
+            )
+            row = self._db.execute(
+                """
+                SELECT t.unit_id, t.year FROM tasks t JOIN pairs p USING (unit_id, year)
+                WHERE (t.status = ? OR (t.status = ? AND t.lease_expires < ?)) AND t.attempts < ?
+                ORDER BY p.seq LIMIT 1
+                """,
+                (PENDING, LEASED, now, self.max_attempts),
+            ).fetchone()
+            if row is None:
+                self._db.execute("COMMIT")
+                return []
+            unit_id, year = row
+            rows = self._db.execute(
+                """
+                SELECT t.survey, p.name, t.attempts FROM tasks t JOIN pairs p USING (unit_id, year)
+                WHERE t.unit_id = ? AND t.year = ? AND t.attempts < ?
+                  AND (t.status = ? OR (t.status = ? AND t.lease_expires < ?))
+                ORDER BY t.position
+                """,
+                (unit_id, year, self.max_attempts, PENDING, LEASED, now),
+            ).fetchall()
+            self._db.executemany(
+                """
+                UPDATE tasks SET status = ?, lease_owner = ?, lease_expires = ?, attempts = attempts + 1,
+                                 started_at = ?
+                WHERE unit_id = ? AND year = ? AND survey = ?
+                """,
+                [(LEASED, self.owner, now + self.lease_s, now, unit_id, year, survey) for survey, _, _ in rows],
+            )
+            self._db.execute("COMMIT")
+        except BaseException:
+            self._db.execute("ROLLBACK")
+            raise
+        return [Task(unit_id, year, survey, name, attempts + 1) for survey, name, attempts in rows]
+
+    def complete(self, task: Task, result: dict[str, Any]) -> None:
+        now = time.time()
+        self._db.execute(
+            """
+            UPDATE tasks SET status = ?, result = ?, finished_at = ?, duration_s = ? - started_at,
+                             lease_owner = NULL, lease_expires = NULL, error = NULL
+            WHERE unit_id = ? AND year = ? AND survey = ? AND lease_owner = ?
+            """,
+            (DONE, json.dumps(result), now, now, task.unit_id, task.year, task.survey, self.owner),
+        )
+
+    def fail(self, task: Task, error: BaseException) -> None:
+        """Release the lease; the task is retried until it has used `max_attempts`."""
+        status = FAILED if task.attempts >= self.max_attempts else PENDING
+        now = time.time()
+        self._db.execute(
+            """
+            UPDATE tasks SET status = ?, error = ?, finished_at = ?, duration_s = ? - started_at,
+                             lease_owner = NULL, lease_expires = NULL
+            WHERE unit_id = ? AND year = ? AND survey = ? AND lease_owner = ?
+            """,
+            (status, f"{type(error).__name__}: {error}", now, now, task.unit_id, task.year, task.survey, self.owner),
+        )
+
+    def release(self, task: Task) -> None:
+        """Return a task whose worker lost its browser to the queue.
+
+        The first loss gives the attempt back; after that it counts, so a page that crashes
+        Chromium every time ends up failed instead of being requeued forever.
+        """
+        self._db.execute(
+            """
+            UPDATE tasks SET status = CASE WHEN error = ? AND attempts >= ? THEN ? ELSE ? END,
+                             attempts = CASE WHEN error = ? THEN attempts ELSE MAX(attempts - 1, 0) END,
+                             error = ?, lease_owner = NULL, lease_expires = NULL
+            WHERE unit_id = ? AND year = ? AND survey = ? AND lease_owner = ?
+            """,
+            (
+                BROWSER_LOST, self.max_attempts, FAILED, PENDING, BROWSER_LOST, BROWSER_LOST,
+                task.unit_id, task.year, task.survey, self.owner,
+            ),
+        )
+
+    def take_record(self, unit_id: str, year: int, surveys: Sequence[int]) -> dict[str, Any] | None:
+        """Merged record for a pair whose surveys are all done, returned to exactly one caller."""
+        self._db.execute("BEGIN IMMEDIATE")
+        try:
+            record = self._record(unit_id, year, surveys)
+            if record is not None:
+                cur = self._db.execute(
+                    "UPDATE pairs SET emitted_at = ? WHERE unit_id = ? AND year = ? AND emitted_at IS NULL",
+                    (time.time(), unit_id, year),
+                )
+                if not cur.rowcount:
+                    record = None
+            self._db.execute("COMMIT")
+        except BaseException:
+            self._db.execute("ROLLBACK")
+            raise
+        return record
+
+    def recover(self, written: set[Pair], surveys: Sequence[int]) -> list[dict[str, Any]]:
+        """Records to (re)write after a crash.
+
+        Covers pairs whose surveys all finished but were never emitted, and pairs emitted
+        more than a lease ago that are missing from the output (buffered rows lost with
+        the process). Recently emitted pairs may still be in a live peer's buffer and are
+        left alone.
+        """
+        cutoff = time.time() - self.lease_s
+        candidates = self._db.execute(
+            """
+            SELECT p.unit_id, p.year, p.name, p.emitted_at FROM pairs p
+            WHERE (p.emitted_at IS NULL OR p.emitted_at < ?)
+              AND NOT EXISTS (SELECT 1 FROM tasks t WHERE t.unit_id = p.unit_id AND t.year = p.year AND t.status != ?)
+            ORDER BY p.seq
+            """,
+            (cutoff, DONE),
+        ).fetchall()
+        records = []
+        for unit_id, year, name, emitted_at in candidates:
+            if emitted_at is not None:
+                if is_done(written, name, unit_id, year):
+                    continue
+                self._db.execute("UPDATE pairs SET emitted_at = NULL WHERE unit_id = ? AND year = ?", (unit_id, year))
+            record = self.take_record(unit_id, year, surveys)
+            if record is not None:
+                records.append(record)
+        return records
+
+    def _record(self, unit_id: str, year: int, surveys: Sequence[int]) -> dict[str, Any] | None:
+        rows = dict(
+            self._db.execute(
+                "SELECT survey, result FROM tasks WHERE unit_id = ? AND year = ? AND status = ?",
+                (unit_id, year, DONE),
+            ).fetchall()
+        )
+        if any(survey not in rows for survey in surveys):
+            return None
+        name = self._db.execute(
+            "SELECT name FROM pairs WHERE unit_id = ? AND year = ?", (unit_id, year)
+        ).fetchone()[0]
+        merged: dict[str, Any] = {}
+        for survey in surveys:
+            merged.update(json.loads(rows[survey]))
+        merged["year"] = year
+        merged["institution"] = name
+        merged["unit_id"] = unit_id
+        return merged
+
+    def next_expiry(self) -> float | None:
+        """Seconds until the earliest live lease runs out, None when nothing is leased."""
+        row = self._db.execute(
+            "SELECT MIN(lease_expires) FROM tasks WHERE status = ? AND attempts < ?", (LEASED, self.max_attempts)
+        ).fetchone()
+        return None if row[0] is None else max(0.0, row[0] - time.time())
+
+    # ---------------------------
+    # Event-loop side
+    # ---------------------------
+    async def _run(self, fn: Any, *args: Any) -> Any:
+        return await asyncio.get_running_loop().run_in_executor(self._executor, partial(fn, *args))
+
+    async def aclaim(self) -> list[Task]:
+        return await self._run(self.claim)
+
+    async def acomplete(self, task: Task, result: dict[str, Any]) -> None:
+        await self._run(self.complete, task, result)
+
+    async def afail(self, task: Task, error: BaseException) -> None:
+        await self._run(self.fail, task, error)
+
+    async def arelease(self, task: Task) -> None:
+        await self._run(self.release, task)
+
+    async def atake_record(self, unit_id: str, year: int, surveys: Sequence[int]) -> dict[str, Any] | None:
+        return await self._run(self.take_record, unit_id, year, surveys)
+
+    async def aidle(self) -> tuple[int, float | None]:
+        """`open_tasks()` and `next_expiry()` in one hop."""
+        return await self._run(lambda: (self.open_tasks(), self.next_expiry()))
+
+    # ---------------------------
+    # Reporting
+    # ---------------------------
+    def open_tasks(self) -> int:
+        """Tasks that are pending or leased (possibly by another process) and may still run."""
+        return self._db.execute(
+            "SELECT COUNT(*) FROM tasks WHERE status IN (?, ?) AND attempts < ?",
+            (PENDING, LEASED, self.max_attempts),
+        ).fetchone()[0]
+
+    def stats(self) -> str:
+        counts = dict(self._db.execute("SELECT status, COUNT(*) FROM tasks GROUP BY status").fetchall())
+        avg = self._db.execute("SELECT AVG(duration_s) FROM tasks WHERE status = ?", (DONE,)).fetchone()[0]
+        summary = ", ".join(f"{counts.get(s, 0)} {s}" for s in (DONE, PENDING, LEASED, FAILED))
+        return f"job store: {summary} tasks" + (f", {avg:.1f}s avg per survey" if avg else "")
+
+    def close(self) -> None:
+        self._executor.shutdown()
+        self._db.close()
@@ -1,11 +1,91 @@
 # src/ipeds_crawler/logging.py
 from __future__ import annotations
 
+import atexit
+import json
 import logging
+import queue
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
 from pathlib import Path
+from typing import Any
+
+from rich.errors import MarkupError
 from rich.logging import RichHandler
+from rich.markup import render
+
+# Record attributes (passed with `extra=`) copied into the JSON log lines.
+STRUCTURED_FIELDS = ("institution", "unit_id", "year", "survey", "duration_s")
+
+_listener: QueueListener | None = None
+
+
+def strip_markup(message: str) -> str:
+    """'[bold]Name[/bold]' -> 'Name'; text that is not valid rich markup is returned as is."""
+    if "[" not in message:
+        return message
+    try:
+        return render(message).plain
+    except MarkupError:
+        return message
+
+
+def _json_default(value: Any) -> Any:
+    # numpy scalars (UNITIDs read by pandas) -> plain Python numbers.
+    return value.item() if hasattr(value, "item") else str(value)
+
+
+class JsonLinesFormatter(logging.Formatter):
+    """One compact JSON object per record, with markup stripped and structured fields kept."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        out: dict[str, Any] = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "pid": record.process,
+            "msg": strip_markup(record.getMessage()),
+        }
+        for name in STRUCTURED_FIELDS:
+            value = getattr(record, name, None)
+            if value is not None:
+                out[name] = value
+        if record.exc_info:
+            out["exc"] = self.formatException(record.exc_info)
+        return json.dumps(out, default=_json_default, ensure_ascii=False, separators=(",", ":"))
+
+
+class PlainFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        text = super().format(record)
+        return strip_markup(text)
+
+
+def _console_filter(record: logging.LogRecord) -> bool:
+    # Records logged with extra={"file_only": True} (per-pair timings) skip the console.
+    return not getattr(record, "file_only", False)
+
+
+class _EnqueueHandler(QueueHandler):
+    # The stock prepare() formats the message and copies the record on the calling
+    # thread; handing over the record as is leaves all formatting to the listener.
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+def setup_logging(level: str = "INFO", file_format: str = "json") -> logging.Logger:
+    """Route the "ipeds_crawler" logger through a queue to a background listener thread.
+
+    The listener renders the rich console output and writes logs/ipeds_crawler.log as
+    JSON lines (`file_format="json"`) or plain text, markup stripped either way. Safe to
+    call repeatedly: later calls only update the level.
+    """
+    global _listener
+    logger = logging.getLogger("ipeds_crawler")
+    logger.setLevel(getattr(logging, level.upper(), logging.INFO))
+    if _listener is not None:
+        return logger
 
-def setup_logging(level: str = "INFO") -> logging.Logger:
     log_dir = Path("logs")
     log_dir.mkdir(parents=True, exist_ok=True)
 
@@ -15,22 +95,36 @@ def setup_logging(level: str = "INFO") -> logging.Logger:
         show_time=True,
         show_path=False,
     )
+    console.setFormatter(logging.Formatter("%(message)s"))
+    console.addFilter(_console_filter)
 
     file_handler = logging.FileHandler(log_dir / "ipeds_crawler.log", encoding="utf-8")
+    if file_format == "json":
+        file_handler.setFormatter(JsonLinesFormatter())
+    else:
+        file_handler.setFormatter(PlainFormatter("%(asctime)s [%(levelname)s] %(name)s: %(message)s"))
 
-    console_fmt = "%(message)s"
-    file_fmt = "%(asctime)s [%(levelname)s] %(name)s: %(message)s"
-
-    console.setFormatter(logging.Formatter(console_fmt))
-    file_handler.setFormatter(logging.Formatter(file_fmt))
+    records: queue.SimpleQueue[logging.LogRecord] = queue.SimpleQueue()
+    _listener = QueueListener(records, console, file_handler, respect_handler_level=True)
+    _listener.start()
+    atexit.register(shutdown_logging)
 
-    logger = logging.getLogger("ipeds_crawler")
     logger.handlers.clear()
-    logger.setLevel(getattr(logging, level.upper(), logging.INFO))
-    logger.addHandler(console)
-    logger.addHandler(file_handler)
+    logger.addHandler(_EnqueueHandler(records))
 
     logging.getLogger("playwright").setLevel(logging.WARNING)
     logging.getLogger("asyncio").setLevel(logging.WARNING)
 
     return logger
+
+
+def shutdown_logging() -> None:
+    """Drain the queue and stop the listener thread; logging can be set up again afterwards."""
+    global _listener
+    if _listener is None:
+        return
+    _listener.stop()
+    for handler in _listener.handlers:
+        handler.close()
+    _listener = None
+    logging.getLogger("ipeds_crawler").handlers.clear()
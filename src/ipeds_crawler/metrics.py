@@ -0,0 +1,211 @@
+from __future__ import annotations
+
+import bisect
+import json
+import os
+import threading
+import time
+from collections.abc import Iterator
+from contextlib import AbstractContextManager, contextmanager, nullcontext
+from pathlib import Path
+from typing import Any
+
+# Upper bounds (seconds) of the latency buckets: fine below a second for parsing and
+# writes, coarse up to the 30 s shell-page timeout for navigation.
+BUCKETS = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.15, 0.25, 0.35, 0.5, 0.75,
+    1.0, 1.5, 2.0, 3.0, 5.0, 7.5, 10.0, 15.0, 20.0, 30.0, 45.0, 60.0, 120.0,
+)
+
+Labels = tuple[tuple[str, str], ...]
+
+
+def layout(year: int | None) -> str:
+    """Page layout of a collection year, as in extractors.default_selectors."""
+    if year is None:
+        return ""
+    if year >= 2023:
+        return "2023+"
+    if year >= 2020:
+        return "2020-2022"
+    return "2014-2019"
+
+
+class Histogram:
+    def __init__(self) -> None:
+        self.buckets = [0] * (len(BUCKETS) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds: float) -> None:
+        self.buckets[bisect.bisect_left(BUCKETS, seconds)] += 1
+        self.count += 1
+        self.sum += seconds
+        self.max = max(self.max, seconds)
+
+    def quantile(self, q: float) -> float:
+        """Estimate interpolated within the bucket, like Prometheus' histogram_quantile."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for i, n in enumerate(self.buckets):
+            if n and seen + n >= rank:
+                lower = BUCKETS[i - 1] if i else 0.0
+                upper = BUCKETS[i] if i < len(BUCKETS) else self.max
+                return min(lower + (upper - lower) * (rank - seen) / n, self.max)
+            seen += n
+        return self.max
+
+
+class Metrics:
+    """Stage latency histograms, counters and gauges for one crawler process.
+
+    Stage timings are labelled by survey number and page layout, so the slowest survey
+    pages stand out. Thread-safe: sinks record their writes from the writer thread.
+    `const_labels` are added to every exported series (e.g. the pid when several
+    processes export side by side).
+    """
+
+    def __init__(self, const_labels: dict[str, str] | None = None) -> None:
+        self.const_labels: Labels = tuple(sorted((const_labels or {}).items()))
+        self.histograms: dict[Labels, Histogram] = {}
+        self.counters: dict[tuple[str, Labels], float] = {}
+        self.gauges: dict[tuple[str, Labels], float] = {}
+        self._lock = threading.Lock()
+        self._exporter: threading.Thread | None = None
+        self._stop = threading.Event()
+
+    # ---------------------------
+    # Recording
+    # ---------------------------
+    @staticmethod
+    def _stage_labels(stage: str, survey: int | None, year: int | None) -> Labels:
+        return (("stage", stage), ("survey", "" if survey is None else str(survey)), ("layout", layout(year)))
+
+    def observe(self, stage: str, seconds: float, survey: int | None = None, year: int | None = None) -> None:
+        key = self._stage_labels(stage, survey, year)
+        with self._lock:
+            hist = self.histograms.get(key)
+            if hist is None:
+                hist = self.histograms[key] = Histogram()
+            hist.observe(seconds)
+
+    @contextmanager
+    def span(self, stage: str, survey: int | None = None, year: int | None = None) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - start, survey, year)
+
+    def inc(self, name: str, value: float = 1, **labels: Any) -> None:
+        key = (name, tuple(sorted((k, str(v)) for k, v in labels.items())))
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def set_gauge(self, name: str, value: float, **labels: Any) -> None:
+        key = (name, tuple(sorted((k, str(v)) for k, v in labels.items())))
+        with self._lock:
+            self.gauges[key] = value
+
+    # ---------------------------
+    # Export
+    # ---------------------------
+    def _fmt_labels(self, labels: Labels, extra: Labels = ()) -> str:
+        items = self.const_labels + labels + extra
+        if not items:
+            return ""
+        escaped = (f'{k}="{_escape(v)}"' for k, v in items)
+        return "{" + ",".join(escaped) + "}"
+
+    def prometheus_text(self) -> str:
+        lines = [
+            "# HELP ipeds_stage_seconds Time spent per crawl stage, survey and page layout.",
+            "# TYPE ipeds_stage_seconds histogram",
+        ]
+        with self._lock:
+            for labels, hist in sorted(self.histograms.items()):
+                cumulative = 0
+                for bound, n in zip((*BUCKETS, "+Inf"), hist.buckets, strict=True):
+                    cumulative += n
+                    lines.append(f"ipeds_stage_seconds_bucket{self._fmt_labels(labels, (('le', str(bound)),))} {cumulative}")
+                lines.append(f"ipeds_stage_seconds_sum{self._fmt_labels(labels)} {hist.sum:.6f}")
+                lines.append(f"ipeds_stage_seconds_count{self._fmt_labels(labels)} {hist.count}")
+            for kind, series in (("counter", self.counters), ("gauge", self.gauges)):
+                for name in sorted({name for name, _ in series}):
+                    lines.append(f"# TYPE ipeds_{name} {kind}")
+                    for (n, labels), value in sorted(series.items()):
+                        if n == name:
+                            lines.append(f"ipeds_{name}{self._fmt_labels(labels)} {value:g}")
+        return "\n".join(lines) + "\n"
+
+    def summary(self) -> dict[str, Any]:
+        """Per-series counts and p50/p95/p99, slowest total time first."""
+        with self._lock:
+            stages = [
+                {
+                    **dict(labels),
+                    "count": hist.count,
+                    "sum_s": round(hist.sum, 4),
+                    "mean_s": round(hist.sum / hist.count, 4),
+                    "p50_s": round(hist.quantile(0.50), 4),
+                    "p95_s": round(hist.quantile(0.95), 4),
+                    "p99_s": round(hist.quantile(0.99), 4),
+                    "max_s": round(hist.max, 4),
+                }
+                for labels, hist in self.histograms.items()
+            ]
+            counters = [{"name": name, **dict(labels), "value": v} for (name, labels), v in self.counters.items()]
+            gauges = [{"name": name, **dict(labels), "value": v} for (name, labels), v in self.gauges.items()]
+        stages.sort(key=lambda s: s["sum_s"], reverse=True)
+        return {"labels": dict(self.const_labels), "stages": stages, "counters": counters, "gauges": gauges}
+
+    def stats(self, top: int = 3) -> str:
+        slowest = [s for s in self.summary()["stages"] if s["survey"]][:top]
+        if not slowest:
+            return "metrics: no stage timings recorded"
+        parts = [
+            f"{s['stage']} survey {s['survey']} ({s['layout']}) p95 {s['p95_s']:.2f}s over {s['count']}" for s in slowest
+        ]
+        return "metrics: most time in " + "; ".join(parts)
+
+    def write_prometheus(self, path: str | Path) -> None:
+        _write_atomic(Path(path), self.prometheus_text())
+
+    def write_json(self, path: str | Path) -> None:
+        _write_atomic(Path(path), json.dumps(self.summary(), indent=2) + "\n")
+
+    def start_export(self, path: str | Path, interval_s: float = 15.0) -> None:
+        """Rewrite the Prometheus text file every `interval_s` (node_exporter textfile collector style)."""
+
+        def run() -> None:
+            while not self._stop.wait(interval_s):
+                self.write_prometheus(path)
+
+        self._exporter = threading.Thread(target=run, name="metrics-export", daemon=True)
+        self._exporter.start()
+
+    def stop_export(self) -> None:
+        self._stop.set()
+        if self._exporter is not None:
+            self._exporter.join()
+            self._exporter = None
+
+
+def span(metrics: Metrics | None, stage: str, survey: int | None = None, year: int | None = None) -> AbstractContextManager[None]:
+    """`metrics.span(...)`, or a no-op when metrics are off."""
+    return nullcontext() if metrics is None else metrics.span(stage, survey, year)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _write_atomic(path: Path, text: str) -> None:
+    # Scrapers must never see a half-written file.
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    tmp.write_text(text, encoding="utf-8")
+    os.replace(tmp, path)
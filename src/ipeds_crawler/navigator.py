@@ -0,0 +1,187 @@
+from __future__ import annotations
+
+import json
+import logging
+import os
+from collections import deque
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+from .metrics import layout
+
+if TYPE_CHECKING:
+    from .metrics import Metrics
+
+logger = logging.getLogger("ipeds_crawler")
+
+# Tried in this order until there is evidence; the timeouts are the old fixed ones.
+STRATEGIES = ("iframe", "shell")
+GOTO_TIMEOUT_MS = {"iframe": 15_000, "shell": 30_000}
+ANCHOR_TIMEOUT_MS = 3_000
+
+
+class _History:
+    """Recent outcomes and latencies of one strategy for one (survey, layout)."""
+
+    def __init__(self, window: int) -> None:
+        self.outcomes: deque[bool] = deque(maxlen=window)
+        self.goto_s: deque[float] = deque(maxlen=window)
+        self.anchor_s: deque[float] = deque(maxlen=window)
+
+    def score(self) -> float:
+        # Laplace-smoothed success rate: an untried strategy scores 0.5.
+        return (sum(self.outcomes) + 1) / (len(self.outcomes) + 2)
+
+    def to_json(self) -> dict[str, Any]:
+        return {
+            "outcomes": [int(o) for o in self.outcomes],
+            "goto_s": [round(s, 4) for s in self.goto_s],
+            "anchor_s": [round(s, 4) for s in self.anchor_s],
+        }
+
+    def load(self, data: dict[str, Any]) -> None:
+        self.outcomes.extend(bool(o) for o in data.get("outcomes", ()))
+        self.goto_s.extend(data.get("goto_s", ()))
+        self.anchor_s.extend(data.get("anchor_s", ()))
+
+
+def _quantile(samples: deque[float], q: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+class Navigator:
+    """Learns per (survey, page layout) which URL form reaches the report and how fast.
+
+    Each strategy is the iframe view (`iframe`) or the shell page with the report frame
+    dug out of it (`shell`); ipeds_pages._navigate follows `plan()` and reports every
+    attempt to `record()`. An attempt succeeds once `wait_frame_ready` sees an anchor.
+    Strategies are tried best recent success rate first, so a URL form that is broken for a
+    whole survey stops costing a timeout per page; every `explore_every`-th navigation of a
+    key tries the runner-up first, to notice when it works again. Once a strategy has
+    `min_samples` successes, its goto and anchor timeouts become `headroom` x the observed
+    p99, between `floor_ms` and the fixed defaults; the last strategy tried for a page
+    always gets the defaults. With `path` the history is loaded from and saved to JSON.
+    """
+
+    def __init__(
+        self,
+        path: str | Path | None = None,
+        window: int = 200,
+        min_samples: int = 10,
+        quantile: float = 0.99,
+        headroom: float = 3.0,
+        floor_ms: int = 1_000,
+        explore_every: int = 100,
+        metrics: Metrics | None = None,
+    ) -> None:
+        self.path = Path(path) if path is not None else None
+        self.window = window
+        self.min_samples = min_samples
+        self.quantile = quantile
+        self.headroom = headroom
+        self.floor_ms = floor_ms
+        self.explore_every = explore_every
+        self.metrics = metrics
+        self.fallbacks = 0
+        self.shell_first = 0
+        self._history: dict[tuple[int, str], dict[str, _History]] = {}
+        self._navigations: dict[tuple[int, str], int] = {}
+        if self.path is not None and self.path.exists():
+            self._load()
+
+    # ---------------------------
+    # Learning
+    # ---------------------------
+    def _key(self, survey: int, year: int) -> tuple[int, str]:
+        return (survey, layout(year))
+
+    def _histories(self, key: tuple[int, str]) -> dict[str, _History]:
+        histories = self._history.get(key)
+        if histories is None:
+            histories = self._history[key] = {s: _History(self.window) for s in STRATEGIES}
+        return histories
+
+    def _timeout_ms(self, samples: deque[float], default: int) -> int:
+        if len(samples) < self.min_samples:
+            return default
+        tuned = _quantile(samples, self.quantile) * self.headroom * 1000
+        return int(min(default, max(self.floor_ms, tuned)))
+
+    def plan(self, survey: int, year: int) -> list[tuple[str, int, int]]:
+        """(strategy, goto timeout ms, anchor timeout ms) in the order to try them."""
+        key = self._key(survey, year)
+        histories = self._histories(key)
+        n = self._navigations[key] = self._navigations.get(key, 0) + 1
+        order = sorted(STRATEGIES, key=lambda s: -histories[s].score())
+        if self.explore_every and n % self.explore_every == 0:
+            order = order[1:] + order[:1]
+        steps = []
+        for i, strategy in enumerate(order):
+            history = histories[strategy]
+            if i == len(order) - 1:
+                steps.append((strategy, GOTO_TIMEOUT_MS[strategy], ANCHOR_TIMEOUT_MS))
+            else:
+                steps.append(
+                    (
+                        strategy,
+                        self._timeout_ms(history.goto_s, GOTO_TIMEOUT_MS[strategy]),
+                        self._timeout_ms(history.anchor_s, ANCHOR_TIMEOUT_MS),
+                    )
+                )
+        return steps
+
+    def record(self, survey: int, year: int, strategy: str, ok: bool, goto_s: float = 0.0, anchor_s: float = 0.0) -> None:
+        """One attempt: `ok` when an anchor was found, with the goto and anchor wait times."""
+        history = self._histories(self._key(survey, year))[strategy]
+        history.outcomes.append(ok)
+        if ok:
+            history.goto_s.append(goto_s)
+            history.anchor_s.append(anchor_s)
+        if self.metrics is not None:
+            self.metrics.inc(
+                "navigations_total", survey=survey, layout=layout(year), strategy=strategy,
+                outcome="ok" if ok else "failed",
+            )
+
+    # ---------------------------
+    # Persistence and stats
+    # ---------------------------
+    def _load(self) -> None:
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+        except (OSError, ValueError) as e:
+            logger.warning(f"[yellow][WARN][/yellow] Ignoring navigator state {self.path}: {e}")
+            return
+        for entry in data.get("keys", []):
+            histories = self._histories((int(entry["survey"]), entry["layout"]))
+            for strategy, history in entry.get("strategies", {}).items():
+                if strategy in histories:
+                    histories[strategy].load(history)
+
+    def save(self) -> None:
+        if self.path is None:
+            return
+        data = {
+            "keys": [
+                {"survey": survey, "layout": lay, "strategies": {s: h.to_json() for s, h in histories.items()}}
+                for (survey, lay), histories in sorted(self._history.items())
+            ]
+        }
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_name(f".{self.path.name}.{os.getpid()}.tmp")
+        tmp.write_text(json.dumps(data, separators=(",", ":")), encoding="utf-8")
+        os.replace(tmp, self.path)
+
+    def stats(self) -> str:
+        preferred = []
+        for (survey, lay), histories in sorted(self._history.items()):
+            best = max(STRATEGIES, key=lambda s: histories[s].score())
+            if best != STRATEGIES[0] and histories[best].outcomes:
+                preferred.append(f"{survey} ({lay})")
+        shell_first = f"; shell page first for {', '.join(preferred)}" if preferred else ""
+        return (
+            f"navigator: {self.shell_first} pages loaded via the shell page without trying the iframe view, "
+            f"{self.fallbacks} fallbacks to the other URL form{shell_first}"
+        )
+
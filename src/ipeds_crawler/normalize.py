@@ -1,45 +1,47 @@
 from __future__ import annotations
 from typing import Any, Iterable, List, Sequence, Tuple
 import re
+import numpy as np
 import pandas as pd
 from difflib import SequenceMatcher
 
-def normalize(data: Any) -> Any:
-    def normalize_value(val: Any) -> Any:
-        if isinstance(val, str):
-            s = val.strip()
-            if s in ("-", "--", "---", "–", "—"):
-                return None
-            elif s.endswith("%"):
-                cleaned = s.strip("%").replace(",", "")
-                if cleaned.replace(".", "", 1).isdigit():
-                    num = float(cleaned) / 100
-                    num = round(num, 2)
-                    return int(num) if num.is_integer() else num
-                else:
-                    return s
-            elif s.startswith("$"):
-                cleaned = s.replace("$", "").replace(",", "")
-                if cleaned.replace(".", "", 1).isdigit():
-                    num = float(cleaned)
-                    num = round(num, 2)
-                    return int(num) if num.is_integer() else num
-                else:
-                    return s
+def normalize_value(val: Any) -> Any:
+    if isinstance(val, str):
+        s = val.strip()
+        if s in ("-", "--", "---", "–", "—"):
+            return None
+        elif s.endswith("%"):
+            cleaned = s.strip("%").replace(",", "")
+            if cleaned.replace(".", "", 1).isdigit():
+                num = float(cleaned) / 100
+                num = round(num, 2)
+                return int(num) if num.is_integer() else num
+            else:
+                return s
+        elif s.startswith("$"):
+            cleaned = s.replace("$", "").replace(",", "")
+            if cleaned.replace(".", "", 1).isdigit():
+                num = float(cleaned)
+                num = round(num, 2)
+                return int(num) if num.is_integer() else num
             else:
-                cleaned = s.replace(",", "")
-                if cleaned.replace(".", "", 1).isdigit():
-                    num = float(cleaned)
-                    num = round(num, 2)
-                    return int(num) if num.is_integer() else num
-                else:
-                    return s
-        elif isinstance(val, (int, float)):
-            num = round(val, 2)
-            return int(num) if num.is_integer() else num
+                return s
         else:
-            return val
+            cleaned = s.replace(",", "")
+            if cleaned.replace(".", "", 1).isdigit():
+                num = float(cleaned)
+                num = round(num, 2)
+                return int(num) if num.is_integer() else num
+            else:
+                return s
+    elif isinstance(val, (int, float)):
+        num = round(val, 2)
+        return int(num) if num.is_integer() else num
+    else:
+        return val
+
 
+def normalize(data: Any) -> Any:
     if isinstance(data, str):
         return normalize_value(data)
 
@@ -61,6 +63,138 @@ def normalize(data: Any) -> Any:
     return normalize_value(data)
 
 
+# ---------------------------
+# Column-wise (batch) versions
+# ---------------------------
+# Raw cells repeat heavily ("-", small counts, common percentages), so strings are
+# factorized first and only the distinct values are parsed. With pyarrow installed the
+# ASCII ones go through its string kernels; everything else uses the scalar functions.
+_DASHES = ["-", "--", "---", "–", "—"]
+# What str.strip() removes from ASCII text.
+_ASCII_WS = " \t\n\r\x0b\x0c\x1c\x1d\x1e\x1f"
+# ASCII form of `s.replace(".", "", 1).isdigit()`.
+_DECIMAL_RE = r"^(?:[0-9]+\.?[0-9]*|\.[0-9]+)$"
+_ASCII_NUM_RE = r"^-?[0-9]+(?:\.[0-9]+)?$"
+
+
+def _pyarrow() -> Any:
+    try:
+        import pyarrow
+        import pyarrow.compute
+    except ImportError:
+        return None
+    return pyarrow
+
+
+def _as_object_array(values: Any) -> np.ndarray:
+    if isinstance(values, pd.Series):
+        return values.to_numpy(dtype=object, copy=True)
+    out = np.empty(len(values), dtype=object)
+    out[:] = list(values)
+    return out
+
+
+def _round2(x: np.ndarray) -> np.ndarray:
+    """round(x, 2) elementwise, bit-identical to Python's correctly rounded round()."""
+    out = np.round(x, 2)
+    # x * 100 can land on the wrong side of a .5 tie, and huge values lose precision
+    # when scaled; those few are redone with Python's round().
+    scaled = x * 100
+    with np.errstate(invalid="ignore"):
+        risky = (np.abs(scaled - np.floor(scaled) - 0.5) < 1e-6) | ~(np.abs(x) < 1e13)
+    if risky.any():
+        out[risky] = [round(v, 2) for v in x[risky].tolist()]
+    return out
+
+
+def _to_python_numbers(x: np.ndarray) -> np.ndarray:
+    """Floats as Python objects, with integral values turned into int like the scalar path."""
+    out = np.empty(len(x), dtype=object)
+    out[:] = x.tolist()
+    with np.errstate(invalid="ignore"):
+        integral = np.isfinite(x) & (np.mod(x, 1) == 0)
+    if integral.any():
+        out[integral] = [int(v) for v in x[integral].tolist()]
+    return out
+
+
+def _batch(values: Any, scalar: Any, distinct: Any) -> pd.Series:
+    out = _as_object_array(values)
+    if pd.api.types.infer_dtype(out, skipna=False) == "string":
+        is_str = np.ones(len(out), dtype=bool)
+    else:
+        is_str = np.fromiter((isinstance(v, str) for v in out), dtype=bool, count=len(out))
+    if (~is_str).any():
+        out[~is_str] = [scalar(v) for v in out[~is_str].tolist()]
+    if is_str.any():
+        codes, uniques = pd.factorize(out[is_str])
+        out[is_str] = distinct(np.asarray(uniques, dtype=object), scalar)[codes]
+    return pd.Series(out, index=values.index if isinstance(values, pd.Series) else None, dtype=object)
+
+
+def _ascii_split(uniques: np.ndarray, scalar: Any) -> tuple[Any, np.ndarray, np.ndarray]:
+    """(pyarrow module, ascii mask, result array with the non-ASCII entries already filled)."""
+    result = np.empty(len(uniques), dtype=object)
+    pa = _pyarrow()
+    ascii_mask = np.zeros(len(uniques), dtype=bool)
+    if pa is not None:
+        ascii_mask = pa.compute.string_is_ascii(pa.array(uniques, type=pa.string())).to_numpy(zero_copy_only=False)
+    if (~ascii_mask).any():
+        result[~ascii_mask] = [scalar(v) for v in uniques[~ascii_mask].tolist()]
+    return pa, ascii_mask, result
+
+
+def _normalize_distinct(uniques: np.ndarray, scalar: Any) -> np.ndarray:
+    pa, ascii_mask, result = _ascii_split(uniques, scalar)
+    if not ascii_mask.any():
+        return result
+    pc = pa.compute
+    st = pc.utf8_trim(pa.array(uniques[ascii_mask], type=pa.string()), characters=_ASCII_WS)
+    dash = pc.is_in(st, value_set=pa.array(_DASHES)).to_numpy(zero_copy_only=False)
+    pct = pc.ends_with(st, "%")
+    dollar = pc.starts_with(st, "$")
+    cleaned = pc.if_else(
+        pct,
+        pc.replace_substring(pc.utf8_trim(st, characters="%"), ",", ""),
+        pc.replace_substring(pc.if_else(dollar, pc.replace_substring(st, "$", ""), st), ",", ""),
+    )
+    numeric = pc.match_substring_regex(cleaned, _DECIMAL_RE).to_numpy(zero_copy_only=False)
+
+    sub = st.to_numpy(zero_copy_only=False).astype(object)
+    sub[dash] = None
+    if numeric.any():
+        nums = pc.cast(cleaned.filter(pa.array(numeric)), pa.float64()).to_numpy()
+        nums = np.where(pct.to_numpy(zero_copy_only=False)[numeric], nums / 100, nums)
+        sub[numeric] = _to_python_numbers(_round2(nums))
+    result[ascii_mask] = sub
+    return result
+
+
+def _coerce_distinct(uniques: np.ndarray, scalar: Any) -> np.ndarray:
+    pa, ascii_mask, result = _ascii_split(uniques, scalar)
+    if not ascii_mask.any():
+        return result
+    pc = pa.compute
+    raw = uniques[ascii_mask]
+    st = pc.utf8_trim(pa.array(raw, type=pa.string()), characters=_ASCII_WS)
+    match = pc.match_substring_regex(st, _ASCII_NUM_RE).to_numpy(zero_copy_only=False)
+    sub = raw.copy()
+    if match.any():
+        sub[match] = _to_python_numbers(pc.cast(st.filter(pa.array(match)), pa.float64()).to_numpy())
+    result[ascii_mask] = sub
+    return result
+
+
+def normalize_series(values: Any) -> pd.Series:
+    """Batch normalize_value over a Series, array or list; returns an object Series.
+
+    Elementwise identical to `[normalize_value(v) for v in values]`: dashes become None,
+    "12%" becomes 0.12, "$1,234.5" and "1,234.5" become numbers rounded to 2 dp (int when
+    integral), other strings come back stripped and non-strings go through the scalar path.
+    """
+    return _batch(values, normalize_value, _normalize_distinct)
+
+
 def parse_graph(text: str) -> list[Any]:
     lines = [line.strip() for line in text.splitlines() if line.strip()]
     result: list[Any] = [lines[0]]
@@ -93,6 +227,11 @@ def _coerce(v: Any) -> Any:
     return v
 
 
+def coerce_series(values: Any) -> pd.Series:
+    """Batch _coerce: strings that are plain decimal numbers become int/float, all else is unchanged."""
+    return _batch(values, _coerce, _coerce_distinct)
+
+
 def block_to_df(rows: list[list[Any]], labels: list[str], *, mode: str, uni: str | None = None) -> pd.DataFrame:
     feats: dict[str, Any] = {}
 
@@ -158,19 +297,82 @@ def graph_to_df(rows: list[list[Any]], *, mode: str, uni: str | None = None) ->
     return pd.DataFrame([feats])
 
 
-def get_best_unitid(df: pd.DataFrame, name: str, threshold: float = 0.75) -> tuple[str, str, float] | None:
-    if df.empty or not name:
-        return None
+class UnitIdIndex:
+    """Reusable index over an HD frame (INSTNM, UNITID) for exact best-match lookups.
+
+    Scores are the same `SequenceMatcher(None, instnm.lower(), name.lower()).ratio()` as
+    before, but rows are visited in order of an upper bound on that ratio: 2 * (shared
+    character counts) / (total length), i.e. `quick_ratio`, computed for all rows at once
+    from a character-count matrix. Scoring stops once the bound drops below the best
+    ratio found, so the result (first row on ties) is identical to a full scan.
+    """
+
+    def __init__(self, df: pd.DataFrame) -> None:
+        self.instnm = df["INSTNM"].tolist()
+        self.unitid = df["UNITID"].tolist()
+        self.names = [str(s).lower() for s in self.instnm]
+        self.lengths = np.array([len(n) for n in self.names], dtype=np.int64)
+        alphabet = sorted({ch for n in self.names for ch in n})
+        self.columns = {ch: i for i, ch in enumerate(alphabet)}
+        self.counts = np.zeros((len(self.names), len(alphabet)), dtype=np.int32)
+        for row, n in enumerate(self.names):
+            for ch in n:
+                self.counts[row, self.columns[ch]] += 1
+        self.scored = 0
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def _bounds(self, query: str) -> np.ndarray:
+        q = np.zeros(len(self.columns), dtype=np.int32)
+        for ch in query:
+            col = self.columns.get(ch)
+            if col is not None:
+                q[col] += 1
+        shared = np.minimum(self.counts, q).sum(axis=1) if len(self.columns) else np.zeros(len(self), dtype=np.int64)
+        total = self.lengths + len(query)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            # Same float expression as SequenceMatcher's 2.0 * matches / length; two empty strings score 1.0.
+            return np.where(total > 0, 2.0 * shared / total, 1.0)
+
+    def best(self, name: str, threshold: float = 0.75) -> tuple[str, str, float] | None:
+        if not len(self) or not name:
+            return None
+        query = name.lower()
+        bounds = self._bounds(query)
+        order = np.lexsort((np.arange(len(self)), -bounds))
+
+        matcher = SequenceMatcher(None, "", query)
+        best_pos, best_sim = -1, -1.0
+        for pos in order.tolist():
+            if bounds[pos] < best_sim:
+                break
+            matcher.set_seq1(self.names[pos])
+            sim = matcher.ratio()
+            self.scored += 1
+            if sim > best_sim or (sim == best_sim and pos < best_pos):
+                best_pos, best_sim = pos, sim
+
+        if best_sim < threshold:
+            print(f"Low confidence match ({best_sim:.2f}) for '{name}' → '{self.instnm[best_pos]}'")
+            return None
+        return str(self.unitid[best_pos]), self.instnm[best_pos], float(best_sim)
+
+    def match_many(self, names: Iterable[str], threshold: float = 0.75) -> list[tuple[str, str, float] | None]:
+        """best() for each name; repeated names are looked up once."""
+        seen: dict[str, tuple[str, str, float] | None] = {}
+        out = []
+        for name in names:
+            if name not in seen:
+                seen[name] = self.best(name, threshold)
+            out.append(seen[name])
+        return out
 
-    df = df.assign(
-        sim=df["INSTNM"].apply(lambda s: SequenceMatcher(None, str(s).lower(), name.lower()).ratio())
-    )
 
-    best = df.loc[df["sim"].idxmax()]
-    if best["sim"] < threshold:
-        print(f"Low confidence match ({best['sim']:.2f}) for '{name}' → '{best['INSTNM']}'")
+def get_best_unitid(df: pd.DataFrame, name: str, threshold: float = 0.75) -> tuple[str, str, float] | None:
+    if df.empty or not name:
         return None
-    return str(best["UNITID"]), best["INSTNM"], float(best["sim"])
+    return UnitIdIndex(df).best(name, threshold)
 
 
 def label_dict(base: str, labels: list[str], values: list[Any], position: str = "last") -> dict[str, Any]:
@@ -0,0 +1,415 @@
+from __future__ import annotations
+
+import re
+from collections.abc import Callable, Sequence
+from dataclasses import dataclass, field
+from html.parser import HTMLParser
+from typing import Any
+
+from playwright.async_api import TimeoutError as PlaywrightTimeoutError
+
+# Static stand-in for the slice of the Playwright Frame/Locator API used by
+# extractors.py, so the same extraction code can run over saved HTML without a browser.
+
+VOID_TAGS = {
+    "area", "base", "br", "col", "embed", "hr", "img", "input",
+    "link", "meta", "param", "source", "track", "wbr",
+}
+SKIP_TEXT_TAGS = {"script", "style", "noscript", "template"}
+
+# Start tags that implicitly close an open element, bounded by a scope tag.
+IMPLIED_END: dict[str, tuple[set[str], set[str]]] = {
+    "td": ({"td", "th"}, {"tr", "table"}),
+    "th": ({"td", "th"}, {"tr", "table"}),
+    "tr": ({"tr", "td", "th"}, {"table", "tbody", "thead", "tfoot"}),
+    "tbody": ({"tbody", "thead", "tfoot", "tr", "td", "th"}, {"table"}),
+    "thead": ({"tbody", "thead", "tfoot", "tr", "td", "th"}, {"table"}),
+    "tfoot": ({"tbody", "thead", "tfoot", "tr", "td", "th"}, {"table"}),
+    "li": ({"li"}, {"ul", "ol"}),
+    "option": ({"option"}, {"select", "datalist"}),
+    "p": ({"p"}, {"div", "td", "th", "body"}),
+}
+
+
+def _squash(text: str) -> str:
+    return " ".join(text.replace("\u200b", "").split())
+
+
+@dataclass(eq=False)
+class Element:
+    tag: str
+    attrs: dict[str, str]
+    parent: Element | None = None
+    order: int = 0
+    children: list[Element | str] = field(default_factory=list)
+    _text: str | None = None
+    _descendants: list[Element] | None = None
+
+    @property
+    def classes(self) -> set[str]:
+        return set(self.attrs.get("class", "").split())
+
+    def text(self) -> str:
+        """Whitespace-normalised text content, the form Playwright's text pseudo-classes compare."""
+        if self._text is None:
+            parts: list[str] = []
+            self._collect(parts)
+            self._text = _squash("".join(parts))
+        return self._text
+
+    def _collect(self, parts: list[str]) -> None:
+        for child in self.children:
+            if isinstance(child, str):
+                parts.append(child)
+            elif child.tag not in SKIP_TEXT_TAGS:
+                child._collect(parts)
+
+    def descendants(self) -> list[Element]:
+        """Descendant elements in document order; cached, since parsed pages are never mutated."""
+        if self._descendants is None:
+            out: list[Element] = []
+            stack = [c for c in reversed(self.children) if isinstance(c, Element)]
+            while stack:
+                el = stack.pop()
+                out.append(el)
+                stack.extend(c for c in reversed(el.children) if isinstance(c, Element))
+            self._descendants = out
+        return self._descendants
+
+
+class _TreeBuilder(HTMLParser):
+    def __init__(self) -> None:
+        super().__init__(convert_charrefs=True)
+        self.root = Element("#document", {})
+        self.stack: list[Element] = [self.root]
+        self.count = 0
+
+    def handle_starttag(self, tag: str, attrs: list[tuple[str, str | None]]) -> None:
+        implied = IMPLIED_END.get(tag)
+        if implied is not None:
+            closes, scope = implied
+            for i in range(len(self.stack) - 1, 0, -1):
+                open_tag = self.stack[i].tag
+                if open_tag in scope:
+                    break
+                if open_tag in closes:
+                    del self.stack[i:]
+                    break
+
+        self.count += 1
+        el = Element(tag, {k: v or "" for k, v in attrs}, parent=self.stack[-1], order=self.count)
+        self.stack[-1].children.append(el)
+        if tag not in VOID_TAGS:
+            self.stack.append(el)
+
+    def handle_startendtag(self, tag: str, attrs: list[tuple[str, str | None]]) -> None:
+        self.handle_starttag(tag, attrs)
+        if tag not in VOID_TAGS and self.stack[-1].tag == tag:
+            self.stack.pop()
+
+    def handle_endtag(self, tag: str) -> None:
+        for i in range(len(self.stack) - 1, 0, -1):
+            if self.stack[i].tag == tag:
+                del self.stack[i:]
+                return
+
+    def handle_data(self, data: str) -> None:
+        self.stack[-1].children.append(data)
+
+
+def parse_html(html: str) -> Element:
+    builder = _TreeBuilder()
+    builder.feed(html)
+    builder.close()
+    return builder.root
+
+
+# ---------------------------
+# Selector engine: tag, .class, #id, [attr], [attr=v], [attr*=v], :has-text(),
+# :text-is(), :has(), descendant combinator and comma lists.
+# ---------------------------
+Predicate = Callable[[Element], bool]
+
+
+@dataclass
+class Compound:
+    tag: str | None = None
+    predicates: list[Predicate] = field(default_factory=list)
+
+    def matches(self, el: Element) -> bool:
+        if self.tag is not None and el.tag != self.tag:
+            return False
+        return all(p(el) for p in self.predicates)
+
+
+Chain = list[Compound]
+
+_IDENT = re.compile(r"[\w-]+")
+
+
+def _split_top(selector: str, sep: str) -> list[str]:
+    """Split on `sep` outside quotes, brackets and parentheses."""
+    parts: list[str] = []
+    depth = 0
+    quote: str | None = None
+    buf: list[str] = []
+    for ch in selector:
+        if quote:
+            buf.append(ch)
+            if ch == quote:
+                quote = None
+            continue
+        if ch in "\"'":
+            quote = ch
+        elif ch in "([":
+            depth += 1
+        elif ch in ")]":
+            depth -= 1
+        elif depth == 0 and (ch == sep or (sep == " " and ch.isspace())):
+            parts.append("".join(buf))
+            buf = []
+            continue
+        buf.append(ch)
+    parts.append("".join(buf))
+    return [p.strip() for p in parts if p.strip()]
+
+
+def _unquote(arg: str) -> str:
+    arg = arg.strip()
+    if len(arg) >= 2 and arg[0] == arg[-1] and arg[0] in "\"'":
+        return arg[1:-1]
+    return arg
+
+
+def _closing(s: str, start: int, open_ch: str, close_ch: str) -> int:
+    depth = 0
+    quote: str | None = None
+    for i in range(start, len(s)):
+        ch = s[i]
+        if quote:
+            if ch == quote:
+                quote = None
+        elif ch in "\"'":
+            quote = ch
+        elif ch == open_ch:
+            depth += 1
+        elif ch == close_ch:
+            depth -= 1
+            if depth == 0:
+                return i
+    raise ValueError(f"Unbalanced selector: {s!r}")
+
+
+def _attr_predicate(expr: str) -> Predicate:
+    m = re.fullmatch(r"\s*([\w-]+)\s*(?:([*^$~]?=)\s*(.+?))?\s*", expr)
+    if not m:
+        raise ValueError(f"Unsupported attribute selector: [{expr}]")
+    name, op, raw = m.group(1), m.group(2), m.group(3)
+    if op is None:
+        return lambda el: name in el.attrs
+    value = _unquote(raw)
+    if op == "=":
+        return lambda el: el.attrs.get(name) == value
+    if op == "*=":
+        return lambda el: value in el.attrs.get(name, "")
+    if op == "^=":
+        return lambda el: el.attrs.get(name, "").startswith(value)
+    if op == "$=":
+        return lambda el: el.attrs.get(name, "").endswith(value)
+    return lambda el: value in el.attrs.get(name, "").split()
+
+
+def _pseudo_predicate(name: str, arg: str) -> Predicate:
+    if name == "has-text":
+        needle = _squash(_unquote(arg)).lower()
+        return lambda el: needle in el.text().lower()
+    if name == "text-is":
+        exact = _squash(_unquote(arg))
+        return lambda el: el.text() == exact
+    if name == "has":
+        chains = parse_selector(arg)
+        return lambda el: any(_select_chain(el, chain) for chain in chains)
+    raise ValueError(f"Unsupported pseudo-class: :{name}")
+
+
+def _parse_compound(text: str) -> Compound:
+    compound = Compound()
+    i = 0
+    m = _IDENT.match(text)
+    if m:
+        compound.tag = m.group(0).lower()
+        i = m.end()
+    elif text.startswith("*"):
+        i = 1
+    while i < len(text):
+        ch = text[i]
+        if ch in ".#":
+            m = _IDENT.match(text, i + 1)
+            if not m:
+                raise ValueError(f"Bad selector: {text!r}")
+            ident = m.group(0)
+            if ch == ".":
+                compound.predicates.append(lambda el, c=ident: c in el.classes)
+            else:
+                compound.predicates.append(lambda el, v=ident: el.attrs.get("id") == v)
+            i = m.end()
+        elif ch == "[":
+            end = _closing(text, i, "[", "]")
+            compound.predicates.append(_attr_predicate(text[i + 1 : end]))
+            i = end + 1
+        elif ch == ":":
+            m = _IDENT.match(text, i + 1)
+            if not m:
+                raise ValueError(f"Bad selector: {text!r}")
+            name = m.group(0)
+            i = m.end()
+            arg = ""
+            if i < len(text) and text[i] == "(":
+                end = _closing(text, i, "(", ")")
+                arg = text[i + 1 : end]
+                i = end + 1
+            compound.predicates.append(_pseudo_predicate(name, arg))
+        else:
+            raise ValueError(f"Unsupported selector syntax in {text!r}")
+    return compound
+
+
+_SELECTOR_CACHE: dict[str, list[Chain]] = {}
+
+
+def parse_selector(selector: str) -> list[Chain]:
+    chains = _SELECTOR_CACHE.get(selector)
+    if chains is None:
+        chains = [
+            [_parse_compound(part) for part in _split_top(alternative, " ")]
+            for alternative in _split_top(selector, ",")
+        ]
+        _SELECTOR_CACHE[selector] = chains
+    return chains
+
+
+def _select_chain(scope: Element, chain: Chain) -> list[Element]:
+    current = [scope]
+    for compound in chain:
+        seen: set[int] = set()
+        found: list[Element] = []
+        for base in current:
+            for el in base.descendants():
+                if id(el) not in seen and compound.matches(el):
+                    seen.add(id(el))
+                    found.append(el)
+        if not found:
+            return []
+        found.sort(key=lambda el: el.order)
+        current = found
+    return current
+
+
+def select(scope: Element, selector: str) -> list[Element]:
+    """All elements under `scope` matching `selector`, unique and in document order."""
+    chains = parse_selector(selector)
+    if len(chains) == 1:
+        return _select_chain(scope, chains[0])
+    merged = {id(el): el for chain in chains for el in _select_chain(scope, chain)}
+    return sorted(merged.values(), key=lambda el: el.order)
+
+
+# ---------------------------
+# Frame / Locator stand-ins
+# ---------------------------
+class StaticLocator:
+    def __init__(self, elements: list[Element], selector: str) -> None:
+        self._elements = elements
+        self._selector = selector
+
+    @property
+    def first(self) -> StaticLocator:
+        return StaticLocator(self._elements[:1], self._selector)
+
+    def nth(self, index: int) -> StaticLocator:
+        try:
+            return StaticLocator([self._elements[index]], self._selector)
+        except IndexError:
+            return StaticLocator([], self._selector)
+
+    def locator(self, selector: str) -> StaticLocator:
+        merged = {id(el): el for base in self._elements for el in select(base, selector)}
+        return StaticLocator(sorted(merged.values(), key=lambda el: el.order), selector)
+
+    async def count(self) -> int:
+        return len(self._elements)
+
+    async def all(self) -> list[StaticLocator]:
+        return [StaticLocator([el], self._selector) for el in self._elements]
+
+    async def wait_for(self, timeout: float | None = None, state: str = "visible") -> None:
+        # Static HTML never changes, so there is nothing to wait for.
+        if state in ("attached", "visible") and not self._elements:
+            raise PlaywrightTimeoutError(f"No element matches {self._selector!r}")
+        if state in ("detached", "hidden") and self._elements:
+            raise PlaywrightTimeoutError(f"Element still present: {self._selector!r}")
+
+    async def all_inner_texts(self) -> list[str]:
+        return [el.text() for el in self._elements]
+
+    async def all_text_contents(self) -> list[str]:
+        return [el.text() for el in self._elements]
+
+    async def inner_text(self) -> str:
+        return self._single().text()
+
+    async def get_attribute(self, name: str) -> str | None:
+        return self._single().attrs.get(name)
+
+    def _single(self) -> Element:
+        if not self._elements:
+            raise PlaywrightTimeoutError(f"No element matches {self._selector!r}")
+        return self._elements[0]
+
+
+class StaticFrame:
+    """Read-only frame over saved HTML; `locator()` evaluates Playwright-style selectors in-process."""
+
+    def __init__(self, html: str) -> None:
+        self.html = html
+        self.root = parse_html(html)
+
+    def locator(self, selector: str) -> StaticLocator:
+        return StaticLocator(select(self.root, selector), selector)
+
+    async def content(self) -> str:
+        return self.html
+
+    async def inner_text(self, selector: str) -> str:
+        return await self.locator(selector).first.inner_text()
+
+    def dump_tables(self, tables: Sequence[str], values: Sequence[str]) -> dict[str, Any]:
+        """Same structure as extractors.TABLE_DUMP_JS, computed over the parsed tree."""
+        table_recs: list[dict[str, Any]] = []
+        row_index: dict[int, int] = {}
+        rows: list[dict[str, Any]] = []
+        for si, sel in enumerate(tables):
+            for table in select(self.root, sel):
+                ti = len(table_recs)
+                table_recs.append(
+                    {"sel": si, "text": table.text(), "tds": [td.text() for td in select(table, "td")]}
+                )
+                for tr in select(table, "tr"):
+                    ri = row_index.get(id(tr))
+                    if ri is None:
+                        ri = row_index[id(tr)] = len(rows)
+                        rows.append(
+                            {
+                                "order": tr.order,
+                                "tables": [],
+                                "text": tr.text(),
+                                "tds": [td.text() for td in select(tr, "td")],
+                                "cells": [
+                                    [[el.order, el.text(), el.attrs.get("value")] for el in select(tr, v)]
+                                    for v in values
+                                ],
+                            }
+                        )
+                    rows[ri]["tables"].append(ti)
+        rows.sort(key=lambda row: row["order"])
+        return {"tables": table_recs, "rows": rows}
@@ -1,576 +1,373 @@
-from typing import Any, List
-import os
-import traceback
+from collections.abc import Awaitable, Callable, Sequence
+from typing import Any
+from contextlib import nullcontext, suppress
+from functools import partial
+import asyncio
+import logging
+import time
 import pandas as pd
 from rich import print
-
-from .browser import browser_page
-from .ipeds_pages import goto_reported_data
-from .extractors import wait_for_all, get_text_data, get_box_data
-from .normalize import build_labeled_dict, normalize
-from ipeds_crawler.logging import setup_logging
-
-async def run_pipeline(input_df: pd.DataFrame, output_path: str, min_year: int = 2014, max_year: int = 2023) -> None:
+from playwright.async_api import Page
+
+from .blocking import BlockPolicy
+from .browser import BrowserPool
+from .cache import NegativeCache, PageCache
+from .fetch import HttpFetcher
+from .jobs import JobStore, Task
+from .metrics import Metrics, layout, span
+from .navigator import Navigator
+from .ratelimit import AdaptiveRateLimiter
+from .retry import Retrier
+from .sinks import BufferedSink, CsvSink
+from .ipeds_pages import BASE_URL, Node, goto_cached, goto_reported_data
+from .extractors import NO_DATA, TABLE_FOUND, snapshot_tables, table_status
+from .resume import pending_work
+from .shard import shard_work
+from .surveys import REGISTRY, Plan, compile_plan
+
+Goto = Callable[[Page, Any, int, int], Awaitable[Node]]
+
+
+async def run_pipeline(
+    input_df: pd.DataFrame,
+    output_path: str,
+    min_year: int = 2014,
+    max_year: int = 2023,
+    concurrency: int = 1,
+    parallel_surveys: bool = False,
+    resume: bool = True,
+    cache: PageCache | None = None,
+    offline: bool = False,
+    http: HttpFetcher | None = None,
+    negative: NegativeCache | None = None,
+    retry: Retrier | None = None,
+    limiter: AdaptiveRateLimiter | None = None,
+    sink: BufferedSink | None = None,
+    jobs: JobStore | None = None,
+    shard: tuple[int, int] | None = None,
+    base_url: str = BASE_URL,
+    metrics: Metrics | None = None,
+    browser: BrowserPool | None = None,
+    navigator: Navigator | None = None,
+) -> None:
     name_list = input_df["INSTNM"].tolist()
     id_list = input_df["UNITID"].tolist()
-
-    async with browser_page() as page:
-        logger = setup_logging("INFO")
-        for name, unit_id in zip(name_list, id_list):
-            for year in range(max_year, min_year - 1, -1):
-                try:
-                    logger.info(f"[bold]{name}[/bold] Year: {year}")
-
-                    # ---------------------------
-                    # INSTITUTIONAL PAGE (Survey 1) — Pricing
-                    # ---------------------------
-                    frame = await goto_reported_data(page, unit_id, 1, year)
-                    if year == 2023:
-                        table_found = await wait_for_all(frame, "table.sc.survey-t")
-                    else:
-                        table_found = await wait_for_all(frame, "table.grid")
-
-                    if table_found:
-                        tuition_fee = await get_text_data(frame, "out-of-state tuition and fees", year)
-                        if not tuition_fee:
-                            tuition_fee = await get_text_data(
-                                frame,
-                                "Published Tuition and fees" if year == 2023 else "Tuition and fees",
-                                year,
-                            )
-                        if tuition_fee:
-                            tuition_fee = tuition_fee[-1] if len(tuition_fee) == 4 else tuition_fee[3]
-
-                        book_and_supplies = await get_text_data(frame, "Books and supplies", year)
-                        book_and_supplies = (
-                            book_and_supplies[-1] if book_and_supplies else book_and_supplies
-                        )
-
-                        food_housing_on_campus = await get_text_data(
-                            frame,
-                            "On-campus food and housing" if year == 2023 else "On-campus room and board",
-                            year,
-                        )
-                        food_housing_on_campus = (
-                            food_housing_on_campus[-1]
-                            if food_housing_on_campus
-                            else food_housing_on_campus
-                        )
-
-                        other_expenses_on_campus = await get_text_data(
-                            frame, "On-campus other expenses", year
-                        )
-                        other_expenses_on_campus = (
-                            other_expenses_on_campus[-1]
-                            if other_expenses_on_campus
-                            else other_expenses_on_campus
-                        )
-
-                        food_housing_off_campus = await get_text_data(
-                            frame,
-                            "Off-campus food and housing" if year == 2023 else "Off-campus room and board",
-                            year,
-                        )
-                        food_housing_off_campus = (
-                            food_housing_off_campus[-1]
-                            if food_housing_off_campus
-                            else food_housing_off_campus
-                        )
-
-                        other_expenses_off_campus = await get_text_data(
-                            frame, "Off-campus other expenses", year
-                        )
-                        other_expenses_off_campus = (
-                            other_expenses_off_campus[-1]
-                            if other_expenses_off_campus
-                            else other_expenses_off_campus
-                        )
-
-                        other_expenses_off_campus_family = await get_text_data(
-                            frame, "Off-campus with family other expenses", year
-                        )
-                        other_expenses_off_campus_family = (
-                            other_expenses_off_campus_family[-1]
-                            if other_expenses_off_campus_family
-                            else other_expenses_off_campus_family
-                        )
-                    else:
-                        logger.warning(f"[yellow][WARN][/yellow] pricing information table not found for {year}")
-                        tuition_fee = None
-                        book_and_supplies = None
-                        food_housing_on_campus = None
-                        other_expenses_on_campus = None
-                        food_housing_off_campus = None
-                        other_expenses_off_campus = None
-                        other_expenses_off_campus_family = None
-
-                    pricing_data = build_labeled_dict(
-                        ("tuition_fee", "", tuition_fee, None),
-                        ("book_and_supplies", "", book_and_supplies, None),
-                        ("food_housing_on_campus", "", food_housing_on_campus, None),
-                        ("other_expenses_on_campus", "", other_expenses_on_campus, None),
-                        ("food_housing_off_campus", "", food_housing_off_campus, None),
-                        ("other_expenses_off_campus", "", other_expenses_off_campus, None),
-                        ("other_expenses_off_campus_family", "", other_expenses_off_campus_family, None),
-                    )
-
-                    # ---------------------------
-                    # ADMISSIONS & TEST SCORE (Survey 12)
-                    # ---------------------------
-                    frame = await goto_reported_data(page, unit_id, 12, year)
-                    if year == 2023:
-                        table_selector = "table.sc.survey-t"
-                        value_selector = "td.sc-tb-r.t-co span"
-                    elif 2020 <= year <= 2022:
-                        table_selector = "table.grid"
-                        value_selector = "td.number"
-                    else:
-                        table_selector = "table.sc"
-                        value_selector = "span"
-
-                    table_found = await wait_for_all(frame, table_selector)
-                    if table_found:
-                        num_applicant = await get_text_data(frame, "Number of applicants", year)
-                        percent_admitted = await get_text_data(frame, "Percent admitted", year)
-                        percent_admitted_enrolled = await get_text_data(
-                            frame, "Percent admitted who enrolled", year
-                        )
-                        sat = await get_text_data(
-                            frame, "SAT", year, table_selector=table_selector, value_selector=value_selector
-                        )
-                        act = await get_text_data(
-                            frame, "ACT", year, table_selector=table_selector, value_selector=value_selector
-                        )
-
-                        if year == 2023:
-                            if sat:
-                                sat.pop(3)
-                                sat.pop(6)
-                            if act:
-                                act.pop(3)
-                                act.pop(6)
-                    else:
-                        logger.warning(f"[yellow][WARN][/yellow] Admission & test score table not found for {year}")
-                        num_applicant = []
-                        percent_admitted = []
-                        percent_admitted_enrolled = []
-                        sat = []
-                        act = []
-
-                    col1 = ["total", "male", "female"]
-                    col2 = ["num_submitted", "pct_submitted"]
-                    col3 = ["25th_pct", "75th_pct"]
-
-                    admission_data = build_labeled_dict(
-                        ("num_applicant", col1, num_applicant, slice(None)),
-                        ("percent_admitted", col1, percent_admitted, slice(None)),
-                        ("percent_admitted_enrolled", col1, percent_admitted_enrolled, slice(None)),
-                        ("sat", col2, sat, slice(0, 2)),
-                        ("act", col2, act, slice(0, 2)),
-                        ("sat_rw", col3, sat, slice(2, 4)),
-                        ("sat_math", col3, sat, slice(4, 6)),
-                        ("act_comp", col3, act, slice(2, 4)),
-                        ("act_eng", col3, act, slice(4, 6)),
-                        ("act_math", col3, act, slice(6, 8)),
-                    )
-
-                    # ---------------------------
-                    # ENROLLMENT (Survey 15)
-                    # ---------------------------
-                    frame = await goto_reported_data(page, unit_id, 15, year)
-                    table_selector = "table.sc.survey-t" if year == 2023 else "table.grid"
-                    table_found = await wait_for_all(frame, table_selector)
-
-                    if table_found:
-                        total_enrollment = await get_text_data(frame, "Total enrollment", year)
-                        both_enrol = await get_text_data(frame, "Graduate enrollment", year)
-                        if isinstance(both_enrol, list) and both_enrol:
-                            undergrad_enrollment, grad_enrollment = both_enrol
-                        else:
-                            undergrad_enrollment = both_enrol
-                            grad_enrollment = None
-
-                        female_percentage = await get_text_data(
-                            frame, "Percent of all students who are female", year
-                        )
-                        female_percentage = (
-                            female_percentage[1]
-                            if isinstance(female_percentage, list) and female_percentage
-                            else female_percentage
-                        )
-                        if year == 2023:
-                            temp_text = "U .S. Nonresident (%)"
-                        elif 2021 < year <= 2022:
-                            temp_text = "U.S. Nonresident"
-                        else:
-                            temp_text = "Nonresident alien"
-                        international_student_percent = await get_text_data(frame, temp_text, year)
-                        if not international_student_percent:
-                            international_student_percent = None
-                        elif isinstance(international_student_percent, list):
-                            international_student_percent = international_student_percent[1]
-                    else:
-                        logger.warning("[yellow][WARN][/yellow] Enrollment table not found")
-                        total_enrollment = None
-                        undergrad_enrollment = None
-                        grad_enrollment = None
-                        female_percentage = None
-                        international_student_percent = None
-
-                    enrol_data = build_labeled_dict(
-                        ("total_enrollment", "", total_enrollment, None),
-                        ("undergrad_enrollment", "", undergrad_enrollment, None),
-                        ("grad_enrollment", "", grad_enrollment, None),
-                        ("female_percentage", "", female_percentage, None),
-                        ("international_student_percent", "", international_student_percent, None),
-                    )
-
-                    # ---------------------------
-                    # COMPLETIONS (Survey 3)
-                    # ---------------------------
-                    frame = await goto_reported_data(page, unit_id, 3, year)
-                    if year > 2019:
-                        table_selector = "table.table.table-bordered.sc"
-                        value_selector = "td.number"
-                    else:
-                        table_selector = "table.sc"
-                        value_selector = "td.sc-tb-c"
-
-                    table_found = await wait_for_all(frame, table_selector)
-                    if table_found:
-                        Bs = await get_text_data(
-                            frame, "Bachelor's degree", year, table_selector=table_selector, value_selector=value_selector
-                        )
-                        if not Bs:
-                            Bs = await get_text_data(
-                                frame, "Bachelors degree", year, table_selector=table_selector, value_selector=value_selector
-                            )
-                        Ms = await get_text_data(
-                            frame, "Master's degree", year, table_selector=table_selector, value_selector=value_selector
-                        )
-                        Phd = await get_text_data(
-                            frame, "Doctor's degree - research", year, table_selector=table_selector, value_selector=value_selector
-                        )
-                        total_completors = await get_text_data(
-                            frame, "All Completers", year, table_selector=table_selector, value_selector=value_selector
-                        )
-                    else:
-                        logger.warning(f"[yellow][WARN][/yellow] completions table not found for {year}")
-                        Bs = []
-                        Ms = []
-                        Phd = []
-                        total_completors = []
-
-                    completions_data = build_labeled_dict(
-                        ("Bs", ["1st_major", "2nd_major"], Bs, None, "first"),
-                        ("Ms", ["1st_major", "2nd_major"], Ms, None, "first"),
-                        ("Phd", ["1st_major", "2nd_major"], Phd, None, "first"),
-                        ("total_completors", ["male", "female", ""], total_completors, None, "last"),
-                    )
-
-                    # ---------------------------
-                    # GRADUATION (Survey 8)
-                    # ---------------------------
-                    frame = await goto_reported_data(page, unit_id, 8, year)
-                    if year == 2023:
-                        table_found = await wait_for_all(frame, "table.sc.survey-t")
-                    else:
-                        table_found = await wait_for_all(frame, "table.grid")
-
-                    if table_found:
-                        graduation_rate_pct = await get_text_data(
-                            frame, "Graduation rate", year, table_header="Overall Graduation Rate"
-                        )
-                        graduation_rate_pct = (
-                            graduation_rate_pct[0]
-                            if isinstance(graduation_rate_pct, list)
-                            else graduation_rate_pct
-                        )
-
-                        total_graduated = await get_text_data(
-                            frame, "Total number of students in the Adjusted Cohort", year
-                        )
-                        total_graduated = (
-                            total_graduated[0] if isinstance(total_graduated, list) else total_graduated
-                        )
-
-                        total_graduated_150_time = await get_text_data(
-                            frame, "Total number of completers within 150", year
-                        )
-                        total_graduated_150_time = (
-                            total_graduated_150_time[0]
-                            if isinstance(total_graduated_150_time, list)
-                            else total_graduated_150_time
-                        )
-                    else:
-                        logger.warning(f"[yellow][WARN][/yellow] Graduation table not found for {year}")
-                        graduation_rate_pct = []
-                        total_graduated = []
-                        total_graduated_150_time = []
-
-                    graduation_data = build_labeled_dict(
-                        ("graduation_rate_pct", "", graduation_rate_pct, None),
-                        ("total_graduated", "", total_graduated, None),
-                        ("total_graduated_150_time", "", total_graduated_150_time, None),
+    work = [
+        (name, unit_id, year)
+        for name, unit_id in zip(name_list, id_list)
+        for year in range(max_year, min_year - 1, -1)
+    ]
+    logger = logging.getLogger("ipeds_crawler")
+    if shard is not None:
+        work = shard_work(work, *shard)
+        logger.info(f"Shard {shard[0]}/{shard[1]}: {len(work)} pairs")
+    sink = sink or CsvSink(output_path)
+    written = sink.completed_pairs() if resume or jobs is not None else set()
+    if resume:
+        work, skipped = pending_work(work, written)
+        if skipped:
+            logger.info(f"Resuming: {skipped} pairs already in {output_path}, {len(work)} left")
+    recovered: list[dict[str, Any]] = []
+    if jobs is not None:
+        added = jobs.enqueue(work, SURVEYS)
+        # Pairs a crashed run finished but never got into the output.
+        recovered = jobs.recover(written, SURVEYS)
+        logger.info(
+            f"Job store: {added} new pairs queued, {jobs.open_tasks()} survey tasks open, "
+            f"{len(recovered)} finished pairs recovered"
+        )
+        if not jobs.open_tasks() and not recovered:
+            return
+    elif not work:
+        return
+
+    if offline:
+        # Re-extract from the page cache only: no browser, pages are parsed in-process.
+        if cache is None:
+            raise ValueError("offline mode needs a page cache")
+        goto: Goto = partial(goto_cached, cache=cache)
+        pool_cm: Any = nullcontext(None)
+        size = 1
+    else:
+        retry = retry or Retrier()
+        limiter = limiter or AdaptiveRateLimiter()
+        navigator = navigator or Navigator(metrics=metrics)
+        logger.info(f"Rate limit: {limiter.rate:.2f} req/s to start, at most {limiter.max_rps:.2f} req/s")
+        goto = partial(
+            goto_reported_data, cache=cache, http=http, retry=retry, limiter=limiter, base_url=base_url,
+            navigator=navigator,
+        )
+        pool_cm = browser or BrowserPool(concurrency, policy=BlockPolicy().for_base_url(base_url), metrics=metrics)
+        size = pool_cm.size
+    size = max(1, min(size, len(work) if jobs is None else jobs.open_tasks()))
+    pages_per_slot = len(SURVEYS) if parallel_surveys else 1
+
+    queue: asyncio.Queue[tuple[int, Any, Any, int]] = asyncio.Queue()
+    for i, (name, unit_id, year) in enumerate(work):
+        queue.put_nowait((i, name, unit_id, year))
+
+    # Workers finish out of order; records are written back in work-list order
+    # so the output matches a sequential run row for row.
+    done: dict[int, dict[str, Any] | None] = {}
+    next_to_write = 0
+
+    def flush_ready() -> None:
+        nonlocal next_to_write
+        while next_to_write in done:
+            record = done.pop(next_to_write)
+            next_to_write += 1
+            if record is not None:
+                sink.write(record)
+
+    async def worker(pool: BrowserPool | None, slot: int) -> None:
+        while True:
+            try:
+                i, name, unit_id, year = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            done[i] = await run_pair(pool, slot, name, unit_id, year)
+            flush_ready()
+
+    async def run_pair(pool: BrowserPool | None, slot: int, name: Any, unit_id: Any, year: int) -> dict[str, Any] | None:
+        fields = {"institution": name, "unit_id": unit_id, "year": year}
+        crashes = 0
+        while True:
+            # Taken before pages() too, so a browser lost while opening them counts as a crash.
+            generation = 0 if pool is None else pool.generation
+            start = time.perf_counter()
+            pages: list[Any] = []
+            try:
+                pages = [None] if pool is None else await pool.pages(slot, pages_per_slot)
+                generation = 0 if pool is None else pool.generation
+                logger.info(f"[bold]{name}[/bold] Year: {year}", extra=fields)
+                with span(metrics, "pair", year=year):
+                    record = await crawl_pair(pages, name, unit_id, year, logger, goto, negative, metrics)
+                logger.info(
+                    f"{name} {year} done",
+                    extra={**fields, "duration_s": round(time.perf_counter() - start, 3), "file_only": True},
+                )
+                return record
+            except Exception as e:
+                if pool is not None and pool.lost_since(generation) and crashes < MAX_CRASH_RETRIES:
+                    # Chromium went away under this pair: run it again, in place so later
+                    # records are not held back waiting for it, on the relaunched browser.
+                    crashes += 1
+                    continue
+                reason = f" (browser lost {crashes + 1} times)" if crashes else ""
+                logger.error(
+                    f"[red][ERROR][/red] {name} {year}: {e}{reason}",
+                    exc_info=True,
+                    extra={**fields, "duration_s": round(time.perf_counter() - start, 3)},
+                )
+                return None
+            finally:
+                if pool is not None and pages:
+                    pool.record(slot, len(SURVEYS))
+
+    # Replaced every time a job worker finishes a pair, which may have put failed or
+    # browser-lost tasks back in the queue; idle workers wait on it instead of polling blind.
+    pair_done = asyncio.Event()
+
+    async def job_worker(pool: BrowserPool | None, slot: int) -> None:
+        nonlocal pair_done
+        while True:
+            wake = pair_done
+            tasks = await jobs.aclaim()
+            if not tasks:
+                open_tasks, expiry = await jobs.aidle()
+                if not open_tasks:
+                    return
+                # Leased elsewhere (or by our own workers): wait for a local pair to finish, the
+                # earliest lease to expire, or the next poll for tasks other processes gave back.
+                timeout = JOB_POLL_S if expiry is None else min(JOB_POLL_S, max(expiry, 0.05))
+                with suppress(asyncio.TimeoutError):
+                    await asyncio.wait_for(wake.wait(), timeout)
+                continue
+            head = tasks[0]
+            logger.info(
+                f"[bold]{head.name}[/bold] Year: {head.year}",
+                extra={"institution": head.name, "unit_id": head.unit_id, "year": head.year},
+            )
+            generation = 0 if pool is None else pool.generation
+            try:
+                pages: list[Any] = [None] if pool is None else await pool.pages(slot, pages_per_slot)
+            except Exception as e:
+                # No pages to run the tasks on: back to the queue if Chromium went away, else failed.
+                browser_lost = pool is not None and pool.lost_since(generation)
+                if not browser_lost:
+                    logger.error(
+                        f"[red][ERROR][/red] {head.name} {head.year}: {e}",
+                        exc_info=True,
+                        extra={"institution": head.name, "unit_id": head.unit_id, "year": head.year},
                     )
-
-                    # ---------------------------
-                    # STUDENT FINANCIAL AID (Survey 7)
-                    # ---------------------------
-                    frame = await goto_reported_data(page, unit_id, 7, year)
-                    if year == 2023:
-                        table_selector = "table.sc.survey-t"
-                    else:
-                        table_selector = "table.sc.survey-t" if 2020 <= year < 2023 else "table.sc"
-
-                    table_found = await wait_for_all(frame, table_selector)
-                    if table_found:
-                        if year > 2019:
-                            func = get_box_data
-                        else:
-                            func = get_text_data
-
-                        temp_text = (
-                            "Grant or scholarship aid from the federal government, state/local government, "
-                            "the institution, and other sources known to the institution"
-                        )
-                        all_grant_scholarship = await func(
-                            frame,
-                            temp_text,
-                            year,
-                            table_selector=table_selector,
-                            value_selector="td.sc-tb-r.t-c-t input.sc-tbn"
-                            if year >= 2022
-                            else ("td.sc-tb-r.t-co input.sc-tbn" if 2020 <= year < 2022 else "td.sc-tb-l span"),
-                        )
-                        num_awarded_aid, total_amount_awarded_aid = (
-                            all_grant_scholarship if isinstance(all_grant_scholarship, list) else [None, None]
-                        )
-
-                        all_grant_scholarship_txt = await get_text_data(
-                            frame,
-                            temp_text,
-                            year,
-                            table_selector=table_selector,
-                            value_selector="td.sc-tb-r.t-c-t span"
-                            if year >= 2022
-                            else ("td.sc-tb-r.t-co span" if 2020 <= year < 2022 else "td.sc-s.sc-tb-l"),
-                        )
-                        all_grant_scholarship_txt = (
-                            all_grant_scholarship_txt[0:2]
-                            if isinstance(all_grant_scholarship_txt, list)
-                            else [None, None]
-                        )
-                        pct_awarded_aid, avg_amount_awarded_aid = all_grant_scholarship_txt
-
-                        federal_pell_grant_box = await func(
-                            frame,
-                            "Pell Grants",
-                            year,
-                            table_selector=table_selector,
-                            value_selector="td.sc-tb-r.t-c-t input.sc-tbn"
-                            if year >= 2022
-                            else ("td.sc-tb-r.t-co input.sc-tbn" if 2020 <= year < 2022 else "td.sc-tb-l span"),
-                        )
-                        num_awarded_pell_grant, total_amount_awarded_pell_grant = (
-                            federal_pell_grant_box if isinstance(federal_pell_grant_box, list) else [None, None]
-                        )
-
-                        federal_pell_grant_txt = await get_text_data(
-                            frame,
-                            "Pell Grants",
-                            year,
-                            table_selector=table_selector,
-                            value_selector="td.sc-tb-r.t-c-t span"
-                            if year >= 2022
-                            else ("td.sc-tb-r.t-co span" if 2020 <= year < 2022 else "td.sc-s.sc-tb-l"),
-                        )
-                        federal_pell_grant_txt = (
-                            federal_pell_grant_txt[0:2]
-                            if isinstance(federal_pell_grant_txt, list)
-                            else [None, None]
-                        )
-                        pct_awarded_pell_grant, avg_amount_awarded_pell_grant = federal_pell_grant_txt
-                    else:
-                        logger.warning(f"[yellow][WARN][/yellow] Financial aid table not found for {year}")
-                        (
-                            num_awarded_aid,
-                            total_amount_awarded_aid,
-                            pct_awarded_aid,
-                            avg_amount_awarded_aid,
-                            num_awarded_pell_grant,
-                            total_amount_awarded_pell_grant,
-                            pct_awarded_pell_grant,
-                            avg_amount_awarded_pell_grant,
-                        ) = (None, None, None, None, None, None, None, None)
-
-                    financial_aid_data = {
-                        "num_awarded_aid": num_awarded_aid,
-                        "total_amount_awarded_aid": total_amount_awarded_aid,
-                        "pct_awarded_aid": pct_awarded_aid,
-                        "avg_amount_awarded_aid": avg_amount_awarded_aid,
-                        "num_awarded_pell_grant": num_awarded_pell_grant,
-                        "total_amount_awarded_pell_grant": total_amount_awarded_pell_grant,
-                        "pct_awarded_pell_grant": pct_awarded_pell_grant,
-                        "avg_amount_awarded_pell_grant": avg_amount_awarded_pell_grant,
-                    }
-
-                    # ---------------------------
-                    # FINANCE (Survey 6)
-                    # ---------------------------
-                    frame = await goto_reported_data(page, unit_id, 6, year)
-                    table_selector = "table.sc.survey-t" if year == 2023 else "table.grid"
-                    table_found = await wait_for_all(frame, table_selector)
-
-                    if table_found:
-                        # sequentially (no concurrency) to stay close to your script
-                        tuition_revenue_per_fte = await get_text_data(frame, "Tuition and fees", year)
-                        gov_grants_revenue_per_fte = await get_text_data(
-                            frame, "Government grants and contracts", year
-                        )
-                        private_revenue_per_fte = await get_text_data(
-                            frame, "Private gifts, grants, and contracts", year
-                        )
-                        total_core_revenue_per_fte = await get_text_data(
-                            frame, "Total core revenues", year
-                        )
-                        instruction_expense_per_fte = await get_text_data(frame, "Instruction", year)
-                        academic_support_expense_per_fte = await get_text_data(
-                            frame, "Academic support", year
-                        )
-                        student_services_expense_per_fte = await get_text_data(
-                            frame, "Student services", year
-                        )
-                        total_core_expense_per_fte = await get_text_data(
-                            frame, "Total core expenses", year
-                        )
-                        num_fte_enrollment = await get_text_data(frame, "FTE enrollment", year)
-
-                        def take_last(x):
-                            if isinstance(x, list) and x:
-                                return x[-1]
-                            return x
-
-                        tuition_revenue_per_fte = take_last(tuition_revenue_per_fte)
-                        gov_grants_revenue_per_fte = take_last(gov_grants_revenue_per_fte)
-                        private_revenue_per_fte = take_last(private_revenue_per_fte)
-                        total_core_revenue_per_fte = take_last(total_core_revenue_per_fte)
-                        instruction_expense_per_fte = take_last(instruction_expense_per_fte)
-                        academic_support_expense_per_fte = take_last(academic_support_expense_per_fte)
-                        student_services_expense_per_fte = take_last(student_services_expense_per_fte)
-                        total_core_expense_per_fte = take_last(total_core_expense_per_fte)
-                        num_fte_enrollment = take_last(num_fte_enrollment)
-                    else:
-                        logger.warning(f"[yellow][WARN][/yellow] finance table not found for {year}")
-                        tuition_revenue_per_fte = None
-                        gov_grants_revenue_per_fte = None
-                        private_revenue_per_fte = None
-                        total_core_revenue_per_fte = None
-                        instruction_expense_per_fte = None
-                        academic_support_expense_per_fte = None
-                        student_services_expense_per_fte = None
-                        total_core_expense_per_fte = None
-                        num_fte_enrollment = None
-
-                    financial_data = {
-                        "tuition_revenue_per_fte": tuition_revenue_per_fte,
-                        "gov_grants_revenue_per_fte": gov_grants_revenue_per_fte,
-                        "private_revenue_per_fte": private_revenue_per_fte,
-                        "total_core_revenue_per_fte": total_core_revenue_per_fte,
-                        "instruction_expense_per_fte": instruction_expense_per_fte,
-                        "academic_support_expense_per_fte": academic_support_expense_per_fte,
-                        "student_services_expense_per_fte": student_services_expense_per_fte,
-                        "total_core_expense_per_fte": total_core_expense_per_fte,
-                        "num_fte_enrollment": num_fte_enrollment,
-                    }
-
-                    # ---------------------------
-                    # HUMAN RESOURCE (Survey 9)
-                    # ---------------------------
-                    frame = await goto_reported_data(page, unit_id, 9, year)
-                    table_selector = "table.sc.survey-t" if year == 2023 else "table.grid"
-                    table_found = await wait_for_all(frame, table_selector)
-
-                    if table_found:
-                        instruct_staff = await get_text_data(frame, "Instructional Staff", year)
-                        instruct_staff = instruct_staff[-1] if instruct_staff else instruct_staff
-
-                        academic_affairs = await get_text_data(
-                            frame, "Library and Student and Academic Affairs and Other Education Services Occupations SOC", year
-                        )
-                        academic_affairs = academic_affairs[-1] if academic_affairs else academic_affairs
-
-                        it_occupation = await get_text_data(
-                            frame, "Computer, Engineering, and Science Occupations", year
-                        )
-                        it_occupation = it_occupation[-1] if len(it_occupation) == 3 else it_occupation[-3]
-
-                        management_occupation = await get_text_data(frame, "Management Occupations", year)
-                        if management_occupation:
-                            management_occupation = (
-                                management_occupation[-1]
-                                if len(management_occupation) == 3
-                                else management_occupation[-3]
-                            )
-                    else:
-                        logger.warning(f"[yellow][WARN][/yellow] Human resource page not found for {year}")
-                        instruct_staff = []
-                        academic_affairs = []
-                        it_occupation = []
-                        management_occupation = []
-
-                    human_resource_data = build_labeled_dict(
-                        ("instructional", "num_fte", instruct_staff, None, "first"),
-                        ("academic_affairs", "num_fte", academic_affairs, None, "first"),
-                        ("it_occupation", "num_fte", it_occupation, None, "first"),
-                        ("management_occupation", "num_fte", management_occupation, None, "first"),
+                for task in tasks:
+                    await (jobs.arelease(task) if browser_lost else jobs.afail(task, e))
+            else:
+                lost = None if pool is None else partial(pool.lost_since, pool.generation)
+                n = min(len(pages), len(tasks))
+                await asyncio.gather(
+                    *(
+                        _run_tasks(page, tasks[i::n], jobs, logger, goto, negative, metrics, lost)
+                        for i, page in enumerate(pages[:n])
                     )
-
-                    # ---------------------------
-                    # ACADEMIC LIBRARY (Survey 16)
-                    # ---------------------------
-                    frame = await goto_reported_data(page, unit_id, 16, year)
-                    table_selector = "table.sc.survey-t" if year == 2023 else "table.grid"
-                    table_found = await wait_for_all(frame, table_selector)
-
-                    if table_found:
-                        library_circulation = await get_text_data(frame, "Circulation", year)
-                        if library_circulation and isinstance(library_circulation, list):
-                            physical_item_circulation, digital_item_circulation = library_circulation
-                        elif isinstance(library_circulation, int):
-                            physical_item_circulation, digital_item_circulation = None, library_circulation
-                        else:
-                            physical_item_circulation, digital_item_circulation = None, None
-                    else:
-                        logger.warning(f"[yellow][WARN][/yellow] Library page not found for {year}")
-                        physical_item_circulation, digital_item_circulation = None, None
-
-                    library_data = {
-                        "physical_item_circulation": physical_item_circulation,
-                        "digital_item_circulation": digital_item_circulation,
-                    }
-
-                    # ---------------------------
-                    # Merge & write one record
-                    # ---------------------------
-                    merged_dict: dict[str, Any] = {
-                        **pricing_data,
-                        **admission_data,
-                        **enrol_data,
-                        **completions_data,
-                        **graduation_data,
-                        **financial_aid_data,
-                        **financial_data,
-                        **human_resource_data,
-                        **library_data,
-                    }
-                    merged_dict["year"] = year
-                    merged_dict["institution"] = name
-
-                    pd.DataFrame([merged_dict]).to_csv(
-                        output_path, mode="a", header=not os.path.exists(output_path), index=False
-                    )
-
-                except Exception as e:
-                    logger.error(f"[red][ERROR][/red] {name} {year}: {e}")
-                    traceback.print_exc()
+                )
+                if pool is not None:
+                    pool.record(slot, len(tasks))
+                record = await jobs.atake_record(head.unit_id, head.year, SURVEYS)
+                if record is not None:
+                    sink.write(record)
+            pair_done.set()
+            pair_done = asyncio.Event()
+
+    sink.open()
+    try:
+        for record in recovered:
+            sink.write(record)
+        async with pool_cm as pool:
+            await asyncio.gather(*((worker if jobs is None else job_worker)(pool, slot) for slot in range(size)))
+            if pool is not None:
+                logger.info(pool.stats())
+    finally:
+        await asyncio.to_thread(sink.close)
+    logger.info(sink.stats())
+
+    if cache is not None:
+        logger.info(cache.stats())
+    if http is not None:
+        logger.info(http.stats())
+    if negative is not None:
+        logger.info(negative.stats())
+    if retry is not None:
+        logger.info(retry.stats())
+    if limiter is not None:
+        logger.info(limiter.stats())
+    if navigator is not None and not offline:
+        logger.info(navigator.stats())
+    if jobs is not None:
+        logger.info(jobs.stats())
+    if metrics is not None:
+        logger.info(metrics.stats())
+
+
+async def crawl_pair(
+    pages: Sequence[Page],
+    name: str,
+    unit_id: Any,
+    year: int,
+    logger: logging.Logger,
+    goto: Goto = goto_reported_data,
+    negative: NegativeCache | None = None,
+    metrics: Metrics | None = None,
+) -> dict[str, Any]:
+    """Crawl every survey for one pair; with several pages the surveys are spread across them and run concurrently."""
+    n = len(pages)
+    results = await asyncio.gather(
+        *(
+            _crawl_surveys(page, SURVEYS[i::n], unit_id, year, logger, goto, negative, metrics)
+            for i, page in enumerate(pages)
+        ),
+        return_exceptions=True,
+    )
+    parts: dict[int, dict[str, Any]] = {}
+    for result in results:
+        if isinstance(result, BaseException):
+            raise result
+        parts.update(result)
+
+    # ---------------------------
+    # Merge into one record
+    # ---------------------------
+    merged_dict: dict[str, Any] = {}
+    for survey_num in SURVEYS:
+        merged_dict.update(parts[survey_num])
+    merged_dict["year"] = year
+    merged_dict["institution"] = name
+    merged_dict["unit_id"] = str(unit_id)
+    return merged_dict
+
+
+async def _crawl_surveys(
+    page: Page,
+    surveys: Sequence[int],
+    unit_id: Any,
+    year: int,
+    logger: logging.Logger,
+    goto: Goto,
+    negative: NegativeCache | None = None,
+    metrics: Metrics | None = None,
+) -> dict[int, dict[str, Any]]:
+    parts: dict[int, dict[str, Any]] = {}
+    for survey_num in surveys:
+        plan = compile_plan(survey_num, year)
+        if negative is not None and negative.is_empty(unit_id, survey_num, year, plan.version):
+            parts[survey_num] = plan.build(plan.missing())
+            if metrics is not None:
+                metrics.inc("pages_total", survey=survey_num, layout=layout(year), status="skipped")
+            continue
+        with span(metrics, "navigate", survey_num, year):
+            frame = await goto(page, unit_id, survey_num, year)
+        status, parts[survey_num] = await extract_survey(frame, plan, logger, metrics)
+        if status == NO_DATA and negative is not None:
+            negative.mark_empty(unit_id, survey_num, year, plan.version)
+    return parts
+
+
+async def _run_tasks(
+    page: Page,
+    tasks: Sequence[Task],
+    jobs: JobStore,
+    logger: logging.Logger,
+    goto: Goto,
+    negative: NegativeCache | None = None,
+    metrics: Metrics | None = None,
+    browser_lost: Callable[[], bool] | None = None,
+) -> None:
+    for task in tasks:
+        try:
+            parts = await _crawl_surveys(
+                page, [task.survey], task.unit_id, task.year, logger, goto, negative, metrics
+            )
+        except Exception as e:
+            if browser_lost is not None and browser_lost():
+                # Not (at first) the task's fault: back to the queue, see JobStore.release.
+                await jobs.arelease(task)
+                continue
+            logger.error(
+                f"[red][ERROR][/red] {task.name} {task.year} survey {task.survey}: {e}",
+                extra={"institution": task.name, "unit_id": task.unit_id, "year": task.year, "survey": task.survey},
+            )
+            await jobs.afail(task, e)
+        else:
+            await jobs.acomplete(task, parts[task.survey])
+
+
+async def extract_survey(
+    frame: Node, plan: Plan, logger: logging.Logger, metrics: Metrics | None = None
+) -> tuple[str, dict[str, Any]]:
+    with span(metrics, "wait", plan.survey, plan.year):
+        status = await table_status(frame, plan.wait)
+    if metrics is not None:
+        metrics.inc("pages_total", survey=plan.survey, layout=layout(plan.year), status=status)
+    if status == TABLE_FOUND:
+        with span(metrics, "snapshot", plan.survey, plan.year):
+            snap = await snapshot_tables(frame, plan.year, plan.selectors)
+        with span(metrics, "extract", plan.survey, plan.year):
+            values = plan.extract(snap)
+    else:
+        reason = " (no data reported)" if status == NO_DATA else ""
+        logger.warning(
+            f"[yellow][WARN][/yellow] {plan.missing_message}{reason}", extra={"survey": plan.survey, "year": plan.year}
+        )
+        values = plan.missing()
+    return status, plan.build(values)
+
+
+# Relaunches of Chromium one pair may go through before it is given up on; a page
+# that crashes the browser every time would otherwise be retried forever.
+MAX_CRASH_RETRIES = 2
+
+# Longest an idle job worker waits before looking for tasks another process gave back.
+JOB_POLL_S = 1.0
+
+# Survey numbers in the column order of the merged record.
+SURVEYS: list[int] = list(REGISTRY)
@@ -0,0 +1,215 @@
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import cProfile
+import csv
+import io
+import json
+import logging
+import pstats
+import re
+import statistics
+import time
+from collections import defaultdict
+from collections.abc import Awaitable
+from pathlib import Path
+from typing import Any, TypeVar
+
+T = TypeVar("T")
+
+logger = logging.getLogger("ipeds_crawler")
+
+# asyncio debug mode logs "Executing <handle> took 0.123 seconds" for slow callbacks.
+_SLOW = re.compile(r"Executing (?P<handle>.*) took (?P<seconds>[\d.]+) seconds", re.S)
+_TASK = re.compile(r"<Task \w+ name='(?P<name>[^']+)'")
+
+
+class LoopLagMonitor:
+    """Sleeps `interval_s` in a loop and records how late each wake-up is.
+
+    Lag is time the loop spent running other callbacks (CPU work on the loop thread)
+    instead of servicing timers and I/O.
+    """
+
+    def __init__(self, interval_s: float = 0.1) -> None:
+        self.interval_s = interval_s
+        self.samples: list[tuple[float, float]] = []
+        self._task: asyncio.Task[None] | None = None
+
+    def start(self) -> None:
+        self._task = asyncio.get_running_loop().create_task(self._run(), name="loop-lag-monitor")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        while True:
+            before = loop.time()
+            await asyncio.sleep(self.interval_s)
+            now = loop.time()
+            self.samples.append((now - start, max(0.0, now - before - self.interval_s)))
+
+    def summary(self) -> dict[str, Any]:
+        lags = sorted(lag for _, lag in self.samples)
+        if not lags:
+            return {"samples": 0}
+        return {
+            "samples": len(lags),
+            "p50_ms": round(statistics.median(lags) * 1000, 2),
+            "p99_ms": round(lags[min(len(lags) - 1, int(len(lags) * 0.99))] * 1000, 2),
+            "max_ms": round(lags[-1] * 1000, 2),
+            "over_100ms": sum(lag > 0.1 for lag in lags),
+        }
+
+
+class SlowCallbackCollector(logging.Handler):
+    """Collects asyncio's slow-callback warnings, grouped by where the slow step ended.
+
+    The warning is logged right after the step, while its task is still suspended at the
+    await that ended it, so the task's innermost frames point at the code that blocked.
+    """
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, depth: int = 3) -> None:
+        super().__init__(logging.WARNING)
+        self.loop = loop
+        self.depth = depth
+        self.durations: dict[str, list[float]] = defaultdict(list)
+
+    def emit(self, record: logging.LogRecord) -> None:
+        match = _SLOW.search(record.getMessage())
+        if match is None:
+            return
+        self.durations[self._where(match["handle"])].append(float(match["seconds"]))
+
+    def _where(self, handle: str) -> str:
+        task = _TASK.match(handle)
+        if task is not None:
+            for t in asyncio.all_tasks(self.loop):
+                if t.get_name() == task["name"]:
+                    frames = _await_chain(t.get_coro())[-self.depth :]
+                    return " <- ".join(
+                        f"{f.f_code.co_name} ({Path(f.f_code.co_filename).name}:{f.f_lineno})" for f in reversed(frames)
+                    )
+        return handle[:200]
+
+    def top(self, n: int = 20) -> list[dict[str, Any]]:
+        rows = [
+            {"callback": key, "count": len(d), "total_s": round(sum(d), 3), "max_s": round(max(d), 3)}
+            for key, d in self.durations.items()
+        ]
+        rows.sort(key=lambda r: r["total_s"], reverse=True)
+        return rows[:n]
+
+
+def _await_chain(coro: Any) -> list[Any]:
+    """Frames from the task's coroutine down to the innermost one it is awaiting."""
+    frames = []
+    while coro is not None:
+        frame = getattr(coro, "cr_frame", None) or getattr(coro, "gi_frame", None)
+        if frame is None:
+            break
+        frames.append(frame)
+        coro = getattr(coro, "cr_await", None) or getattr(coro, "gi_yieldfrom", None)
+    return frames
+
+
+async def run_profiled(
+    coro: Awaitable[T],
+    directory: str | Path,
+    suffix: str = "",
+    slow_callback_s: float = 0.05,
+    lag_interval_s: float = 0.1,
+) -> T:
+    """Await `coro` under cProfile, a loop-lag monitor and asyncio's slow-callback detection.
+
+    Writes to `directory`: profile.pstats (open with pstats or snakeviz), profile.txt
+    (top functions), loop_lag.csv (lag over time) and profile.json (wall vs CPU time,
+    lag percentiles, the callbacks that blocked the loop longest). cProfile only sees
+    the event-loop thread; sink writer threads show up as wall time without CPU samples.
+    """
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    loop = asyncio.get_running_loop()
+    debug = loop.get_debug()
+    loop.set_debug(True)
+    loop.slow_callback_duration = slow_callback_s
+
+    asyncio_logger = logging.getLogger("asyncio")
+    collector = SlowCallbackCollector(loop)
+    saved = asyncio_logger.propagate, asyncio_logger.level
+    asyncio_logger.addHandler(collector)
+    # Collected into the report instead of the console.
+    asyncio_logger.propagate = False
+    asyncio_logger.setLevel(logging.WARNING)
+
+    monitor = LoopLagMonitor(lag_interval_s)
+    monitor.start()
+    profiler = cProfile.Profile()
+    wall, cpu = time.perf_counter(), time.process_time()
+    profiler.enable()
+    try:
+        # Its own task, so slow steps of the top-level coroutine are attributed like any other.
+        return await asyncio.ensure_future(coro)
+    finally:
+        profiler.disable()
+        wall, cpu = time.perf_counter() - wall, time.process_time() - cpu
+        await monitor.stop()
+        asyncio_logger.removeHandler(collector)
+        asyncio_logger.propagate, level = saved
+        asyncio_logger.setLevel(level)
+        loop.set_debug(debug)
+        _write_reports(directory, suffix, profiler, monitor, collector, wall, cpu)
+
+
+def _write_reports(
+    directory: Path,
+    suffix: str,
+    profiler: cProfile.Profile,
+    monitor: LoopLagMonitor,
+    collector: SlowCallbackCollector,
+    wall: float,
+    cpu: float,
+) -> None:
+    profiler.dump_stats(directory / f"profile{suffix}.pstats")
+    text = io.StringIO()
+    stats = pstats.Stats(profiler, stream=text)
+    stats.sort_stats("cumulative").print_stats(40)
+    stats.sort_stats("tottime").print_stats(40)
+    (directory / f"profile{suffix}.txt").write_text(text.getvalue(), encoding="utf-8")
+
+    with open(directory / f"loop_lag{suffix}.csv", "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f, lineterminator="\n")
+        writer.writerow(["elapsed_s", "lag_ms"])
+        writer.writerows((round(t, 3), round(lag * 1000, 3)) for t, lag in monitor.samples)
+
+    top_functions = sorted(stats.stats.items(), key=lambda kv: kv[1][2], reverse=True)[:25]  # type: ignore[attr-defined]
+    summary = {
+        "wall_s": round(wall, 3),
+        "cpu_s": round(cpu, 3),
+        # Near 1: CPU-bound in this process; near 0: waiting on Chromium/network.
+        "cpu_share": round(cpu / wall, 3) if wall else None,
+        "loop_lag": monitor.summary(),
+        "slow_callbacks": collector.top(),
+        "top_functions": [
+            {
+                "function": f"{Path(file).name}:{line}({name})",
+                "ncalls": nc,
+                "tottime_s": round(tt, 4),
+                "cumtime_s": round(ct, 4),
+            }
+            for (file, line, name), (_, nc, tt, ct, _) in top_functions
+        ],
+    }
+    (directory / f"profile{suffix}.json").write_text(json.dumps(summary, indent=2) + "\n", encoding="utf-8")
+    lag = summary["loop_lag"]
+    logger.info(
+        f"Profile written to {directory}: {wall:.1f}s wall, {cpu:.1f}s CPU ({summary['cpu_share']:.0%}), "
+        f"loop lag p99 {lag.get('p99_ms', 0)} ms, max {lag.get('max_ms', 0)} ms"
+    )
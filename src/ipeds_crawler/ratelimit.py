@@ -0,0 +1,91 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+
+logger = logging.getLogger("ipeds_crawler")
+
+# Responses that mean "slow down" rather than "this page is broken".
+THROTTLE_STATUSES = frozenset({0, 429, 503})
+
+
+class AdaptiveRateLimiter:
+    """Token bucket shared by every worker, with an AIMD-controlled refill rate.
+
+    Each fast, successful response adds `increase` requests/s to the rate (up to
+    `max_rps`); a 429/503, a transport error or a response slower than
+    `target_latency_s` multiplies it by `decrease` (down to `min_rps`). Decreases are
+    applied at most once per `cooldown_s`, so a burst of in-flight requests failing
+    together only counts as one congestion signal.
+    """
+
+    def __init__(
+        self,
+        initial_rps: float = 2.0,
+        min_rps: float = 0.2,
+        max_rps: float = 8.0,
+        target_latency_s: float = 3.0,
+        increase: float = 0.1,
+        decrease: float = 0.5,
+        burst: float = 2.0,
+        cooldown_s: float = 2.0,
+    ) -> None:
+        self.min_rps = min_rps
+        self.max_rps = max_rps
+        self.rate = min(max(initial_rps, min_rps), max_rps)
+        self.target_latency_s = target_latency_s
+        self.increase = increase
+        self.decrease = decrease
+        self.burst = burst
+        self.cooldown_s = cooldown_s
+        self.requests = 0
+        self.throttled = 0
+        self.decreases = 0
+        self.peak_rps = self.rate
+        self._tokens = burst
+        self._updated = time.monotonic()
+        self._last_decrease = 0.0
+        self._lock = asyncio.Lock()
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self) -> None:
+        # The lock makes waiters queue up FIFO instead of all waking on the same token.
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._refill(now)
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    self.requests += 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+    def record(self, latency_s: float, status: int) -> None:
+        """Feed back one response; `status` 0 stands for a timeout or transport error."""
+        if status in THROTTLE_STATUSES or latency_s > self.target_latency_s:
+            if status in THROTTLE_STATUSES:
+                self.throttled += 1
+            now = time.monotonic()
+            if now - self._last_decrease >= self.cooldown_s:
+                self._last_decrease = now
+                self._set_rate(self.rate * self.decrease)
+                self.decreases += 1
+                logger.debug(f"rate limit lowered to {self.rate:.2f} req/s (status {status}, {latency_s:.1f}s)")
+        else:
+            self._set_rate(self.rate + self.increase)
+
+    def _set_rate(self, rate: float) -> None:
+        now = time.monotonic()
+        self._refill(now)
+        self.rate = min(max(rate, self.min_rps), self.max_rps)
+        self.peak_rps = max(self.peak_rps, self.rate)
+
+    def stats(self) -> str:
+        return (
+            f"rate limiter: {self.requests} requests, now {self.rate:.2f} req/s (peak {self.peak_rps:.2f}), "
+            f"{self.throttled} throttled responses, {self.decreases} slowdowns"
+        )
@@ -0,0 +1,65 @@
+from __future__ import annotations
+
+import os
+from typing import Any
+
+import pandas as pd
+
+KEY_COLUMNS = ["unit_id", "institution", "year"]
+
+# A finished pair: ("unit_id", UNITID, year), or ("institution", INSTNM, year) for rows
+# written before records carried their unit_id. INSTNM is not unique (chain campuses).
+Pair = tuple[str, str, int]
+
+
+def _present(value: Any) -> bool:
+    return value is not None and value == value and value != ""
+
+
+def pair_key(record: dict[str, Any]) -> Pair:
+    """Key of an output record; by unit_id where it has one."""
+    unit_id = record.get("unit_id")
+    if _present(unit_id):
+        return ("unit_id", str(unit_id), int(record["year"]))
+    return ("institution", str(record.get("institution")), int(record["year"]))
+
+
+def pair_keys(frame: pd.DataFrame) -> set[Pair]:
+    """Keys of the rows of a frame with the institution and year (and possibly unit_id) columns."""
+    frame = frame.dropna(subset=["year"])
+    unit_ids = frame["unit_id"] if "unit_id" in frame else pd.Series(None, index=frame.index, dtype="object")
+    return {
+        pair_key({"unit_id": u, "institution": n, "year": y})
+        for u, n, y in zip(unit_ids, frame["institution"], frame["year"].astype(int), strict=True)
+        if _present(u) or _present(n)
+    }
+
+
+def is_done(done: set[Pair], name: Any, unit_id: Any, year: int) -> bool:
+    """Whether the pair is in `done`: by unit_id, or by name for outputs from before unit_id was written."""
+    year = int(year)
+    return ("unit_id", str(unit_id), year) in done or ("institution", str(name), year) in done
+
+
+def completed_pairs(output_path: str, chunksize: int = 200_000) -> set[Pair]:
+    """Pairs already present in the output, read in chunks of the key columns only."""
+    if not os.path.exists(output_path) or os.path.getsize(output_path) == 0:
+        return set()
+
+    done: set[Pair] = set()
+    for chunk in pd.read_csv(
+        output_path,
+        usecols=lambda c: c in KEY_COLUMNS,
+        dtype={"institution": str, "unit_id": str},
+        chunksize=chunksize,
+    ):
+        done.update(pair_keys(chunk))
+    return done
+
+
+def pending_work(work: list[tuple[Any, Any, int]], done: set[Pair]) -> tuple[list[tuple[Any, Any, int]], int]:
+    """Drop (name, unit_id, year) items whose pair is in `done`; returns (pending, skipped)."""
+    if not done:
+        return work, 0
+    pending = [item for item in work if not is_done(done, *item)]
+    return pending, len(work) - len(pending)
@@ -1,26 +1,276 @@
+from __future__ import annotations
+
 import asyncio
+import logging
+import random
+import time
+from collections import deque
+from collections.abc import Awaitable, Callable, Coroutine
+from dataclasses import dataclass, field
 from functools import wraps
-from typing import Callable, Any, Coroutine
+from typing import Any
+
+from playwright.async_api import Error as PlaywrightError, TimeoutError as PlaywrightTimeoutError
+
+logger = logging.getLogger("ipeds_crawler")
+
+# ---------------------------
+# Error classification
+# ---------------------------
+TIMEOUT = "timeout"
+NAVIGATION = "navigation"
+SELECTOR = "selector"
+HTTP_429 = "http_429"
+HTTP_5XX = "http_5xx"
+HTTP_4XX = "http_4xx"
+OTHER = "other"
+
+# Kinds that say the site itself is struggling; these feed the circuit breaker.
+UPSTREAM_FAILURES = frozenset({TIMEOUT, NAVIGATION, HTTP_429, HTTP_5XX})
+
+_NAVIGATION_MARKERS = ("net::ERR_", "NS_ERROR_", "Navigation", "navigation", "Target closed", "context was destroyed")
+
+
+class HttpStatusError(Exception):
+    def __init__(self, status: int, url: str = "") -> None:
+        super().__init__(f"HTTP {status} for {url}" if url else f"HTTP {status}")
+        self.status = status
+        self.url = url
+
+
+class SelectorNotFound(RuntimeError):
+    pass
+
+
+def classify(exc: BaseException) -> str:
+    if isinstance(exc, HttpStatusError):
+        if exc.status == 429:
+            return HTTP_429
+        return HTTP_5XX if exc.status >= 500 else HTTP_4XX
+    if isinstance(exc, (PlaywrightTimeoutError, asyncio.TimeoutError, TimeoutError)):
+        return TIMEOUT
+    if isinstance(exc, (SelectorNotFound, LookupError)):
+        return SELECTOR
+    if type(exc).__module__.startswith("httpx"):
+        return TIMEOUT if "Timeout" in type(exc).__name__ else NAVIGATION
+    if isinstance(exc, (PlaywrightError, ConnectionError)):
+        msg = str(exc)
+        if isinstance(exc, ConnectionError) or any(m in msg for m in _NAVIGATION_MARKERS):
+            return NAVIGATION
+    return OTHER
+
+
+def classify_status(status: int) -> str | None:
+    """Kind for an HTTP status code, or None when the response is a success (or 0 for a transport error)."""
+    if status == 0:
+        return NAVIGATION
+    if status == 429:
+        return HTTP_429
+    if status >= 500:
+        return HTTP_5XX
+    return None
+
+
+# ---------------------------
+# Policy, budget, breaker
+# ---------------------------
+@dataclass(frozen=True)
+class RetryPolicy:
+    """Which error kinds are retried and how long to back off (full jitter)."""
+
+    attempts: int = 3
+    base_delay: float = 1.0
+    backoff: float = 2.0
+    max_delay: float = 30.0
+    retry_on: frozenset[str] = frozenset({TIMEOUT, NAVIGATION, HTTP_429, HTTP_5XX})
+    base_delay_for: dict[str, float] = field(default_factory=lambda: {HTTP_429: 5.0})
+
+    def retryable(self, kind: str) -> bool:
+        return kind in self.retry_on
+
+    def delay(self, kind: str, attempt: int) -> float:
+        base = self.base_delay_for.get(kind, self.base_delay)
+        return random.uniform(0, min(self.max_delay, base * self.backoff ** (attempt - 1)))
+
+
+class RetryBudget:
+    """Caps retries at `ratio` of the calls made in the last `window_s` seconds (plus a small floor)."""
+
+    def __init__(self, ratio: float = 0.2, floor: int = 10, window_s: float = 60.0) -> None:
+        self.ratio = ratio
+        self.floor = floor
+        self.window_s = window_s
+        self.denied = 0
+        self._calls: deque[float] = deque()
+        self._retries: deque[float] = deque()
+
+    def _trim(self, now: float) -> None:
+        for q in (self._calls, self._retries):
+            while q and now - q[0] > self.window_s:
+                q.popleft()
+
+    def record_call(self) -> None:
+        self._calls.append(time.monotonic())
+
+    def try_spend(self) -> bool:
+        now = time.monotonic()
+        self._trim(now)
+        if len(self._retries) >= self.floor + self.ratio * len(self._calls):
+            self.denied += 1
+            return False
+        self._retries.append(now)
+        return True
+
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half-open"
+
+
+class CircuitBreaker:
+    """Per-host breaker: after `threshold` consecutive upstream failures every caller waits
+    out a cooldown, then a single probe decides whether traffic resumes."""
+
+    def __init__(self, host: str, threshold: int = 8, cooldown_s: float = 30.0, max_cooldown_s: float = 300.0) -> None:
+        self.host = host
+        self.threshold = threshold
+        self.base_cooldown_s = cooldown_s
+        self.max_cooldown_s = max_cooldown_s
+        self.state = CLOSED
+        self.trips = 0
+        self._failures = 0
+        self._cooldown_s = cooldown_s
+        self._open_until = 0.0
+        self._probe_started: float | None = None
+
+    async def wait(self) -> None:
+        while True:
+            if self.state == CLOSED:
+                return
+            now = time.monotonic()
+            if self.state == OPEN:
+                if now < self._open_until:
+                    await asyncio.sleep(self._open_until - now)
+                    continue
+                self.state = HALF_OPEN
+                self._probe_started = None
+            # Half-open: one caller probes; a probe that never reports back is replaced after a cooldown.
+            if self._probe_started is None or now - self._probe_started > self._cooldown_s:
+                self._probe_started = now
+                return
+            await asyncio.sleep(0.5)
+
+    def record_success(self) -> None:
+        self._failures = 0
+        if self.state != CLOSED:
+            logger.info(f"[green][OK][/green] {self.host} is responding again; circuit closed")
+            self.state = CLOSED
+            self._cooldown_s = self.base_cooldown_s
+
+    def record_failure(self) -> None:
+        self._failures += 1
+        if self.state == HALF_OPEN:
+            self._cooldown_s = min(self.max_cooldown_s, self._cooldown_s * 2)
+            self._open()
+        elif self.state == CLOSED and self._failures >= self.threshold:
+            self._open()
+
+    def record(self, kind: str | None) -> None:
+        if kind in UPSTREAM_FAILURES:
+            self.record_failure()
+        else:
+            self.record_success()
+
+    def _open(self) -> None:
+        self.state = OPEN
+        self.trips += 1
+        self._open_until = time.monotonic() + self._cooldown_s
+        logger.warning(
+            f"[yellow][WARN][/yellow] {self.host} failing ({self._failures} in a row); "
+            f"pausing requests for {self._cooldown_s:.0f}s"
+        )
+
+
+# ---------------------------
+# Engine
+# ---------------------------
+class Retrier:
+    """Runs calls under a RetryPolicy, a shared RetryBudget and per-host CircuitBreakers."""
+
+    def __init__(
+        self,
+        policy: RetryPolicy | None = None,
+        budget: RetryBudget | None = None,
+        breaker_threshold: int = 8,
+        breaker_cooldown_s: float = 30.0,
+    ) -> None:
+        self.policy = policy or RetryPolicy()
+        self.budget = budget or RetryBudget()
+        self.breaker_threshold = breaker_threshold
+        self.breaker_cooldown_s = breaker_cooldown_s
+        self.retries: dict[str, int] = {}
+        self._breakers: dict[str, CircuitBreaker] = {}
+
+    def breaker(self, host: str) -> CircuitBreaker:
+        if host not in self._breakers:
+            self._breakers[host] = CircuitBreaker(host, self.breaker_threshold, self.breaker_cooldown_s)
+        return self._breakers[host]
+
+    async def call(self, fn: Callable[..., Awaitable[Any]], *args: Any, host: str | None = None, **kwargs: Any) -> Any:
+        breaker = self.breaker(host) if host else None
+        for attempt in range(1, self.policy.attempts + 1):
+            if breaker is not None:
+                await breaker.wait()
+            self.budget.record_call()
+            try:
+                result = await fn(*args, **kwargs)
+            except Exception as e:
+                kind = classify(e)
+                if breaker is not None:
+                    breaker.record(kind)
+                if attempt == self.policy.attempts or not self.policy.retryable(kind) or not self.budget.try_spend():
+                    raise
+                self.retries[kind] = self.retries.get(kind, 0) + 1
+                wait = self.policy.delay(kind, attempt)
+                logger.warning(
+                    f"{getattr(fn, '__name__', 'call')} failed with {kind} "
+                    f"(attempt {attempt}/{self.policy.attempts}), retrying in {wait:.1f}s: {e}"
+                )
+                await asyncio.sleep(wait)
+            else:
+                if breaker is not None:
+                    breaker.record_success()
+                return result
+
+    def stats(self) -> str:
+        by_kind = ", ".join(f"{k}={v}" for k, v in sorted(self.retries.items())) or "none"
+        trips = sum(b.trips for b in self._breakers.values())
+        return f"retries: {by_kind}; {self.budget.denied} denied by budget, {trips} circuit trips"
+
+
+_default = Retrier()
+
 
 def retry_async(retries: int = 3, delay: float = 2.0, backoff: float = 2.0):
     """
     retries: number of total attempts
-    delay: initial delay between attempts (seconds)
-    backoff: multiplier applied to delay after each failure
+    delay: initial delay ceiling between attempts (seconds), full jitter applied
+    backoff: multiplier applied to the ceiling after each failure
+
+    Only transient error kinds are retried, and retries draw on the shared budget.
     """
+    policy = RetryPolicy(attempts=retries, base_delay=delay, backoff=backoff)
+
     def decorator(func: Callable[..., Coroutine[Any, Any, Any]]):
         @wraps(func)
         async def wrapper(*args, **kwargs):
-            current_delay = delay
             for attempt in range(1, retries + 1):
+                _default.budget.record_call()
                 try:
                     return await func(*args, **kwargs)
                 except Exception as e:
-                    if attempt == retries:
+                    kind = classify(e)
+                    if attempt == retries or not policy.retryable(kind) or not _default.budget.try_spend():
                         raise
-                    from ipeds_crawler.logging import logger
-                    logger.warning(f"{func.__name__} failed (attempt {attempt}/{retries}): {e}")
-                    await asyncio.sleep(current_delay)
-                    current_delay *= backoff
+                    logger.warning(f"{func.__name__} failed with {kind} (attempt {attempt}/{retries}): {e}")
+                    await asyncio.sleep(policy.delay(kind, attempt))
         return wrapper
     return decorator
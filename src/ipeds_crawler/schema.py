@@ -0,0 +1,67 @@
+from __future__ import annotations
+
+from functools import cache
+
+import pandas as pd
+
+from .surveys import REGISTRY, compile_plan
+
+# One year per page layout (see extractors.default_selectors).
+LAYOUT_YEARS = (2014, 2021, 2023)
+
+# Output columns not produced by a survey spec.
+KEY_DTYPES = {"year": "int16", "institution": "string", "unit_id": "string"}
+
+# Checked before the count hints: rates, money and FTE figures are fractional.
+_FLOAT_HINTS = ("pct", "percent", "rate", "fte", "amount", "avg_", "tuition", "fee", "expense", "book", "housing")
+# *_1st_major / *_2nd_major are degree counts of the top programs, from the completions table.
+_COUNT_HINTS = ("num_", "_num_", "total_", "enrollment", "applicant", "graduated", "completors", "circulation", "_major")
+
+
+def dtype_for(column: str) -> str:
+    """pandas dtype for an output column, derived from its build_labeled_dict name."""
+    if column in KEY_DTYPES:
+        return KEY_DTYPES[column]
+    if any(h in column for h in _FLOAT_HINTS):
+        return "Float64"
+    if any(h in column for h in _COUNT_HINTS):
+        return "Int64"
+    return "Float64"
+
+
+@cache
+def registry_columns() -> tuple[str, ...]:
+    """Every column the survey registry can emit, in merged-record order."""
+    columns: dict[str, None] = {}
+    for year in LAYOUT_YEARS:
+        for survey in REGISTRY:
+            plan = compile_plan(survey, year)
+            columns.update(dict.fromkeys(plan.build(plan.missing())))
+    columns.update(dict.fromkeys(KEY_DTYPES))
+    return tuple(columns)
+
+
+def column_dtypes(columns: list[str] | tuple[str, ...] | None = None) -> dict[str, str]:
+    return {c: dtype_for(c) for c in (columns or registry_columns())}
+
+
+def coerce_frame(df: pd.DataFrame, dtypes: dict[str, str]) -> tuple[pd.DataFrame, int]:
+    """Cast `df` to `dtypes`; values that do not fit a numeric column become null.
+
+    Returns the cast frame and how many non-null values were dropped that way.
+    """
+    out = {}
+    dropped = 0
+    for column, dtype in dtypes.items():
+        values = df[column] if column in df else pd.Series([None] * len(df), index=df.index, dtype="object")
+        if dtype == "string":
+            cast = values.astype("string")
+        else:
+            numeric = pd.to_numeric(values, errors="coerce")
+            if dtype in ("Int64", "int16"):
+                integral = numeric.notna() & (numeric % 1 == 0)
+                numeric = numeric.where(integral)
+            cast = numeric.astype(dtype if dtype != "int16" else "Int16")
+            dropped += int(values.notna().sum() - cast.notna().sum())
+        out[column] = cast
+    return pd.DataFrame(out, index=df.index), dropped
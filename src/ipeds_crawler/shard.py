@@ -0,0 +1,78 @@
+from __future__ import annotations
+
+import csv
+import hashlib
+import sys
+from collections.abc import Iterator, Sequence
+from pathlib import Path
+from typing import Any
+
+from .resume import pair_key
+from .sinks import BufferedSink
+
+
+def parse_shard(spec: str) -> tuple[int, int]:
+    """'i/N' -> (i, N) with 0 <= i < N."""
+    try:
+        index, count = (int(part) for part in spec.split("/"))
+    except ValueError:
+        raise ValueError(f"shard must look like i/N, got {spec!r}") from None
+    if count < 1 or not 0 <= index < count:
+        raise ValueError(f"shard index must be in [0, {count}), got {spec!r}")
+    return index, count
+
+
+def shard_of(unit_id: Any, year: int, count: int) -> int:
+    # blake2b rather than hash(): stable across processes, machines and Python versions.
+    digest = hashlib.blake2b(f"{unit_id}:{int(year)}".encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "big") % count
+
+
+def shard_work(work: list[tuple[Any, Any, int]], index: int, count: int) -> list[tuple[Any, Any, int]]:
+    """Keep the (name, unit_id, year) items that belong to shard `index` of `count`."""
+    return [item for item in work if shard_of(item[1], item[2], count) == index]
+
+
+# ---------------------------
+# Merge
+# ---------------------------
+def iter_records(path: str | Path, batch_size: int = 10_000) -> Iterator[dict[str, Any]]:
+    """Stream records from a CSV output or a ParquetSink dataset directory."""
+    path = Path(path)
+    if path.is_dir():
+        import pyarrow as pa
+        import pyarrow.dataset as ds
+
+        partitioning = ds.partitioning(pa.schema([("year", pa.int16())]), flavor="hive")
+        dataset = ds.dataset(path, format="parquet", partitioning=partitioning)
+        # Same unification as sinks.read_dataset, so columns added by later files survive.
+        schema = pa.unify_schemas([f.physical_schema for f in dataset.get_fragments()] + [partitioning.schema])
+        dataset = ds.dataset(path, format="parquet", partitioning=partitioning, schema=schema)
+        for batch in dataset.to_batches(batch_size=batch_size):
+            yield from batch.to_pylist()
+        return
+    csv.field_size_limit(sys.maxsize)
+    with open(path, newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            # Empty CSV fields are missing values, as DataFrame.to_csv wrote them.
+            yield {key: (value if value != "" else None) for key, value in row.items()}
+
+
+def merge_outputs(inputs: Sequence[str | Path], sink: BufferedSink) -> tuple[int, int]:
+    """Stream shard outputs into `sink`, keeping the first record per pair (resume.pair_key).
+
+    Returns (written, duplicates). Only the keys are held in memory.
+    """
+    seen = sink.completed_pairs()
+    written = duplicates = 0
+    with sink:
+        for path in inputs:
+            for record in iter_records(path):
+                key = pair_key(record)
+                if key in seen:
+                    duplicates += 1
+                    continue
+                seen.add(key)
+                sink.write(record)
+                written += 1
+    return written, duplicates
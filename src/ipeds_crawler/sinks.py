@@ -0,0 +1,390 @@
+from __future__ import annotations
+
+import abc
+import csv
+import math
+import os
+import queue
+import threading
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any
+
+try:
+    import fcntl
+except ImportError:  # Windows: shared CSV output is not locked
+    fcntl = None  # type: ignore[assignment]
+
+import pandas as pd
+
+from .metrics import Metrics, span
+from .resume import Pair, completed_pairs, pair_keys
+from .schema import coerce_frame, column_dtypes, registry_columns
+
+_CHECKPOINT = object()
+_CLOSE = object()
+
+
+class BufferedSink(abc.ABC):
+    """Collects records on the event loop and writes them in batches on a background thread.
+
+    A batch is written once `batch_rows` records are waiting or `flush_interval_s` has
+    passed since the first of them arrived. Writes reach the OS page cache only; data is
+    fsynced on `checkpoint()`, every `checkpoint_interval_s`, and on `close()`.
+
+    The column list is the union of every key seen so far, in first-seen order, so a
+    record with extra or missing keys never shifts the other columns.
+    """
+
+    def __init__(
+        self,
+        batch_rows: int = 200,
+        flush_interval_s: float = 5.0,
+        checkpoint_interval_s: float = 30.0,
+        max_pending: int = 0,
+        metrics: Metrics | None = None,
+    ) -> None:
+        self.batch_rows = batch_rows
+        self.metrics = metrics
+        self.flush_interval_s = flush_interval_s
+        self.checkpoint_interval_s = checkpoint_interval_s
+        self.columns: list[str] = []
+        self.rows_written = 0
+        self.batches = 0
+        # Bounded for bulk producers (merge): write() then blocks until the writer catches up.
+        self._queue: queue.Queue[Any] = queue.Queue(maxsize=max_pending)
+        self._error: BaseException | None = None
+        self._thread: threading.Thread | None = None
+
+    def open(self) -> BufferedSink:
+        self._thread = threading.Thread(target=self._run, name=f"{type(self).__name__}-writer", daemon=True)
+        self._thread.start()
+        return self
+
+    def write(self, record: dict[str, Any]) -> None:
+        self._raise_if_failed()
+        self._queue.put(record)
+
+    def checkpoint(self) -> None:
+        """Block until everything queued so far is written and fsynced."""
+        self._raise_if_failed()
+        done = threading.Event()
+        self._queue.put((_CHECKPOINT, done))
+        done.wait()
+        self._raise_if_failed()
+
+    def close(self) -> None:
+        if self._thread is not None:
+            self._queue.put(_CLOSE)
+            self._thread.join()
+            self._thread = None
+        self._raise_if_failed()
+
+    def __enter__(self) -> BufferedSink:
+        return self.open()
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+    def completed_pairs(self) -> set[Pair]:
+        """Pairs already in the output (see resume.pair_key), for resuming."""
+        return set()
+
+    def stats(self) -> str:
+        return f"output: {self.rows_written} rows in {self.batches} batches"
+
+    # ---------------------------
+    # Writer thread
+    # ---------------------------
+    def _raise_if_failed(self) -> None:
+        if self._error is not None:
+            raise RuntimeError(f"{type(self).__name__} writer failed") from self._error
+
+    def _run(self) -> None:
+        pending: list[dict[str, Any]] = []
+        first_at = 0.0
+        last_sync = time.monotonic()
+        try:
+            while True:
+                timeout = None
+                if pending:
+                    timeout = max(0.0, first_at + self.flush_interval_s - time.monotonic())
+                try:
+                    item = self._queue.get(timeout=timeout)
+                except queue.Empty:
+                    item = None
+
+                if isinstance(item, dict):
+                    if not pending:
+                        first_at = time.monotonic()
+                    pending.append(item)
+                    if len(pending) < self.batch_rows:
+                        continue
+                if pending:
+                    with span(self.metrics, "write"):
+                        self._flush(pending)
+                    pending = []
+
+                now = time.monotonic()
+                if item is _CLOSE or isinstance(item, tuple) or now - last_sync >= self.checkpoint_interval_s:
+                    with span(self.metrics, "sync"):
+                        self._sync()
+                    last_sync = now
+                if isinstance(item, tuple):
+                    item[1].set()
+                if item is _CLOSE:
+                    return
+        except BaseException as e:
+            self._error = e
+            # Unblock anyone waiting on a checkpoint; later calls re-raise the error.
+            while True:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if isinstance(item, tuple):
+                    item[1].set()
+        finally:
+            self._release()
+
+    def _flush(self, rows: list[dict[str, Any]]) -> None:
+        new = [key for row in rows for key in row if key not in self.columns]
+        if new:
+            added = list(dict.fromkeys(new))
+            self._extend_schema(added)
+            self.columns.extend(added)
+        self._write_batch(rows)
+        self.rows_written += len(rows)
+        self.batches += 1
+
+    def _extend_schema(self, added: list[str]) -> None:  # noqa: B027 - optional hook
+        pass
+
+    @abc.abstractmethod
+    def _write_batch(self, rows: list[dict[str, Any]]) -> None: ...
+
+    def _sync(self) -> None:  # noqa: B027 - optional hook
+        pass
+
+    def _release(self) -> None:  # noqa: B027 - optional hook
+        pass
+
+
+def _csv_value(value: Any) -> Any:
+    # Match DataFrame.to_csv: missing values are written as empty fields.
+    if value is None or (isinstance(value, float) and math.isnan(value)):
+        return ""
+    return value
+
+
+class CsvSink(BufferedSink):
+    """Append-only CSV output. Adding a column rewrites the file once with the wider header.
+
+    With `shared=True` several processes can append to the same file: each batch takes an
+    exclusive flock on `<path>.lock`, re-reads the header another process may have widened,
+    and reopens the file before writing.
+    """
+
+    def __init__(self, path: str | Path, shared: bool = False, **kwargs: Any) -> None:
+        super().__init__(**kwargs)
+        self.path = Path(path)
+        self.shared = shared
+        self._fh: Any = None
+
+    def completed_pairs(self) -> set[Pair]:
+        return completed_pairs(str(self.path))
+
+    def open(self) -> CsvSink:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._locked():
+            self._reopen()
+        super().open()
+        return self
+
+    @contextmanager
+    def _locked(self) -> Iterator[None]:
+        if not self.shared or fcntl is None:
+            yield
+            return
+        with open(f"{self.path}.lock", "a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def _reopen(self) -> None:
+        if self._fh is not None:
+            self._fh.close()
+        if self.path.exists() and self.path.stat().st_size:
+            self._drop_partial_line()
+            with open(self.path, newline="", encoding="utf-8") as f:
+                self.columns = next(csv.reader(f), [])
+        self._fh = self._open_append()
+
+    def _open_append(self) -> Any:
+        # Held open across batches and closed by _reopen/_release, so no `with` block.
+        return open(self.path, "a", newline="", encoding="utf-8")  # noqa: SIM115
+
+    def _flush(self, rows: list[dict[str, Any]]) -> None:
+        if not self.shared:
+            super()._flush(rows)
+            return
+        with self._locked():
+            self._reopen()
+            super()._flush(rows)
+
+    def _drop_partial_line(self) -> None:
+        # A crash mid-write can leave a truncated last row; cut back to the last newline.
+        with open(self.path, "rb+") as f:
+            size = f.seek(0, os.SEEK_END)
+            f.seek(size - 1)
+            if f.read(1) == b"\n":
+                return
+            pos = size
+            while pos > 0:
+                step = min(65_536, pos)
+                pos -= step
+                f.seek(pos)
+                nl = f.read(step).rfind(b"\n")
+                if nl != -1:
+                    f.truncate(pos + nl + 1)
+                    return
+            f.truncate(0)
+
+    def _extend_schema(self, added: list[str]) -> None:
+        columns = self.columns + added
+        if self._fh.tell() == 0:
+            csv.writer(self._fh, lineterminator="\n").writerow(columns)
+            return
+        self._fh.close()
+        tmp = self.path.with_suffix(f"{self.path.suffix}.{os.getpid()}.tmp")
+        with open(self.path, newline="", encoding="utf-8") as src, open(tmp, "w", newline="", encoding="utf-8") as dst:
+            reader = csv.reader(src)
+            writer = csv.writer(dst, lineterminator="\n")
+            next(reader, None)
+            writer.writerow(columns)
+            pad = [""] * len(added)
+            for row in reader:
+                writer.writerow(row + pad)
+            dst.flush()
+            os.fsync(dst.fileno())
+        os.replace(tmp, self.path)
+        self._fh = self._open_append()
+
+    def _write_batch(self, rows: list[dict[str, Any]]) -> None:
+        writer = csv.writer(self._fh, lineterminator="\n")
+        writer.writerows([[_csv_value(row.get(col)) for col in self.columns] for row in rows])
+        self._fh.flush()
+
+    def _sync(self) -> None:
+        os.fsync(self._fh.fileno())
+
+    def _release(self) -> None:
+        if self._fh is not None:
+            self._fh.close()
+            self._fh = None
+
+
+class ParquetSink(BufferedSink):
+    """Year-partitioned Parquet dataset: `<root>/year=YYYY/part-*.parquet`, zstd-compressed.
+
+    Every batch adds one file per year it touches, so appending never rewrites earlier
+    files. Column dtypes come from the schema registry; values that do not fit a
+    numeric column are written as null and counted in `coerced`.
+    """
+
+    def __init__(self, root: str | Path, compression: str = "zstd", **kwargs: Any) -> None:
+        try:
+            import pyarrow.parquet  # noqa: F401
+        except ImportError as e:
+            raise RuntimeError("Parquet output needs pyarrow: pip install 'ipeds-crawler[parquet]'") from e
+        kwargs.setdefault("batch_rows", 5_000)
+        kwargs.setdefault("flush_interval_s", 60.0)
+        super().__init__(**kwargs)
+        self.root = Path(root)
+        self.compression = compression
+        self.coerced = 0
+        self.columns = list(registry_columns())
+        self._unsynced: list[Path] = []
+
+    def stats(self) -> str:
+        return f"{super().stats()}, {self.coerced} non-numeric values written as null"
+
+    def completed_pairs(self) -> set[Pair]:
+        if not any(self.root.glob("year=*/*.parquet")):
+            return set()
+        import pyarrow as pa
+
+        try:
+            df = read_dataset(self.root, columns=["unit_id", "institution", "year"])
+        except pa.ArrowInvalid:
+            # Written before records carried unit_id.
+            df = read_dataset(self.root, columns=["institution", "year"])
+        return pair_keys(df)
+
+    def open(self) -> ParquetSink:
+        self.root.mkdir(parents=True, exist_ok=True)
+        super().open()
+        return self
+
+    def _write_batch(self, rows: list[dict[str, Any]]) -> None:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        frame, dropped = coerce_frame(pd.DataFrame(rows), column_dtypes(self.columns))
+        self.coerced += dropped
+        for year, part in frame.groupby("year"):
+            directory = self.root / f"year={int(year)}"
+            directory.mkdir(exist_ok=True)
+            name = f"part-{time.time_ns()}-{os.getpid()}.parquet"
+            # Dot-prefixed temp names are skipped by dataset discovery.
+            tmp = directory / f".{name}.tmp"
+            table = pa.Table.from_pandas(part.drop(columns="year"), preserve_index=False)
+            pq.write_table(table, tmp, compression=self.compression)
+            os.replace(tmp, directory / name)
+            self._unsynced.append(directory / name)
+
+    def _sync(self) -> None:
+        directories = set()
+        for path in self._unsynced:
+            with open(path, "rb") as f:
+                os.fsync(f.fileno())
+            directories.add(path.parent)
+        for directory in directories:
+            fd = os.open(directory, os.O_RDONLY)
+            try:
+                os.fsync(fd)
+            finally:
+                os.close(fd)
+        self._unsynced = []
+
+
+def read_dataset(
+    root: str | Path,
+    columns: list[str] | None = None,
+    years: list[int] | range | None = None,
+    filter: Any = None,
+) -> pd.DataFrame:
+    """Read a ParquetSink dataset, touching only the requested columns and year partitions.
+
+    `filter` is an optional extra `pyarrow.dataset` expression, e.g.
+    `ds.field("total_enrollment") > 10_000`, pushed down to the row-group statistics.
+    """
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+
+    partitioning = ds.partitioning(pa.schema([("year", pa.int16())]), flavor="hive")
+    dataset = ds.dataset(root, format="parquet", partitioning=partitioning)
+    # Files written before a column first appeared lack it; unify so it reads as null.
+    schema = pa.unify_schemas([f.physical_schema for f in dataset.get_fragments()] + [partitioning.schema])
+    dataset = ds.dataset(root, format="parquet", partitioning=partitioning, schema=schema)
+
+    expr = None
+    if years is not None:
+        expr = ds.field("year").isin(list(years))
+    if filter is not None:
+        expr = filter if expr is None else expr & filter
+    return dataset.to_table(columns=columns, filter=expr).to_pandas()
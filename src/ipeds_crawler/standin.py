@@ -0,0 +1,201 @@
+from __future__ import annotations
+
+import hashlib
+import html
+import json
+import logging
+import math
+import random
+import re
+import threading
+import time
+from collections import Counter
+from dataclasses import asdict, dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any
+from urllib.parse import parse_qs, urlsplit
+
+from .fixtures import page_html, survey_page
+from .surveys import REGISTRY
+
+logger = logging.getLogger("ipeds_crawler")
+
+# /reported-data/{unit_id} (shell) and /reported-data/html/{unit_id} (iframe view), under any prefix.
+_PATH = re.compile(r"/reported-data/(?P<iframe>html/)?(?P<unit_id>\d+)/?$")
+
+
+@dataclass
+class Faults:
+    """What the stand-in does to each request. Rates are probabilities in [0, 1].
+
+    Latency is lognormal around `latency_ms` (the median); `latency_sigma` 0 makes it fixed.
+    Errors and 429s are drawn per request, so retries can succeed. Missing-table and
+    no-data pages are drawn per (unit_id, survey, year), so a page stays that way.
+    """
+
+    latency_ms: float = 50.0
+    latency_sigma: float = 0.5
+    error_rate: float = 0.0
+    throttle_rate: float = 0.0
+    retry_after_s: int = 1
+    missing_rate: float = 0.0
+    no_data_rate: float = 0.0
+    seed: int = 0
+
+
+class StandinServer:
+    """Local stand-in for the NCES reported-data pages, for reproducible end-to-end runs.
+
+    Serves the shell page and `viewMode=iframe` view of every registry survey. Pages come
+    from a page cache (`cache_dir`, as written by `--cache-dir`) when recorded there, and
+    are synthesized from the survey plans (ipeds_crawler.fixtures) otherwise. `GET /__stats`
+    returns the request counters as JSON.
+    """
+
+    def __init__(
+        self,
+        faults: Faults | None = None,
+        cache_dir: str | Path | None = None,
+        host: str = "127.0.0.1",
+        port: int = 0,
+    ) -> None:
+        self.faults = faults or Faults()
+        self.cache_dir = cache_dir
+        self.counts: Counter[str] = Counter()
+        self._lock = threading.Lock()
+        self._rng = random.Random(self.faults.seed)
+        self._local = threading.local()
+        self._thread: threading.Thread | None = None
+        self._httpd = ThreadingHTTPServer((host, port), _Handler)
+        self._httpd.daemon_threads = True
+        self._httpd.standin = self  # type: ignore[attr-defined]
+
+    @property
+    def url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> StandinServer:
+        """Serve from a background thread."""
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name="standin", daemon=True)
+        self._thread.start()
+        return self
+
+    def serve_forever(self) -> None:
+        self._httpd.serve_forever()
+
+    def stop(self) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def __enter__(self) -> StandinServer:
+        return self.start()
+
+    def __exit__(self, *exc: Any) -> None:
+        self.stop()
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            return {"faults": asdict(self.faults), **dict(self.counts)}
+
+    # ---------------------------
+    # Request handling (handler threads)
+    # ---------------------------
+    def _count(self, *keys: str) -> None:
+        with self._lock:
+            self.counts.update(keys)
+
+    def _draw(self) -> tuple[float, float]:
+        # One RNG for all threads: a fixed seed gives the same fault sequence for the same request order.
+        with self._lock:
+            return self._rng.random(), self._rng.gauss(0.0, 1.0)
+
+    def _stable(self, *key: Any) -> float:
+        """Uniform [0, 1) fixed per key and seed."""
+        digest = hashlib.blake2b(":".join(map(str, (self.faults.seed, *key))).encode(), digest_size=8).digest()
+        return int.from_bytes(digest, "big") / 2**64
+
+    def _latency_s(self, z: float) -> float:
+        f = self.faults
+        return f.latency_ms / 1000 * math.exp(f.latency_sigma * z)
+
+    def respond(self, path: str, query: str) -> tuple[int, dict[str, str], str]:
+        """(status, extra headers, body) for one GET."""
+        if path == "/__stats":
+            return 200, {"Content-Type": "application/json"}, json.dumps(self.stats())
+        match = _PATH.search(path)
+        params = parse_qs(query)
+        try:
+            survey = int(params["surveyNumber"][0])
+            year = int(params["year"][0])
+        except (KeyError, ValueError):
+            survey = year = -1
+        if match is None or survey not in REGISTRY:
+            return 404, {}, "not found"
+        unit_id = match["unit_id"]
+
+        u, z = self._draw()
+        time.sleep(self._latency_s(z))
+        f = self.faults
+        if u < f.throttle_rate:
+            return 429, {"Retry-After": str(f.retry_after_s)}, "Too Many Requests"
+        if u < f.throttle_rate + f.error_rate:
+            return (500, 502, 503)[int(u * 1e6) % 3], {}, "Server Error"
+
+        if not match["iframe"]:
+            src = html.escape(f"{path.replace('/reported-data/', '/reported-data/html/', 1)}?{query}&viewMode=iframe")
+            self._count("shell")
+            return 200, {}, page_html(survey, f'<iframe src="{src}"></iframe>')
+        return 200, {}, self._survey_page(unit_id, survey, year)
+
+    def _survey_page(self, unit_id: str, survey: int, year: int) -> str:
+        f = self.faults
+        u = self._stable(unit_id, survey, year)
+        if u < f.missing_rate:
+            self._count("missing")
+            return page_html(survey, "<p>Survey data could not be loaded.</p>")
+        if u < f.missing_rate + f.no_data_rate:
+            self._count("no_data")
+            return survey_page(survey, year, no_data=True)
+        recorded = self._recorded(unit_id, survey, year)
+        if recorded is not None:
+            self._count("recorded")
+            return recorded
+        self._count("synthesized")
+        return survey_page(survey, year, seed=int(u * 2**32))
+
+    def _recorded(self, unit_id: str, survey: int, year: int) -> str | None:
+        if self.cache_dir is None:
+            return None
+        # SQLite connections are per thread.
+        cache = getattr(self._local, "cache", None)
+        if cache is None:
+            from .cache import PageCache
+
+            cache = self._local.cache = PageCache(self.cache_dir)
+        return cache.get(unit_id, survey, year, fresh_only=False)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, like the real site
+
+    def do_GET(self) -> None:
+        standin: StandinServer = self.server.standin  # type: ignore[attr-defined]
+        parts = urlsplit(self.path)
+        status, headers, body = standin.respond(parts.path, parts.query)
+        data = body.encode("utf-8")
+        standin._count("requests", f"status_{status}")
+        self.send_response(status)
+        self.send_header("Content-Type", headers.pop("Content-Type", "text/html; charset=utf-8"))
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format: str, *args: Any) -> None:
+        logger.debug(f"standin: {format % args}")
@@ -0,0 +1,543 @@
+from __future__ import annotations
+
+import hashlib
+from collections.abc import Callable
+from dataclasses import dataclass
+from functools import cache, cached_property
+from typing import Any, Generic, TypeVar
+
+from .extractors import NO_DATA_MARKERS, TableSnapshot, default_selectors
+from .normalize import build_labeled_dict
+
+T = TypeVar("T")
+
+
+# ---------------------------
+# Year-ranged values
+# ---------------------------
+@dataclass(frozen=True)
+class ByYear(Generic[T]):
+    """First rule whose inclusive (start, end) range contains the year wins; None is open-ended."""
+
+    rules: tuple[tuple[int | None, int | None, T], ...]
+
+    def pick(self, year: int) -> T:
+        for start, end, value in self.rules:
+            if (start is None or year >= start) and (end is None or year <= end):
+                return value
+        raise LookupError(f"no rule covers year {year}")
+
+
+def by_year(*rules: tuple[int | None, int | None, T]) -> ByYear[T]:
+    return ByYear(tuple(rules))
+
+
+Ranged = T | ByYear[T]
+
+
+def resolve(value: Ranged[T], year: int) -> T:
+    return value.pick(year) if isinstance(value, ByYear) else value
+
+
+# ---------------------------
+# Index picks applied to the raw extracted value
+# ---------------------------
+Pick = Callable[[Any], Any]
+
+
+def keep(x: Any) -> Any:
+    return x
+
+
+def last_if_any(x: Any) -> Any:
+    return x[-1] if x else x
+
+
+def last_if_list(x: Any) -> Any:
+    return x[-1] if isinstance(x, list) and x else x
+
+
+def first_if_list(x: Any) -> Any:
+    return x[0] if isinstance(x, list) else x
+
+
+def second_if_list(x: Any) -> Any:
+    return x[1] if isinstance(x, list) and x else x
+
+
+def pops(*indexes: int) -> Pick:
+    """list.pop each index in turn (so later indexes refer to the shortened list)."""
+
+    def pick(x: Any) -> Any:
+        if x:
+            for i in indexes:
+                x.pop(i)
+        return x
+
+    return pick
+
+
+def pair(x: Any) -> list[Any]:
+    a, b = x if isinstance(x, list) else [None, None]
+    return [a, b]
+
+
+def first_pair(x: Any) -> list[Any]:
+    a, b = x[0:2] if isinstance(x, list) else [None, None]
+    return [a, b]
+
+
+def tuition(x: Any) -> Any:
+    if x:
+        x = x[-1] if len(x) == 4 else x[3]
+    return x
+
+
+def staff_count(x: Any) -> Any:
+    return x[-1] if len(x) == 3 else x[-3]
+
+
+def staff_count_if_any(x: Any) -> Any:
+    return staff_count(x) if x else x
+
+
+def enrollment_split(x: Any) -> list[Any]:
+    if isinstance(x, list) and x:
+        undergrad, grad = x
+        return [undergrad, grad]
+    # No "Graduate enrollment" row reads as [], which must stay an empty cell.
+    return [None if x == [] else x, None]
+
+
+def nonresident(x: Any) -> Any:
+    if not x:
+        return None
+    return x[1] if isinstance(x, list) else x
+
+
+def circulation(x: Any) -> list[Any]:
+    if x and isinstance(x, list):
+        physical, digital = x
+        return [physical, digital]
+    if isinstance(x, int):
+        return [None, x]
+    return [None, None]
+
+
+# ---------------------------
+# Survey specs
+# ---------------------------
+@dataclass(frozen=True)
+class Field:
+    """One value read from a survey page.
+
+    `labels` are row texts tried in order until one yields a non-empty value.
+    `table`/`value` default to the year's standard selectors (extractors.default_selectors).
+    """
+
+    name: str
+    labels: tuple[Ranged[str], ...]
+    pick: Ranged[Pick] = keep
+    table: Ranged[str | None] = None
+    value: Ranged[str | None] = None
+    header: str = ""
+    exact: bool = False
+    box: Ranged[bool] = False
+    missing: Any = ...
+
+
+# (column base, labels, field name, slice[, position]) — see normalize.build_labeled_dict.
+Output = tuple[Any, ...]
+
+
+@dataclass(frozen=True)
+class SurveySpec:
+    number: int
+    title: str
+    wait: Ranged[str]
+    fields: tuple[Field, ...]
+    outputs: tuple[Output, ...]
+    missing: Any = None
+    missing_message: str = "{title} table not found for {year}"
+
+
+@dataclass(frozen=True)
+class FieldQuery:
+    name: str
+    labels: tuple[str, ...]
+    table: str
+    value: str
+    header: str
+    exact: bool
+    box: bool
+    pick: Pick
+    missing: Any
+
+
+@dataclass(frozen=True)
+class Plan:
+    """A SurveySpec resolved for one year: concrete selectors, labels and picks."""
+
+    survey: int
+    year: int
+    wait: str
+    queries: tuple[FieldQuery, ...]
+    selectors: tuple[tuple[str, str], ...]
+    outputs: tuple[Output, ...]
+    missing_message: str
+
+    def extract(self, snap: TableSnapshot) -> dict[str, Any]:
+        values: dict[str, Any] = {}
+        for q in self.queries:
+            value: Any = None
+            for label in q.labels:
+                if q.box:
+                    value = snap.box_data(label, self.year, table_selector=q.table, value_selector=q.value)
+                else:
+                    value = snap.text_data(
+                        label,
+                        self.year,
+                        table_selector=q.table,
+                        value_selector=q.value,
+                        table_header=q.header,
+                        exact=q.exact,
+                    )
+                if value:
+                    break
+            values[q.name] = q.pick(value)
+        return values
+
+    @cached_property
+    def version(self) -> str:
+        """Hash of what tells a table from a "no data" page; NegativeCache entries are keyed by it."""
+        key = repr((self.wait, self.selectors, NO_DATA_MARKERS))
+        return hashlib.blake2b(key.encode(), digest_size=8).hexdigest()
+
+    def missing(self) -> dict[str, Any]:
+        # Fresh copies: picks and build_labeled_dict must never share a default list.
+        return {q.name: list(q.missing) if isinstance(q.missing, list) else q.missing for q in self.queries}
+
+    def build(self, values: dict[str, Any]) -> dict[str, Any]:
+        specs = [(base, labels, values[name], *rest) for base, labels, name, *rest in self.outputs]
+        return build_labeled_dict(*specs)
+
+
+def _plain(*names: str) -> tuple[Output, ...]:
+    return tuple((name, "", name, None) for name in names)
+
+
+_CURRENT_TABLE = by_year((2023, 2023, "table.sc.survey-t"), (None, None, "table.grid"))
+
+_ADMISSION_TABLE = by_year(
+    (2023, 2023, "table.sc.survey-t"), (2020, 2022, "table.grid"), (None, None, "table.sc")
+)
+_ADMISSION_VALUE = by_year(
+    (2023, 2023, "td.sc-tb-r.t-co span"), (2020, 2022, "td.number"), (None, None, "span")
+)
+
+_COMPLETIONS_TABLE = by_year((2020, None, "table.table.table-bordered.sc"), (None, None, "table.sc"))
+_COMPLETIONS_VALUE = by_year((2020, None, "td.number"), (None, None, "td.sc-tb-c"))
+
+_AID_TABLE = by_year((2020, 2023, "table.sc.survey-t"), (None, None, "table.sc"))
+_AID_BOX_VALUE = by_year(
+    (2022, None, "td.sc-tb-r.t-c-t input.sc-tbn"),
+    (2020, 2021, "td.sc-tb-r.t-co input.sc-tbn"),
+    (None, None, "td.sc-tb-l span"),
+)
+_AID_TEXT_VALUE = by_year(
+    (2022, None, "td.sc-tb-r.t-c-t span"),
+    (2020, 2021, "td.sc-tb-r.t-co span"),
+    (None, None, "td.sc-s.sc-tb-l"),
+)
+_AID_BOX = by_year((2020, None, True), (None, None, False))
+_AID_GRANTS = (
+    "Grant or scholarship aid from the federal government, state/local government, "
+    "the institution, and other sources known to the institution"
+)
+
+_ADMISSION_COLS = ["total", "male", "female"]
+_TEST_SUBMITTED_COLS = ["num_submitted", "pct_submitted"]
+_TEST_PCT_COLS = ["25th_pct", "75th_pct"]
+_MAJOR_COLS = ["1st_major", "2nd_major"]
+
+# Survey number -> spec, in the column order of the merged record.
+REGISTRY: dict[int, SurveySpec] = {
+    spec.number: spec
+    for spec in (
+        SurveySpec(
+            number=1,
+            title="pricing information",
+            wait=_CURRENT_TABLE,
+            fields=(
+                Field(
+                    "tuition_fee",
+                    (
+                        "out-of-state tuition and fees",
+                        by_year((2023, 2023, "Published Tuition and fees"), (None, None, "Tuition and fees")),
+                    ),
+                    pick=tuition,
+                ),
+                Field("book_and_supplies", ("Books and supplies",), pick=last_if_any),
+                Field(
+                    "food_housing_on_campus",
+                    (by_year((2023, 2023, "On-campus food and housing"), (None, None, "On-campus room and board")),),
+                    pick=last_if_any,
+                ),
+                Field("other_expenses_on_campus", ("On-campus other expenses",), pick=last_if_any),
+                Field(
+                    "food_housing_off_campus",
+                    (by_year((2023, 2023, "Off-campus food and housing"), (None, None, "Off-campus room and board")),),
+                    pick=last_if_any,
+                ),
+                Field("other_expenses_off_campus", ("Off-campus other expenses",), pick=last_if_any),
+                Field(
+                    "other_expenses_off_campus_family",
+                    ("Off-campus with family other expenses",),
+                    pick=last_if_any,
+                ),
+            ),
+            outputs=_plain(
+                "tuition_fee",
+                "book_and_supplies",
+                "food_housing_on_campus",
+                "other_expenses_on_campus",
+                "food_housing_off_campus",
+                "other_expenses_off_campus",
+                "other_expenses_off_campus_family",
+            ),
+        ),
+        SurveySpec(
+            number=12,
+            title="Admission & test score",
+            wait=_ADMISSION_TABLE,
+            missing=[],
+            fields=(
+                Field("num_applicant", ("Number of applicants",)),
+                Field("percent_admitted", ("Percent admitted",)),
+                Field("percent_admitted_enrolled", ("Percent admitted who enrolled",)),
+                Field(
+                    "sat",
+                    ("SAT",),
+                    table=_ADMISSION_TABLE,
+                    value=_ADMISSION_VALUE,
+                    pick=by_year((2023, 2023, pops(3, 6)), (None, None, keep)),
+                ),
+                Field(
+                    "act",
+                    ("ACT",),
+                    table=_ADMISSION_TABLE,
+                    value=_ADMISSION_VALUE,
+                    pick=by_year((2023, 2023, pops(3, 6)), (None, None, keep)),
+                ),
+            ),
+            outputs=(
+                ("num_applicant", _ADMISSION_COLS, "num_applicant", slice(None)),
+                ("percent_admitted", _ADMISSION_COLS, "percent_admitted", slice(None)),
+                ("percent_admitted_enrolled", _ADMISSION_COLS, "percent_admitted_enrolled", slice(None)),
+                ("sat", _TEST_SUBMITTED_COLS, "sat", slice(0, 2)),
+                ("act", _TEST_SUBMITTED_COLS, "act", slice(0, 2)),
+                ("sat_rw", _TEST_PCT_COLS, "sat", slice(2, 4)),
+                ("sat_math", _TEST_PCT_COLS, "sat", slice(4, 6)),
+                ("act_comp", _TEST_PCT_COLS, "act", slice(2, 4)),
+                ("act_eng", _TEST_PCT_COLS, "act", slice(4, 6)),
+                ("act_math", _TEST_PCT_COLS, "act", slice(6, 8)),
+            ),
+        ),
+        SurveySpec(
+            number=15,
+            title="Enrollment",
+            wait=_CURRENT_TABLE,
+            missing_message="{title} table not found",
+            fields=(
+                Field("total_enrollment", ("Total enrollment",)),
+                Field("both_enrol", ("Graduate enrollment",), pick=enrollment_split, missing=[None, None]),
+                Field("female_percentage", ("Percent of all students who are female",), pick=second_if_list),
+                Field(
+                    "international_student_percent",
+                    (
+                        by_year(
+                            (2023, 2023, "U .S. Nonresident (%)"),
+                            (2022, 2022, "U.S. Nonresident"),
+                            (None, None, "Nonresident alien"),
+                        ),
+                    ),
+                    pick=nonresident,
+                ),
+            ),
+            outputs=(
+                ("total_enrollment", "", "total_enrollment", None),
+                ("undergrad_enrollment", "", "both_enrol", slice(0, 1)),
+                ("grad_enrollment", "", "both_enrol", slice(1, 2)),
+                ("female_percentage", "", "female_percentage", None),
+                ("international_student_percent", "", "international_student_percent", None),
+            ),
+        ),
+        SurveySpec(
+            number=3,
+            title="completions",
+            wait=_COMPLETIONS_TABLE,
+            missing=[],
+            fields=(
+                Field(
+                    "Bs",
+                    ("Bachelor's degree", "Bachelors degree"),
+                    table=_COMPLETIONS_TABLE,
+                    value=_COMPLETIONS_VALUE,
+                ),
+                Field("Ms", ("Master's degree",), table=_COMPLETIONS_TABLE, value=_COMPLETIONS_VALUE),
+                Field("Phd", ("Doctor's degree - research",), table=_COMPLETIONS_TABLE, value=_COMPLETIONS_VALUE),
+                Field(
+                    "total_completors", ("All Completers",), table=_COMPLETIONS_TABLE, value=_COMPLETIONS_VALUE
+                ),
+            ),
+            outputs=(
+                ("Bs", _MAJOR_COLS, "Bs", None, "first"),
+                ("Ms", _MAJOR_COLS, "Ms", None, "first"),
+                ("Phd", _MAJOR_COLS, "Phd", None, "first"),
+                ("total_completors", ["male", "female", ""], "total_completors", None, "last"),
+            ),
+        ),
+        SurveySpec(
+            number=8,
+            title="Graduation",
+            wait=_CURRENT_TABLE,
+            missing=[],
+            fields=(
+                Field(
+                    "graduation_rate_pct",
+                    ("Graduation rate",),
+                    header="Overall Graduation Rate",
+                    pick=first_if_list,
+                ),
+                Field(
+                    "total_graduated",
+                    ("Total number of students in the Adjusted Cohort",),
+                    pick=first_if_list,
+                ),
+                Field(
+                    "total_graduated_150_time",
+                    ("Total number of completers within 150",),
+                    pick=first_if_list,
+                ),
+            ),
+            outputs=_plain("graduation_rate_pct", "total_graduated", "total_graduated_150_time"),
+        ),
+        SurveySpec(
+            number=7,
+            title="Financial aid",
+            wait=_AID_TABLE,
+            missing=[None, None],
+            fields=(
+                Field("aid_box", (_AID_GRANTS,), table=_AID_TABLE, value=_AID_BOX_VALUE, box=_AID_BOX, pick=pair),
+                Field("aid_text", (_AID_GRANTS,), table=_AID_TABLE, value=_AID_TEXT_VALUE, pick=first_pair),
+                Field("pell_box", ("Pell Grants",), table=_AID_TABLE, value=_AID_BOX_VALUE, box=_AID_BOX, pick=pair),
+                Field("pell_text", ("Pell Grants",), table=_AID_TABLE, value=_AID_TEXT_VALUE, pick=first_pair),
+            ),
+            outputs=(
+                ("num_awarded_aid", "", "aid_box", slice(0, 1)),
+                ("total_amount_awarded_aid", "", "aid_box", slice(1, 2)),
+                ("pct_awarded_aid", "", "aid_text", slice(0, 1)),
+                ("avg_amount_awarded_aid", "", "aid_text", slice(1, 2)),
+                ("num_awarded_pell_grant", "", "pell_box", slice(0, 1)),
+                ("total_amount_awarded_pell_grant", "", "pell_box", slice(1, 2)),
+                ("pct_awarded_pell_grant", "", "pell_text", slice(0, 1)),
+                ("avg_amount_awarded_pell_grant", "", "pell_text", slice(1, 2)),
+            ),
+        ),
+        SurveySpec(
+            number=6,
+            title="finance",
+            wait=_CURRENT_TABLE,
+            fields=tuple(
+                Field(name, (label,), pick=last_if_list)
+                for name, label in (
+                    ("tuition_revenue_per_fte", "Tuition and fees"),
+                    ("gov_grants_revenue_per_fte", "Government grants and contracts"),
+                    ("private_revenue_per_fte", "Private gifts, grants, and contracts"),
+                    ("total_core_revenue_per_fte", "Total core revenues"),
+                    ("instruction_expense_per_fte", "Instruction"),
+                    ("academic_support_expense_per_fte", "Academic support"),
+                    ("student_services_expense_per_fte", "Student services"),
+                    ("total_core_expense_per_fte", "Total core expenses"),
+                    ("num_fte_enrollment", "FTE enrollment"),
+                )
+            ),
+            outputs=_plain(
+                "tuition_revenue_per_fte",
+                "gov_grants_revenue_per_fte",
+                "private_revenue_per_fte",
+                "total_core_revenue_per_fte",
+                "instruction_expense_per_fte",
+                "academic_support_expense_per_fte",
+                "student_services_expense_per_fte",
+                "total_core_expense_per_fte",
+                "num_fte_enrollment",
+            ),
+        ),
+        SurveySpec(
+            number=9,
+            title="Human resource",
+            wait=_CURRENT_TABLE,
+            missing=[],
+            missing_message="{title} page not found for {year}",
+            fields=(
+                Field("instruct_staff", ("Instructional Staff",), pick=last_if_any),
+                Field(
+                    "academic_affairs",
+                    ("Library and Student and Academic Affairs and Other Education Services Occupations SOC",),
+                    pick=last_if_any,
+                ),
+                Field("it_occupation", ("Computer, Engineering, and Science Occupations",), pick=staff_count),
+                Field("management_occupation", ("Management Occupations",), pick=staff_count_if_any),
+            ),
+            outputs=(
+                ("instructional", "num_fte", "instruct_staff", None, "first"),
+                ("academic_affairs", "num_fte", "academic_affairs", None, "first"),
+                ("it_occupation", "num_fte", "it_occupation", None, "first"),
+                ("management_occupation", "num_fte", "management_occupation", None, "first"),
+            ),
+        ),
+        SurveySpec(
+            number=16,
+            title="Library",
+            wait=_CURRENT_TABLE,
+            missing=[None, None],
+            missing_message="{title} page not found for {year}",
+            fields=(Field("circulation", ("Circulation",), pick=circulation),),
+            outputs=(
+                ("physical_item_circulation", "", "circulation", slice(0, 1)),
+                ("digital_item_circulation", "", "circulation", slice(1, 2)),
+            ),
+        ),
+    )
+}
+
+
+@cache
+def compile_plan(survey: int, year: int) -> Plan:
+    spec = REGISTRY[survey]
+    queries: list[FieldQuery] = []
+    for f in spec.fields:
+        table, value = default_selectors(year, resolve(f.table, year), resolve(f.value, year))
+        queries.append(
+            FieldQuery(
+                name=f.name,
+                labels=tuple(resolve(label, year) for label in f.labels),
+                table=table,
+                value=value,
+                header=f.header,
+                exact=f.exact,
+                box=resolve(f.box, year),
+                pick=resolve(f.pick, year),
+                missing=spec.missing if f.missing is ... else f.missing,
+            )
+        )
+    return Plan(
+        survey=survey,
+        year=year,
+        wait=resolve(spec.wait, year),
+        queries=tuple(queries),
+        selectors=tuple(dict.fromkeys((q.table, q.value) for q in queries)),
+        outputs=spec.outputs,
+        missing_message=spec.missing_message.format(title=spec.title, year=year),
+    )
@@ -0,0 +1,86 @@
+from __future__ import annotations
+
+import pytest
+
+from ipeds_crawler.blocking import BlockPolicy, Traffic
+
+POLICY = BlockPolicy()
+
+URLS = {
+    # Allowlisted host, any subdomain, port, path or query: left alone.
+    "https://nces.ed.gov/ipeds/reported-data/100654": False,
+    "https://NCES.ED.GOV/ipeds/js/app.js?v=3": False,
+    "https://www.nces.ed.gov:443/ipeds": False,
+    "http://nces.ed.gov": False,
+    "https://nces.ed.gov/ipeds/report.css.aspx": False,
+    # Other hosts, including look-alikes of the allowlisted one.
+    "https://www.google-analytics.com/collect": True,
+    "https://cdn.example.org/lib.js": True,
+    "https://nces.ed.gov.example.org/": True,
+    "https://evilnces.ed.gov/": True,
+    "https://example.org/?next=https://nces.ed.gov/": True,
+    # Blocked file types, even on the allowlisted host.
+    "https://nces.ed.gov/ipeds/images/logo.PNG": True,
+    "https://nces.ed.gov/ipeds/site.css?v=12": True,
+    "https://nces.ed.gov/fonts/a.woff2#iefix": True,
+    # Not HTTP at all.
+    "data:image/png;base64,iVBORw0KGgo=": False,
+    "blob:https://nces.ed.gov/1234": False,
+}
+
+
+@pytest.mark.parametrize("url, routed", list(URLS.items()))
+def test_route_pattern(url: str, routed: bool) -> None:
+    assert bool(POLICY.route_pattern().search(url)) is routed
+
+
+@pytest.mark.parametrize(
+    "url, resource_type, reason",
+    [
+        ("https://nces.ed.gov/ipeds/reported-data/100654", "document", None),
+        ("https://nces.ed.gov/ipeds/js/app.js", "script", None),
+        ("https://nces.ed.gov/ipeds/images/logo.png", "image", "type"),
+        ("https://nces.ed.gov/ipeds/site.css", "Stylesheet", "type"),
+        ("https://www.googletagmanager.com/gtm.js", "script", "third_party"),
+        ("https://cdn.example.org/lib.js", "script", "host"),
+        ("data:image/png;base64,iVBORw0KGgo=", "image", None),
+    ],
+)
+def test_block_reason(url: str, resource_type: str, reason: str | None) -> None:
+    assert POLICY.block_reason(url, resource_type) == reason
+
+
+def test_for_base_url_allows_host_on_any_port() -> None:
+    policy = POLICY.for_base_url("http://127.0.0.1:8765")
+    assert policy.allow_hosts == ("nces.ed.gov", "127.0.0.1")
+    pattern = policy.route_pattern()
+    assert not pattern.search("http://127.0.0.1:8765/ipeds/reported-data/1")
+    assert not pattern.search("http://127.0.0.1:9000/")
+    assert pattern.search("http://127.0.0.1:8765/logo.png")
+    assert pattern.search("http://127.0.0.10/")
+    assert policy.block_reason("http://127.0.0.1:8765/x", "document") is None
+    # Allowing a host twice, or an empty one, changes nothing.
+    assert policy.for_base_url("http://127.0.0.1:1") == policy
+    assert policy.allowing("") == policy
+
+
+def test_no_blocked_types() -> None:
+    policy = BlockPolicy(block_types=frozenset())
+    assert not policy.route_pattern().search("https://nces.ed.gov/logo.png")
+    assert policy.route_pattern().search("https://example.org/logo.png")
+    assert policy.fetch_patterns() == []
+
+
+def test_fetch_patterns_use_cdp_type_names() -> None:
+    patterns = BlockPolicy(block_types=frozenset({"image", "font", "unknown"})).fetch_patterns()
+    assert [p["resourceType"] for p in patterns] == ["Font", "Image"]
+    assert all(p["urlPattern"] == "*" and p["requestStage"] == "Request" for p in patterns)
+
+
+def test_traffic_add_and_summary() -> None:
+    total = Traffic()
+    total.add(Traffic(requests=3, bytes=1024**2, blocked=2, blocked_by={"type": 1, "route": 1}))
+    total.add(Traffic(requests=1, blocked=1, blocked_by={"type": 1}))
+    assert total.summary() == "4 requests, 1.0 MB transferred, 3 blocked (1 route, 2 type)"
+    dry = Traffic(requests=10, bytes=4 * 1024**2, would_block=4, would_block_bytes=1024**2)
+    assert dry.summary() == "10 requests, 4.0 MB; blocking would drop 4 requests, 1.0 MB (25%)"
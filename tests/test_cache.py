@@ -0,0 +1,146 @@
+from __future__ import annotations
+
+import asyncio
+import sqlite3
+import time
+from pathlib import Path
+
+from ipeds_crawler.cache import NegativeCache, PageCache, default_ttl, negative_ttl
+from ipeds_crawler.extractors import NO_DATA, TABLE_FOUND, TABLE_MISSING, table_status
+from ipeds_crawler.fixtures import page_html, survey_page
+from ipeds_crawler.offline import StaticFrame
+from ipeds_crawler.surveys import compile_plan
+
+
+def page(n: int) -> str:
+    # Distinct, poorly compressible pages so blob sizes are predictable.
+    return "<html>" + "".join(f"{i * 7919 % 100003:x}" for i in range(n * 400, n * 400 + 400)) + "</html>"
+
+
+def test_round_trip_survives_reopen(tmp_path: Path) -> None:
+    cache = PageCache(tmp_path)
+    cache.put("100", 1, 2015, page(1))
+    assert cache.get("100", 1, 2015) == page(1)
+    assert cache.get(100, 1, 2015) == page(1)
+    assert cache.get("100", 1, 2016) is None
+    cache.close()
+
+    cache = PageCache(tmp_path)
+    assert cache.get("100", 1, 2015) == page(1)
+    assert (cache.hits, cache.misses) == (1, 0)
+    cache.close()
+
+
+def test_async_access(tmp_path: Path) -> None:
+    cache = PageCache(tmp_path)
+
+    async def main() -> str | None:
+        await cache.aput("100", 1, 2015, page(1))
+        return await cache.aget("100", 1, 2015)
+
+    assert asyncio.run(main()) == page(1)
+    cache.close()
+
+
+def test_stale_pages_only_served_on_request(tmp_path: Path) -> None:
+    cache = PageCache(tmp_path, ttl=lambda year: -1.0)
+    cache.put("100", 1, 2023, page(1))
+    assert cache.get("100", 1, 2023) is None
+    assert cache.get("100", 1, 2023, fresh_only=False) == page(1)
+    cache.close()
+
+
+def test_default_ttl_only_expires_recent_years() -> None:
+    assert default_ttl(2014) is None
+    assert default_ttl(2100) is not None
+
+
+def test_identical_pages_share_a_blob(tmp_path: Path) -> None:
+    cache = PageCache(tmp_path)
+    cache.put("100", 1, 2015, page(1))
+    cache.put("200", 1, 2015, page(1))
+    assert len(list(cache.blob_dir.rglob("*.gz"))) == 1
+    # Replacing one page keeps the blob the other still points to.
+    cache.put("100", 1, 2015, page(2))
+    assert len(list(cache.blob_dir.rglob("*.gz"))) == 2
+    cache.put("200", 1, 2015, page(3))
+    assert len(list(cache.blob_dir.rglob("*.gz"))) == 2
+    cache.close()
+
+
+def test_evicts_least_recently_used(tmp_path: Path) -> None:
+    cache = PageCache(tmp_path)
+    cache.put("1", 1, 2015, page(1))
+    blob = next(cache.blob_dir.rglob("*.gz")).stat().st_size
+    cache.close()
+
+    cache = PageCache(tmp_path, max_bytes=int(blob * 2.5))
+    cache.put("2", 1, 2015, page(2))
+    # Read back "1" so that "2" is now the least recently used page.
+    assert cache.get("1", 1, 2015) is not None
+    cache.put("3", 1, 2015, page(3))
+    assert cache.evictions == 1
+    assert cache.get("2", 1, 2015) is None
+    assert cache.get("1", 1, 2015) == page(1)
+    assert cache.get("3", 1, 2015) == page(3)
+    cache.close()
+
+
+def test_negative_cache_is_keyed_by_plan_version(tmp_path: Path) -> None:
+    path = tmp_path / "negative.sqlite"
+    negative = NegativeCache(path)
+    version = compile_plan(1, 2015).version
+    assert not negative.is_empty("100", 1, 2015, version)
+    negative.mark_empty(100, 1, 2015, version)
+    assert negative.is_empty("100", 1, 2015, version)
+    # Selectors changed since: the page has to be looked at again.
+    assert not negative.is_empty("100", 1, 2015, "another-plan")
+    assert not negative.is_empty("100", 12, 2015, version)
+    negative.close()
+
+    negative = NegativeCache(path)
+    assert negative.is_empty("100", 1, 2015, version)
+    negative.mark_empty("100", 1, 2015, "another-plan")
+    assert not negative.is_empty("100", 1, 2015, version)
+    assert (negative.hits, negative.recorded) == (1, 1)
+    negative.close()
+
+
+def test_negative_entries_expire(tmp_path: Path) -> None:
+    negative = NegativeCache(tmp_path / "negative.sqlite", ttl=lambda year: -1.0)
+    negative.mark_empty("100", 1, 2015)
+    assert not negative.is_empty("100", 1, 2015)
+    negative.close()
+    assert negative_ttl(2014) is not None
+
+
+def test_unversioned_negative_cache_is_discarded(tmp_path: Path) -> None:
+    path = tmp_path / "negative.sqlite"
+    db = sqlite3.connect(path)
+    db.execute(
+        "CREATE TABLE empty_pages (unit_id TEXT, survey INTEGER, year INTEGER, recorded_at REAL, "
+        "PRIMARY KEY (unit_id, survey, year))"
+    )
+    db.execute("INSERT INTO empty_pages VALUES ('100', 1, 2015, ?)", (time.time(),))
+    db.commit()
+    db.close()
+
+    negative = NegativeCache(path)
+    assert not negative.is_empty("100", 1, 2015)
+    negative.close()
+
+
+def test_plan_version_tracks_selectors() -> None:
+    assert compile_plan(1, 2015).version == compile_plan(1, 2016).version
+    assert compile_plan(1, 2015).version != compile_plan(1, 2023).version
+
+
+def test_table_status_tells_no_data_from_missing() -> None:
+    plan = compile_plan(1, 2015)
+
+    def status(html: str) -> str:
+        return asyncio.run(table_status(StaticFrame(html), plan.wait, timeout=10))
+
+    assert status(survey_page(1, 2015)) == TABLE_FOUND
+    assert status(survey_page(1, 2015, no_data=True)) == NO_DATA
+    assert status(page_html(1, "<p>Something else</p>")) == TABLE_MISSING
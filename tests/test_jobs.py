@@ -0,0 +1,88 @@
+from __future__ import annotations
+
+import time
+from pathlib import Path
+
+from ipeds_crawler.jobs import DONE, FAILED, LEASED, JobStore
+
+SURVEYS = [1, 12]
+WORK = [("Alpha College", "100", 2021), ("Beta University", "200", 2021)]
+
+
+def store(path: Path, owner: str, **kwargs: float) -> JobStore:
+    jobs = JobStore(path / "jobs.sqlite", **kwargs)
+    # Every store in this process would otherwise share the host:pid owner.
+    jobs.owner = owner
+    return jobs
+
+
+def statuses(jobs: JobStore, unit_id: str) -> dict[int, tuple[str, int]]:
+    rows = jobs._db.execute("SELECT survey, status, attempts FROM tasks WHERE unit_id = ?", (unit_id,))
+    return {survey: (status, attempts) for survey, status, attempts in rows}
+
+
+def test_claim_leases_one_pair_at_a_time(tmp_path: Path) -> None:
+    a, b = store(tmp_path, "a"), store(tmp_path, "b")
+    assert a.enqueue(WORK, SURVEYS) == 2
+    assert a.enqueue(WORK, SURVEYS) == 0
+
+    first = a.claim()
+    assert [(t.unit_id, t.survey, t.attempts) for t in first] == [("100", 1, 1), ("100", 12, 1)]
+    assert [t.unit_id for t in b.claim()] == ["200", "200"]
+    assert a.claim() == []
+    assert a.open_tasks() == 4
+
+
+def test_expired_lease_is_claimed_again(tmp_path: Path) -> None:
+    crashed, peer = store(tmp_path, "crashed", lease_s=0.05), store(tmp_path, "peer", lease_s=0.05)
+    crashed.enqueue(WORK[:1], SURVEYS)
+    tasks = crashed.claim()
+    assert peer.claim() == []
+
+    time.sleep(0.1)
+    retried = peer.claim()
+    assert [(t.survey, t.attempts) for t in retried] == [(1, 2), (12, 2)]
+    # The lease now belongs to the peer: the old owner's late result is ignored.
+    crashed.complete(tasks[0], {"x": 1})
+    assert statuses(peer, "100") == {1: (LEASED, 2), 12: (LEASED, 2)}
+
+
+def test_lease_expiring_on_last_attempt_fails(tmp_path: Path) -> None:
+    jobs = store(tmp_path, "a", lease_s=0.05, max_attempts=1)
+    jobs.enqueue(WORK[:1], SURVEYS)
+    jobs.claim()
+    time.sleep(0.1)
+    assert jobs.claim() == []
+    assert statuses(jobs, "100") == {1: (FAILED, 1), 12: (FAILED, 1)}
+    assert jobs.open_tasks() == 0
+
+
+def test_record_is_handed_out_once(tmp_path: Path) -> None:
+    jobs = store(tmp_path, "a")
+    jobs.enqueue(WORK[:1], SURVEYS)
+    for task in jobs.claim():
+        jobs.complete(task, {f"s{task.survey}": task.survey})
+
+    record = jobs.take_record("100", 2021, SURVEYS)
+    assert record == {"s1": 1, "s12": 12, "year": 2021, "institution": "Alpha College", "unit_id": "100"}
+    assert jobs.take_record("100", 2021, SURVEYS) is None
+    assert statuses(jobs, "100") == {1: (DONE, 1), 12: (DONE, 1)}
+
+
+def test_recover_finished_pairs(tmp_path: Path) -> None:
+    jobs = store(tmp_path, "a", lease_s=0.05)
+    jobs.enqueue(WORK, SURVEYS)
+    for _ in WORK:
+        for task in jobs.claim():
+            jobs.complete(task, {"value": task.survey})
+    # Alpha was emitted (then lost with the process); Beta finished but was never emitted.
+    assert jobs.take_record("100", 2021, SURVEYS) is not None
+
+    assert [r["unit_id"] for r in jobs.recover(set(), SURVEYS)] == ["200"]
+    # Alpha's emit may still sit in a live peer's buffer until a lease has passed;
+    # after that it is written again, unlike Beta, which made it into the output.
+    time.sleep(0.1)
+    assert [r["unit_id"] for r in jobs.recover({("unit_id", "200", 2021)}, SURVEYS)] == ["100"]
+    # Pairs already in the output are not written twice.
+    time.sleep(0.1)
+    assert jobs.recover({("unit_id", "100", 2021), ("unit_id", "200", 2021)}, SURVEYS) == []
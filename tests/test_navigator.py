@@ -0,0 +1,96 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+from ipeds_crawler.navigator import ANCHOR_TIMEOUT_MS, GOTO_TIMEOUT_MS, Navigator
+
+DEFAULTS = {s: (s, GOTO_TIMEOUT_MS[s], ANCHOR_TIMEOUT_MS) for s in GOTO_TIMEOUT_MS}
+
+
+def succeed(nav: Navigator, strategy: str, n: int, goto_s: float, anchor_s: float, year: int = 2021) -> None:
+    for _ in range(n):
+        nav.record(1, year, strategy, True, goto_s, anchor_s)
+
+
+def order(nav: Navigator, survey: int = 1, year: int = 2021) -> list[str]:
+    return [strategy for strategy, _, _ in nav.plan(survey, year)]
+
+
+def test_untried_plan_uses_defaults_in_fixed_order() -> None:
+    assert Navigator().plan(1, 2021) == [DEFAULTS["iframe"], DEFAULTS["shell"]]
+
+
+def test_failing_strategy_drops_behind() -> None:
+    nav = Navigator(explore_every=0)
+    for _ in range(3):
+        nav.record(1, 2021, "iframe", False)
+    nav.record(1, 2021, "shell", True, 1.0, 0.5)
+    assert order(nav) == ["shell", "iframe"]
+    # Same layout shares the history; another layout or survey does not.
+    assert order(nav, year=2022) == ["shell", "iframe"]
+    assert order(nav, year=2023) == ["iframe", "shell"]
+    assert order(nav, survey=2) == ["iframe", "shell"]
+
+
+def test_explore_every_tries_runner_up_first() -> None:
+    nav = Navigator(explore_every=3)
+    succeed(nav, "iframe", 5, 0.5, 0.1)
+    assert [order(nav)[0] for _ in range(6)] == ["iframe", "iframe", "shell", "iframe", "iframe", "shell"]
+
+
+def test_timeouts_follow_observed_p99() -> None:
+    nav = Navigator(min_samples=10, explore_every=0)
+    succeed(nav, "iframe", 9, 0.5, 0.2)
+    assert nav.plan(1, 2021)[0] == DEFAULTS["iframe"]
+    succeed(nav, "iframe", 1, 0.75, 0.9)
+    # 3x headroom over the p99, here the slowest of 10 samples.
+    assert nav.plan(1, 2021)[0] == ("iframe", 2_250, 2_700)
+
+    nav = Navigator(min_samples=10, explore_every=0)
+    # Clamped between floor_ms and the defaults.
+    succeed(nav, "iframe", 10, 0.05, 0.01)
+    assert nav.plan(1, 2021)[0] == ("iframe", 1_000, 1_000)
+    succeed(nav, "iframe", 10, 30.0, 5.0)
+    assert nav.plan(1, 2021)[0] == DEFAULTS["iframe"]
+
+
+def test_last_strategy_gets_defaults() -> None:
+    nav = Navigator(min_samples=1, explore_every=0)
+    succeed(nav, "iframe", 2, 0.5, 0.1)
+    succeed(nav, "shell", 5, 0.5, 0.1)
+    nav.record(1, 2021, "iframe", False)
+    nav.record(1, 2021, "iframe", False)
+    plan = nav.plan(1, 2021)
+    assert plan[0] == ("shell", 1_500, 1_000)
+    assert plan[-1] == DEFAULTS["iframe"]
+
+
+def test_history_is_windowed() -> None:
+    nav = Navigator(window=5, explore_every=0)
+    for _ in range(5):
+        nav.record(1, 2021, "iframe", False)
+    nav.record(1, 2021, "shell", False)
+    assert order(nav) == ["shell", "iframe"]
+    succeed(nav, "iframe", 5, 0.5, 0.1)
+    assert order(nav) == ["iframe", "shell"]
+
+
+def test_save_and_load(tmp_path: Path) -> None:
+    path = tmp_path / "state" / "navigator.json"
+    nav = Navigator(path, min_samples=3, explore_every=0)
+    succeed(nav, "shell", 4, 0.4, 0.5)
+    nav.record(1, 2021, "iframe", False)
+    succeed(nav, "iframe", 3, 0.2, 0.1, year=2015)
+    nav.save()
+
+    loaded = Navigator(path, min_samples=3, explore_every=0)
+    for year in (2015, 2021, 2023):
+        assert loaded.plan(1, year) == nav.plan(1, year)
+    assert "shell page first for 1 (2020-2022)" in loaded.stats()
+    assert not list(path.parent.glob(".*.tmp"))
+
+
+def test_unreadable_state_is_ignored(tmp_path: Path) -> None:
+    path = tmp_path / "navigator.json"
+    path.write_text("{not json", encoding="utf-8")
+    assert Navigator(path).plan(1, 2021) == [DEFAULTS["iframe"], DEFAULTS["shell"]]
@@ -0,0 +1,65 @@
+from __future__ import annotations
+
+import random
+from typing import Any
+
+import pandas as pd
+import pytest
+
+from ipeds_crawler import normalize
+from ipeds_crawler.normalize import _coerce, coerce_series, normalize_series, normalize_value
+
+EDGE_CASES: list[Any] = [
+    "-", " -- ", "---", "–", "—", "", " ", "%", "$", "$,", ",",
+    "12%", " 12.5 % ", "1,234.5%", "12.345%", "0.125%", "100%", "-5%", "abc%",
+    "$1,234.5", "$0.125", "$ 12", "$-5", "$1.2.3",
+    "1,234", "1,234.567", "0.005", "2.675", "1.005", ".5", "5.", "-5", "-5.25", "+5", "1e3", "1.2.3",
+    "\t42\n", "\x1c7\x1f", " 42", "٣٤", "Biology", "Business, Management", "N/A",
+    "99999999999999999999.125", "12" * 20,
+    None, 0, 3, -2, 2.5, 2.675, 1e20, float("nan"), float("inf"), True, [1, 2],
+]
+
+
+def mixed_cells(n: int, seed: int = 0) -> list[Any]:
+    rng = random.Random(seed)
+    makers = [
+        lambda: f"{int(rng.paretovariate(1.2) * 10):,}",
+        lambda: f"{rng.randint(0, 10_000) / 100}%",
+        lambda: f"${rng.randint(0, 90_000) / 1000:,}",
+        lambda: f"{rng.random() * 100:.3f}",
+        lambda: f"{rng.randint(-50, 50)}",
+        lambda: rng.choice(EDGE_CASES),
+    ]
+    return [rng.choice(makers)() for _ in range(n)]
+
+
+def same(got: pd.Series, expected: list[Any]) -> None:
+    # repr tells 1 from 1.0 and treats nan as equal to itself.
+    assert [repr(v) for v in got.tolist()] == [repr(v) for v in expected]
+
+
+@pytest.fixture(params=["pyarrow", "scalar"])
+def backend(request: pytest.FixtureRequest, monkeypatch: pytest.MonkeyPatch) -> str:
+    if request.param == "pyarrow":
+        pytest.importorskip("pyarrow")
+    else:
+        monkeypatch.setattr(normalize, "_pyarrow", lambda: None)
+    return request.param
+
+
+@pytest.mark.parametrize("batch, scalar", [(normalize_series, normalize_value), (coerce_series, _coerce)])
+def test_batch_matches_scalar_path(backend: str, batch: Any, scalar: Any) -> None:
+    for cells in (EDGE_CASES, mixed_cells(5_000)):
+        same(batch(cells), [scalar(v) for v in cells])
+
+
+def test_series_index_is_kept() -> None:
+    values = pd.Series(["12%", "-", "$5"], index=[10, 20, 30])
+    out = normalize_series(values)
+    assert out.index.tolist() == [10, 20, 30]
+    assert out.tolist() == [0.12, None, 5]
+
+
+def test_all_strings_and_empty_input() -> None:
+    same(coerce_series(["1", " 2.5 ", "x"]), [1, 2.5, "x"])
+    assert normalize_series([]).tolist() == []
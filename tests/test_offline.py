@@ -0,0 +1,77 @@
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+
+from ipeds_crawler.extractors import default_selectors
+from ipeds_crawler.offline import StaticFrame
+from ipeds_crawler.schema import LAYOUT_YEARS
+
+PAGE = """
+<html><body>
+  <table class="grid" id="first">
+    <tr><td>Total  Enrollment</td><td class="number">1,200</td></tr>
+    <tr><td>Full-time</td><td class="number">900</td></tr>
+  </table>
+  <p class="note">Data <b>not</b> available</p>
+  <table class="grid" id="second">
+    <tr><td>Total enrollment</td><td class="number">75</td></tr>
+  </table>
+</body></html>
+"""
+
+# One labelled row per layout, marked up the way default_selectors expects.
+LAYOUT_ROWS = {
+    2014: '<table class="grid"><tr><td>Tuition</td><td><span>$5,000</span></td><td><span>$5,200</span></td></tr></table>',
+    2021: '<table class="grid"><tr><td>Tuition</td><td class="number">$5,000</td><td class="number">$5,200</td></tr></table>',
+    2023: (
+        '<table class="sc survey-t"><tr><td>Tuition</td>'
+        '<td class="sc-tb-r t-co"><span>$5,000</span></td><td class="sc-tb-r t-co"><span>$5,200</span></td></tr></table>'
+    ),
+}
+
+
+def texts(frame: StaticFrame, selector: str) -> list[str]:
+    return asyncio.run(frame.locator(selector).all_inner_texts())
+
+
+def test_has_text_is_case_and_whitespace_insensitive() -> None:
+    frame = StaticFrame(PAGE)
+    assert texts(frame, 'tr:has-text("total enrollment") td.number') == ["1,200", "75"]
+    # Matches text spread over child elements, and every ancestor containing it.
+    assert texts(frame, 'p:has-text("Data not available")') == ["Data not available"]
+    assert len(texts(frame, 'table:has-text("Full-time")')) == 1
+
+
+def test_text_is_needs_the_whole_text() -> None:
+    frame = StaticFrame(PAGE)
+    assert texts(frame, 'tr:has(td:text-is("Full-time")) td.number') == ["900"]
+    assert texts(frame, 'tr:has(td:text-is("Full")) td.number') == []
+
+
+def test_nth_and_first() -> None:
+    locator = StaticFrame(PAGE).locator("td.number")
+    assert asyncio.run(locator.nth(1).inner_text()) == "900"
+    assert asyncio.run(locator.nth(-1).inner_text()) == "75"
+    assert asyncio.run(locator.first.inner_text()) == "1,200"
+    assert asyncio.run(locator.nth(5).count()) == 0
+
+
+def test_comma_list_is_unique_and_in_document_order() -> None:
+    frame = StaticFrame(PAGE)
+    ids = asyncio.run(frame.locator("table#second, p.note, table.grid").all())
+    assert [asyncio.run(el.get_attribute("id")) for el in ids] == ["first", None, "second"]
+    # A comma inside a pseudo-class argument does not split the list.
+    assert texts(frame, 'td:has-text("1,200")') == ["1,200"]
+
+
+@pytest.mark.parametrize("year", LAYOUT_YEARS)
+def test_default_selectors_find_layout_rows(year: int) -> None:
+    table, value = default_selectors(year)
+    frame = StaticFrame(f"<html><body>{LAYOUT_ROWS[year]}</body></html>")
+    assert texts(frame, f'{table} tr:has-text("Tuition") {value}') == ["$5,000", "$5,200"]
+    # The other layouts' markup is not picked up by this year's selectors.
+    for other, html in LAYOUT_ROWS.items():
+        if default_selectors(other) != (table, value):
+            assert texts(StaticFrame(html), f"{table} {value}") == []
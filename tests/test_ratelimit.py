@@ -0,0 +1,69 @@
+from __future__ import annotations
+
+import asyncio
+import time
+
+import pytest
+
+from ipeds_crawler.ratelimit import AdaptiveRateLimiter
+
+
+def test_initial_rate_is_clamped() -> None:
+    assert AdaptiveRateLimiter(initial_rps=50, max_rps=8).rate == 8
+    assert AdaptiveRateLimiter(initial_rps=0.01, min_rps=0.2).rate == 0.2
+
+
+def test_fast_responses_raise_the_rate_up_to_the_ceiling() -> None:
+    limiter = AdaptiveRateLimiter(initial_rps=2, max_rps=2.25, increase=0.1)
+    limiter.record(0.2, 200)
+    assert limiter.rate == pytest.approx(2.1)
+    for _ in range(10):
+        limiter.record(0.2, 200)
+    assert limiter.rate == 2.25
+    assert limiter.peak_rps == 2.25
+
+
+@pytest.mark.parametrize("latency_s, status", [(0.2, 429), (0.2, 503), (0.2, 0), (5.0, 200)])
+def test_congestion_halves_the_rate(latency_s: float, status: int) -> None:
+    limiter = AdaptiveRateLimiter(initial_rps=4, target_latency_s=3.0)
+    limiter.record(latency_s, status)
+    assert limiter.rate == 2
+    assert limiter.decreases == 1
+    assert limiter.throttled == (1 if status != 200 else 0)
+
+
+def test_burst_of_failures_counts_once_per_cooldown() -> None:
+    limiter = AdaptiveRateLimiter(initial_rps=4, min_rps=0.5, cooldown_s=0.05)
+    for _ in range(5):
+        limiter.record(0.1, 503)
+    assert limiter.rate == 2
+    time.sleep(0.06)
+    for _ in range(5):
+        limiter.record(0.1, 503)
+    assert limiter.rate == 1
+    assert (limiter.decreases, limiter.throttled) == (2, 10)
+
+
+def test_rate_never_drops_below_the_floor() -> None:
+    limiter = AdaptiveRateLimiter(initial_rps=1, min_rps=0.8, cooldown_s=0)
+    for _ in range(5):
+        limiter.record(0.1, 429)
+    assert limiter.rate == 0.8
+
+
+def test_acquire_paces_all_workers_together() -> None:
+    limiter = AdaptiveRateLimiter(initial_rps=20, max_rps=20, burst=1)
+
+    async def worker(n: int) -> None:
+        for _ in range(n):
+            await limiter.acquire()
+
+    start = time.monotonic()
+
+    async def main() -> None:
+        await asyncio.gather(*(worker(3) for _ in range(3)))
+
+    asyncio.run(main())
+    # One token up front, then 8 more at 20/s between the three workers.
+    assert time.monotonic() - start >= 8 / 20 * 0.9
+    assert limiter.requests == 9
@@ -0,0 +1,168 @@
+from __future__ import annotations
+
+import asyncio
+import time
+
+import pytest
+from playwright.async_api import Error as PlaywrightError
+
+from ipeds_crawler.retry import (
+    CLOSED,
+    HALF_OPEN,
+    HTTP_4XX,
+    HTTP_5XX,
+    HTTP_429,
+    NAVIGATION,
+    OPEN,
+    OTHER,
+    SELECTOR,
+    TIMEOUT,
+    CircuitBreaker,
+    HttpStatusError,
+    Retrier,
+    RetryBudget,
+    RetryPolicy,
+    SelectorNotFound,
+    classify,
+    classify_status,
+)
+
+NO_WAIT = RetryPolicy(attempts=3, base_delay=0.0, base_delay_for={})
+
+
+@pytest.mark.parametrize(
+    "exc, kind",
+    [
+        (HttpStatusError(429), HTTP_429),
+        (HttpStatusError(503), HTTP_5XX),
+        (HttpStatusError(404), HTTP_4XX),
+        (TimeoutError(), TIMEOUT),
+        (asyncio.TimeoutError(), TIMEOUT),
+        (SelectorNotFound("no table"), SELECTOR),
+        (ConnectionResetError(), NAVIGATION),
+        (PlaywrightError("net::ERR_CONNECTION_RESET at https://nces.ed.gov"), NAVIGATION),
+        (PlaywrightError("Element is not visible"), OTHER),
+        (ValueError("bad"), OTHER),
+    ],
+)
+def test_classify(exc: BaseException, kind: str) -> None:
+    assert classify(exc) == kind
+
+
+def test_classify_status() -> None:
+    assert [classify_status(s) for s in (0, 200, 404, 429, 502)] == [NAVIGATION, None, None, HTTP_429, HTTP_5XX]
+
+
+def test_delay_is_jittered_under_the_backoff_ceiling() -> None:
+    policy = RetryPolicy(base_delay=1.0, backoff=2.0, max_delay=3.0)
+    for attempt, ceiling in ((1, 1.0), (2, 2.0), (5, 3.0)):
+        delays = [policy.delay(TIMEOUT, attempt) for _ in range(200)]
+        assert min(delays) >= 0 and max(delays) <= ceiling
+    # 429s back off from a longer base.
+    assert max(policy.delay(HTTP_429, 1) for _ in range(200)) > 1.0
+
+
+def test_budget_caps_retries_to_a_share_of_calls() -> None:
+    budget = RetryBudget(ratio=0.5, floor=1)
+    for _ in range(4):
+        budget.record_call()
+    # floor 1 + 0.5 * 4 calls = 3 retries.
+    assert [budget.try_spend() for _ in range(4)] == [True, True, True, False]
+    assert budget.denied == 1
+
+
+def test_budget_forgets_old_retries() -> None:
+    budget = RetryBudget(ratio=0.0, floor=1, window_s=0.05)
+    assert budget.try_spend()
+    assert not budget.try_spend()
+    time.sleep(0.1)
+    assert budget.try_spend()
+
+
+def test_breaker_opens_probes_and_closes() -> None:
+    breaker = CircuitBreaker("nces.ed.gov", threshold=2, cooldown_s=0.05)
+    breaker.record(HTTP_5XX)
+    assert breaker.state == CLOSED
+    breaker.record(TIMEOUT)
+    assert breaker.state == OPEN and breaker.trips == 1
+
+    async def main() -> None:
+        start = time.monotonic()
+        await breaker.wait()
+        assert time.monotonic() - start >= 0.04
+        assert breaker.state == HALF_OPEN
+        # Only one probe at a time: a second caller waits for its verdict.
+        second = asyncio.ensure_future(breaker.wait())
+        await asyncio.sleep(0.02)
+        assert not second.done()
+        breaker.record(None)
+        await asyncio.wait_for(second, 1)
+
+    asyncio.run(main())
+    assert breaker.state == CLOSED
+
+
+def test_failed_probe_doubles_cooldown() -> None:
+    breaker = CircuitBreaker("nces.ed.gov", threshold=1, cooldown_s=0.05)
+    breaker.record_failure()
+    asyncio.run(breaker.wait())
+    breaker.record(HTTP_429)
+    assert breaker.state == OPEN and breaker.trips == 2
+    assert breaker._cooldown_s == pytest.approx(0.1)
+    # Client errors say nothing about the host's health.
+    breaker.record(HTTP_4XX)
+    assert breaker.state == CLOSED
+
+
+def flaky(*errors: BaseException):
+    calls: list[int] = []
+
+    async def fn() -> str:
+        calls.append(1)
+        if len(calls) <= len(errors):
+            raise errors[len(calls) - 1]
+        return "ok"
+
+    return fn, calls
+
+
+def test_retrier_retries_transient_errors() -> None:
+    retrier = Retrier(policy=NO_WAIT)
+    fn, calls = flaky(TimeoutError(), HttpStatusError(503))
+    assert asyncio.run(retrier.call(fn, host="nces.ed.gov")) == "ok"
+    assert len(calls) == 3
+    assert retrier.retries == {TIMEOUT: 1, HTTP_5XX: 1}
+    assert retrier.breaker("nces.ed.gov").state == CLOSED
+
+
+def test_retrier_gives_up() -> None:
+    retrier = Retrier(policy=NO_WAIT)
+    fn, calls = flaky(HttpStatusError(404))
+    with pytest.raises(HttpStatusError):
+        asyncio.run(retrier.call(fn))
+    assert len(calls) == 1
+
+    fn, calls = flaky(TimeoutError(), TimeoutError(), TimeoutError())
+    with pytest.raises(TimeoutError):
+        asyncio.run(retrier.call(fn))
+    assert len(calls) == 3
+
+
+def test_retrier_respects_budget() -> None:
+    retrier = Retrier(policy=NO_WAIT, budget=RetryBudget(ratio=0.0, floor=0))
+    fn, calls = flaky(TimeoutError())
+    with pytest.raises(TimeoutError):
+        asyncio.run(retrier.call(fn))
+    assert len(calls) == 1
+    assert "1 denied by budget" in retrier.stats()
+
+
+def test_retrier_trips_breaker_per_host() -> None:
+    retrier = Retrier(policy=RetryPolicy(attempts=1), breaker_threshold=2, breaker_cooldown_s=60)
+    for _ in range(2):
+        fn, _ = flaky(HttpStatusError(503))
+        with pytest.raises(HttpStatusError):
+            asyncio.run(retrier.call(fn, host="nces.ed.gov"))
+    assert retrier.breaker("nces.ed.gov").state == OPEN
+    assert retrier.breaker("127.0.0.1").state == CLOSED
+    assert "1 circuit trips" in retrier.stats()
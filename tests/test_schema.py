@@ -0,0 +1,25 @@
+from __future__ import annotations
+
+import pytest
+
+from ipeds_crawler.schema import KEY_DTYPES, dtype_for, registry_columns
+
+NUMERIC = {"Int64", "Float64", "int16"}
+
+
+def test_registry_columns_cover_keys() -> None:
+    columns = registry_columns()
+    assert len(columns) == len(set(columns))
+    assert set(KEY_DTYPES) <= set(columns)
+
+
+@pytest.mark.parametrize("column", registry_columns())
+def test_survey_columns_are_numeric(column: str) -> None:
+    # Every value a survey page yields is a number; only the key columns are text.
+    expected = {"string"} if column in ("institution", "unit_id") else NUMERIC
+    assert dtype_for(column) in expected
+
+
+@pytest.mark.parametrize("column", [c for c in registry_columns() if c.endswith("_major")])
+def test_major_columns_are_counts(column: str) -> None:
+    assert dtype_for(column) == "Int64"
@@ -0,0 +1,60 @@
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Any
+
+import pytest
+
+from ipeds_crawler.shard import iter_records, merge_outputs, parse_shard, shard_of, shard_work
+from ipeds_crawler.sinks import CsvSink, ParquetSink
+
+
+def test_parse_shard() -> None:
+    assert parse_shard("2/4") == (2, 4)
+    for spec in ("4/4", "-1/4", "0/0", "a/b", "1"):
+        with pytest.raises(ValueError):
+            parse_shard(spec)
+
+
+def test_shards_partition_the_work() -> None:
+    work = [(f"College {u}", u, year) for u in range(100, 160) for year in (2019, 2020, 2021)]
+    shards = [shard_work(work, i, 4) for i in range(4)]
+    assert sorted(item for shard in shards for item in shard) == sorted(work)
+    assert all(shards)
+    # Stable: the same pair always lands on the same shard, whatever the unit_id's type.
+    assert shard_of("150", 2020, 4) == shard_of(150, 2020, 4) == shard_of(150, "2020", 4)
+
+
+def write(sink_cls: type, path: Path, records: list[dict[str, Any]]) -> Path:
+    with sink_cls(path, batch_rows=1) as sink:
+        for record in records:
+            sink.write(record)
+    return path
+
+
+def record(unit_id: int, year: int, **values: Any) -> dict[str, Any]:
+    return {"institution": f"College {unit_id}", "unit_id": unit_id, "year": year, **values}
+
+
+@pytest.mark.parametrize("fmt", ["csv", "parquet"])
+def test_merge_keeps_first_record_per_pair(tmp_path: Path, fmt: str) -> None:
+    sink_cls, name = (CsvSink, "shard{}.csv") if fmt == "csv" else (ParquetSink, "shard{}")
+    if fmt == "parquet":
+        pytest.importorskip("pyarrow")
+    first = write(sink_cls, tmp_path / name.format(0), [record(100, 2020, total_enrollment=1), record(101, 2020)])
+    # A column that only the later file has must survive the merge.
+    second = write(
+        sink_cls,
+        tmp_path / name.format(1),
+        [record(101, 2020, total_enrollment=99), record(102, 2021, retention_rate=0.5)],
+    )
+
+    out = tmp_path / "merged.csv"
+    assert merge_outputs([first, second], CsvSink(out)) == (3, 1)
+    merged = {int(r["unit_id"]): r for r in iter_records(out)}
+    assert sorted(merged) == [100, 101, 102]
+    assert merged[101]["total_enrollment"] is None
+    assert float(merged[102]["retention_rate"]) == 0.5
+
+    # Merging again into the same output adds nothing.
+    assert merge_outputs([first, second], CsvSink(out)) == (0, 4)
@@ -0,0 +1,80 @@
+from __future__ import annotations
+
+import csv
+from pathlib import Path
+
+import pytest
+
+from ipeds_crawler.sinks import BufferedSink, CsvSink
+
+
+def read_rows(path: Path) -> list[list[str]]:
+    with open(path, newline="", encoding="utf-8") as f:
+        return list(csv.reader(f))
+
+
+def test_column_added_after_header_widens_file(tmp_path: Path) -> None:
+    path = tmp_path / "out.csv"
+    with CsvSink(path, batch_rows=1) as sink:
+        sink.write({"institution": "Alpha", "year": 2021, "a": 1})
+        sink.checkpoint()
+        sink.write({"institution": "Beta", "year": 2021, "b": 2.5})
+        sink.write({"institution": "Gamma", "year": 2020, "a": None, "b": 3})
+
+    assert read_rows(path) == [
+        ["institution", "year", "a", "b"],
+        ["Alpha", "2021", "1", ""],
+        ["Beta", "2021", "", "2.5"],
+        ["Gamma", "2020", "", "3"],
+    ]
+
+
+def test_reopen_keeps_existing_header_order(tmp_path: Path) -> None:
+    path = tmp_path / "out.csv"
+    path.write_text("institution,year,a\nAlpha,2021,1\n", encoding="utf-8")
+    with CsvSink(path) as sink:
+        sink.write({"a": 2, "year": 2020, "institution": "Beta"})
+
+    assert read_rows(path)[1:] == [["Alpha", "2021", "1"], ["Beta", "2020", "2"]]
+
+
+def test_truncated_last_line_is_dropped(tmp_path: Path) -> None:
+    path = tmp_path / "out.csv"
+    # A crash mid-write left half a row behind.
+    path.write_text("institution,year,a\nAlpha,2021,1\nBeta,20", encoding="utf-8")
+    with CsvSink(path) as sink:
+        sink.write({"institution": "Gamma", "year": 2020, "a": 3})
+
+    assert read_rows(path) == [["institution", "year", "a"], ["Alpha", "2021", "1"], ["Gamma", "2020", "3"]]
+
+
+def test_truncated_header_starts_over(tmp_path: Path) -> None:
+    path = tmp_path / "out.csv"
+    path.write_text("institution,ye", encoding="utf-8")
+    with CsvSink(path) as sink:
+        sink.write({"institution": "Alpha", "year": 2021})
+
+    assert read_rows(path) == [["institution", "year"], ["Alpha", "2021"]]
+
+
+def test_shared_sinks_agree_on_header(tmp_path: Path) -> None:
+    path = tmp_path / "out.csv"
+    first, second = CsvSink(path, shared=True, batch_rows=1), CsvSink(path, shared=True, batch_rows=1)
+    with first, second:
+        first.write({"institution": "Alpha", "year": 2021, "a": 1})
+        first.checkpoint()
+        second.write({"institution": "Beta", "year": 2021, "b": 2})
+        second.checkpoint()
+        first.write({"institution": "Gamma", "year": 2020, "a": 3})
+
+    assert read_rows(path) == [
+        ["institution", "year", "a", "b"],
+        ["Alpha", "2021", "1", ""],
+        ["Beta", "2021", "", "2"],
+        ["Gamma", "2020", "3", ""],
+    ]
+
+
+def test_buffered_sink_is_abstract(tmp_path: Path) -> None:
+    with pytest.raises(TypeError):
+        BufferedSink(tmp_path / "out.csv")  # type: ignore[abstract]
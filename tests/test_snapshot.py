@@ -0,0 +1,81 @@
+from __future__ import annotations
+
+import asyncio
+from typing import Any
+
+import pytest
+
+from ipeds_crawler.extractors import get_box_data, get_text_data, snapshot_tables
+from ipeds_crawler.fixtures import survey_page
+from ipeds_crawler.offline import StaticFrame
+from ipeds_crawler.schema import LAYOUT_YEARS
+from ipeds_crawler.surveys import REGISTRY, compile_plan
+
+# Two tables told apart only by a header row, a label that is a substring of another,
+# a nested table and a row with more value cells than the box lookup reads.
+PAGE = """
+<html><body>
+  <table class="grid">
+    <tr><td>Undergraduate</td></tr>
+    <tr><td>Tuition</td><td class="number">$5,000</td><td class="number">$5,200</td></tr>
+    <tr><td>Tuition and fees</td><td class="number">$6,000</td></tr>
+    <tr><td>Graduation rate %</td><td class="number">45%</td></tr>
+  </table>
+  <table class="grid">
+    <tr><td>Graduate</td></tr>
+    <tr><td>Tuition</td><td class="number">$9,000</td></tr>
+    <tr><td>Outer<table class="grid"><tr><td>Tuition</td><td class="number">$1</td></tr></table></td></tr>
+  </table>
+  <table class="grid">
+    <tr><td>Applicants</td><td><input value="120"></td><td><input value="80"></td><td><input value="7"></td></tr>
+  </table>
+</body></html>
+"""
+
+
+def both(frame: StaticFrame, year: int, label: str, **kwargs: Any) -> tuple[Any, Any]:
+    extra = [(kwargs.get("table_selector"), kwargs.get("value_selector"))] if "table_selector" in kwargs else []
+    snap = asyncio.run(snapshot_tables(frame, year, extra))
+    if kwargs.pop("box", False):
+        return snap.box_data(label, year, **kwargs), asyncio.run(get_box_data(frame, label, year, **kwargs))
+    return snap.text_data(label, year, **kwargs), asyncio.run(get_text_data(frame, label, year, **kwargs))
+
+
+@pytest.mark.parametrize(
+    "label, kwargs",
+    [
+        ("Tuition", {}),
+        ("Tuition", {"exact": True}),
+        ("Tuition", {"table_header": "graduate"}),
+        ("Tuition", {"table_header": "Undergraduate", "exact": True}),
+        ("Graduation rate %", {}),
+        ("Not on the page", {}),
+        ("Applicants", {"box": True, "table_selector": "table.grid", "value_selector": "input"}),
+        ("Applicants", {"box": True, "num_box": 3, "table_selector": "table.grid", "value_selector": "input"}),
+    ],
+)
+def test_snapshot_matches_locators(label: str, kwargs: dict[str, Any]) -> None:
+    snap_value, locator_value = both(StaticFrame(PAGE), 2021, label, **kwargs)
+    assert snap_value == locator_value
+
+
+@pytest.mark.parametrize("year", LAYOUT_YEARS)
+@pytest.mark.parametrize("survey", list(REGISTRY))
+def test_snapshot_matches_locators_on_survey_pages(survey: int, year: int) -> None:
+    frame = StaticFrame(survey_page(survey, year))
+    plan = compile_plan(survey, year)
+    snap = asyncio.run(snapshot_tables(frame, year, plan.selectors))
+    for q in plan.queries:
+        for label in q.labels:
+            selectors = {"table_selector": q.table, "value_selector": q.value}
+            if q.box:
+                expected = asyncio.run(get_box_data(frame, label, year, **selectors))
+                assert snap.box_data(label, year, **selectors) == expected, (q.name, label)
+            else:
+                expected = asyncio.run(
+                    get_text_data(frame, label, year, table_header=q.header, exact=q.exact, **selectors)
+                )
+                assert snap.text_data(label, year, table_header=q.header, exact=q.exact, **selectors) == expected, (
+                    q.name,
+                    label,
+                )
@@ -0,0 +1,58 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import re
+from pathlib import Path
+from typing import Any
+
+import pytest
+
+from ipeds_crawler.fixtures import survey_page
+from ipeds_crawler.offline import StaticFrame
+from ipeds_crawler.orchestrator import SURVEYS, extract_survey
+from ipeds_crawler.surveys import REGISTRY, compile_plan
+
+# Output of the hand-written per-survey functions the registry replaced, recorded over
+# the fixture page of every survey and layout ("<survey>:<year>:0") and over each
+# variant with one table row removed ("<survey>:<year>:<row>"). Variants on which the
+# old code raised instead of returning a record are not in the file.
+OLD_OUTPUT = json.loads((Path(__file__).parent / "data" / "old_survey_output.json").read_text(encoding="utf-8"))
+
+# The old finance code wrote a missing row as [] where every other survey wrote None.
+FINANCE = 6
+
+logger = logging.getLogger("ipeds_crawler.tests")
+logger.disabled = True
+
+
+def page_variant(survey: int, year: int, dropped_row: int) -> str:
+    html = survey_page(survey, year)
+    rows = [(0, 0)] + [m.span() for m in re.finditer(r"<tr>.*?</tr>", html, re.S)]
+    start, end = rows[dropped_row]
+    return html[:start] + html[end:]
+
+
+def registry_output(survey: int, year: int, dropped_row: int) -> dict[str, Any]:
+    frame = StaticFrame(page_variant(survey, year, dropped_row))
+    _, record = asyncio.run(extract_survey(frame, compile_plan(survey, year), logger))
+    # Same JSON round trip as the recorded output (tuples become lists).
+    return json.loads(json.dumps(record))
+
+
+@pytest.mark.parametrize("key", list(OLD_OUTPUT))
+def test_registry_matches_old_per_survey_output(key: str) -> None:
+    survey, year, dropped_row = map(int, key.split(":"))
+    expected = OLD_OUTPUT[key]
+    if survey == FINANCE:
+        expected = {k: None if v == [] else v for k, v in expected.items()}
+    got = registry_output(survey, year, dropped_row)
+    assert list(got) == list(expected)
+    assert got == expected
+
+
+def test_every_survey_and_layout_is_covered() -> None:
+    recorded = {tuple(map(int, key.split(":")[:2])) for key in OLD_OUTPUT}
+    assert {survey for survey, _ in recorded} == set(REGISTRY) == set(SURVEYS)
+    assert len(recorded) == len(REGISTRY) * 3
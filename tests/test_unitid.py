@@ -0,0 +1,67 @@
+from __future__ import annotations
+
+import random
+from difflib import SequenceMatcher
+
+import pandas as pd
+import pytest
+
+from ipeds_crawler.normalize import UnitIdIndex, get_best_unitid
+
+WORDS = ["University", "College", "State", "Community", "Technical", "Institute", "of", "Saint", "North", "Valley"]
+PLACES = ["Alabama", "Ohio", "Texas", "Maine", "Boston", "Austin", "Dayton", "Provo", "São Paulo", "Zürich"]
+
+
+def full_scan(df: pd.DataFrame, name: str, threshold: float = 0.75) -> tuple[str, str, float] | None:
+    # The original get_best_unitid: score every row, first row wins ties.
+    if df.empty or not name:
+        return None
+    df = df.assign(sim=df["INSTNM"].apply(lambda s: SequenceMatcher(None, str(s).lower(), name.lower()).ratio()))
+    best = df.loc[df["sim"].idxmax()]
+    if best["sim"] < threshold:
+        return None
+    return str(best["UNITID"]), best["INSTNM"], float(best["sim"])
+
+
+def hd_frame(n: int, seed: int = 0) -> pd.DataFrame:
+    rng = random.Random(seed)
+    names = [" ".join(rng.sample(WORDS, rng.randint(1, 3)) + [rng.choice(PLACES)]) for _ in range(n)]
+    # Duplicate names (chain campuses) and names that only differ in case.
+    names += names[:5] + [names[5].upper(), "", "A"]
+    return pd.DataFrame({"INSTNM": names, "UNITID": range(100_000, 100_000 + len(names))})
+
+
+def queries(df: pd.DataFrame, seed: int = 1) -> list[str]:
+    rng = random.Random(seed)
+    out = []
+    for name in rng.sample(df["INSTNM"].tolist(), 40):
+        out.append(name)
+        out.append(name.lower().replace("university", "univ").replace("saint", "st"))
+        out.append(name[: max(1, len(name) // 2)])
+    return out + ["Zürich Institute", "q", "xyz", "University"]
+
+
+@pytest.mark.parametrize("threshold", [0.0, 0.75, 0.95])
+def test_index_matches_full_scan(threshold: float) -> None:
+    df = hd_frame(300)
+    index = UnitIdIndex(df)
+    for name in queries(df):
+        expected = full_scan(df, name, threshold)
+        assert index.best(name, threshold) == expected, name
+        assert get_best_unitid(df, name, threshold) == expected, name
+
+
+def test_index_prunes_and_reuses_lookups() -> None:
+    df = hd_frame(300)
+    index = UnitIdIndex(df)
+    names = queries(df)
+    assert index.match_many(names + names) == [full_scan(df, n) for n in names + names]
+    # Every distinct query scored once, each far fewer times than there are rows.
+    assert index.scored < len(set(names)) * len(index) / 4
+
+
+def test_empty_inputs() -> None:
+    empty = pd.DataFrame({"INSTNM": [], "UNITID": []})
+    assert get_best_unitid(empty, "Ohio State") is None
+    assert UnitIdIndex(empty).best("Ohio State") is None
+    assert UnitIdIndex(hd_frame(10)).best("") is None